@@ -15,7 +15,10 @@ def create_app():
     app.config.from_object(Config)
     db.init_app(app)
     Migrate(app, db, compare_type=True)
-    from models import user, student, school, address, transfer, attendance, donation, extrafund
+    from models import region, user, student, school, address, transfer, attendance, donation, extrafund, \
+        rate_limit, statement_job, exchange_rate
+    from models.partition import ensure_year_partitions
+    app.before_first_request(ensure_year_partitions)
     app.register_blueprint(api.api)
     return app
 
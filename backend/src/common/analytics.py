@@ -0,0 +1,161 @@
+"""
+analytics snapshot module
+donations joined with donator and attendance kept as NumPy columns, categorical dimensions are stored
+as int codes so group by, sum and count run as vectorized array operations without database round trip
+"""
+import time
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from common.error import ValidateFail
+
+DIMENSIONS = ("year", "month", "country", "role", "school_id", "grade", "status")
+METRICS = ("count", "mmk_amount", "jpy_amount")
+MONTHS = ("january", "february", "march", "april", "may", "june",
+          "july", "august", "september", "october", "november", "december")
+
+
+class _Columns:
+    """
+    immutable column arrays of one snapshot version, replaced as a whole on load and append
+    """
+
+    def __init__(self, codes: Dict[str, np.ndarray], mmk_amount: np.ndarray, jpy_amount: np.ndarray,
+                 max_id: int) -> None:
+        self.codes = codes
+        self.mmk_amount = mmk_amount
+        self.jpy_amount = jpy_amount
+        self.max_id = max_id
+
+
+class AnalyticsSnapshot:
+    """
+    columnar donation snapshot, full load replaces all columns and append adds rows after max_id
+    categories only grow, so codes of older column versions stay valid for running queries
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._categories: Dict[str, List[Any]] = {dimension: [] for dimension in DIMENSIONS}
+        self._index: Dict[str, Dict[Any, int]] = {dimension: {} for dimension in DIMENSIONS}
+        self._columns = _Columns({dimension: np.zeros(0, dtype=np.int32) for dimension in DIMENSIONS},
+                                 np.zeros(0), np.zeros(0), 0)
+        self.refreshed_at: Optional[float] = None
+
+    @property
+    def max_id(self) -> int:
+        return self._columns.max_id
+
+    @property
+    def size(self) -> int:
+        return len(self._columns.mmk_amount)
+
+    def __code(self, dimension: str, value: Any) -> int:
+        """
+        category code of value, new value is added to categories
+        """
+        index = self._index[dimension]
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(self._categories[dimension])
+            self._categories[dimension].append(value)
+        return code
+
+    def __encode(self, columns: List[str], row_chunks: Iterable[List], base: _Columns) -> _Columns:
+        """
+        encode row chunks and concatenate them after base columns
+        :param columns: row column names, id, year, month, mmk_amount, jpy_amount, paid, country, role, school_id, grade
+        :param row_chunks:
+        :param base: columns to append to
+        :return: new columns
+        """
+        codes = {dimension: [base.codes[dimension]] for dimension in DIMENSIONS}
+        mmk_amount, jpy_amount, max_id = [base.mmk_amount], [base.jpy_amount], base.max_id
+        for rows in row_chunks:
+            rows = [dict(zip(columns, row)) for row in rows]
+            for row in rows:
+                row["status"] = "paid" if row["paid"] else "pending"
+            for dimension in DIMENSIONS:
+                codes[dimension].append(np.fromiter((self.__code(dimension, row[dimension]) for row in rows),
+                                                    dtype=np.int32, count=len(rows)))
+            mmk_amount.append(np.fromiter((row["mmk_amount"] or 0.0 for row in rows), dtype=np.float64,
+                                          count=len(rows)))
+            jpy_amount.append(np.fromiter((row["jpy_amount"] or 0.0 for row in rows), dtype=np.float64,
+                                          count=len(rows)))
+            max_id = max(max_id, rows[-1]["id"])
+        return _Columns({dimension: np.concatenate(arrays) for dimension, arrays in codes.items()},
+                        np.concatenate(mmk_amount), np.concatenate(jpy_amount), max_id)
+
+    def load(self, columns: List[str], row_chunks: Iterable[List]) -> None:
+        """
+        replace snapshot with rows
+        :param columns: row column names
+        :param row_chunks: row chunks ordered by id
+        """
+        empty = _Columns({dimension: np.zeros(0, dtype=np.int32) for dimension in DIMENSIONS},
+                         np.zeros(0), np.zeros(0), 0)
+        with self._lock:
+            self._columns = self.__encode(columns, row_chunks, empty)
+            self.refreshed_at = time.monotonic()
+
+    def append(self, columns: List[str], row_chunks: Iterable[List]) -> None:
+        """
+        append rows created after last load or append
+        :param columns: row column names
+        :param row_chunks: row chunks ordered by id
+        """
+        with self._lock:
+            self._columns = self.__encode(columns, row_chunks, self._columns)
+
+    def query(self, group_by: List[str], metrics: List[str],
+              filters: Dict[str, List[Any]] = None) -> List[Dict[str, Any]]:
+        """
+        group by dimensions and aggregate metrics over filtered rows
+        :param group_by: dimensions, empty for one total row
+        :param metrics: count, mmk_amount and/or jpy_amount
+        :param filters: dimension to accepted values
+        :return: list of dimension values and metrics
+        """
+        unknown = [name for name in list(group_by) + list(filters or {}) if name not in DIMENSIONS] + \
+            [name for name in metrics if name not in METRICS]
+        if unknown:
+            raise ValidateFail("Unknown analytics dimension or metric {}".format(", ".join(unknown)))
+        data = self._columns
+        sizes = [len(self._categories[dimension]) for dimension in group_by]
+        mask = np.ones(len(data.mmk_amount), dtype=bool)
+        for dimension, values in (filters or {}).items():
+            index = self._index[dimension]
+            mask &= np.isin(data.codes[dimension], [index[value] for value in values if value in index])
+        keys = np.zeros(int(mask.sum()), dtype=np.int64)
+        for dimension, size in zip(group_by, sizes):
+            keys = keys * size + data.codes[dimension][mask]
+        groups, inverse = np.unique(keys, return_inverse=True)
+        aggregates = {"count": np.bincount(inverse, minlength=len(groups))}
+        if "mmk_amount" in metrics:
+            aggregates["mmk_amount"] = np.bincount(inverse, weights=data.mmk_amount[mask], minlength=len(groups))
+        if "jpy_amount" in metrics:
+            aggregates["jpy_amount"] = np.bincount(inverse, weights=data.jpy_amount[mask], minlength=len(groups))
+        group_codes = {}
+        remaining = groups.copy()
+        for dimension, size in reversed(list(zip(group_by, sizes))):
+            group_codes[dimension] = remaining % size
+            remaining //= size
+        results = [{
+            **{dimension: self._categories[dimension][int(group_codes[dimension][i])] for dimension in group_by},
+            **{metric: aggregates[metric][i].item() for metric in metrics}
+        } for i in range(len(groups))]
+        results.sort(key=lambda result: [_sort_key(dimension, result[dimension]) for dimension in group_by])
+        return results
+
+
+def _sort_key(dimension: str, value: Any) -> tuple:
+    """
+    None last, month in calendar order
+    """
+    if value is None:
+        return 1, 0, ""
+    if dimension == "month" and value in MONTHS:
+        return 0, MONTHS.index(value), ""
+    return (0, value, "") if isinstance(value, (int, float)) else (0, 0, str(value))
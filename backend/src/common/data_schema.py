@@ -2,7 +2,7 @@
 schema module for request body
 use python library Schema
 """
-from schema import Schema, Or, Regex
+from schema import Schema, Or, Regex, Optional
 
 address_schema = Schema({
     "division": str,
@@ -74,9 +74,19 @@ donation_schema = Schema({
     "paid_at": Or(None, str)
 })
 
+donation_bulk_update_schema = Schema({
+    Optional("ids"): [int],
+    Optional("filter"): {str: Or(str, int)},
+    "set": {
+        Optional("paid_at"): Or(None, str),
+        Optional("transfer_id"): Or(None, int)
+    }
+})
+
 extra_funds_schema = Schema({
     "mmk_amount": int,
-    "transfer_id": int
+    "transfer_id": int,
+    Optional("jpy_amount"): Or(None, int, float)
 })
 
 transfer_schema = Schema({
@@ -86,6 +96,25 @@ transfer_schema = Schema({
     "total_jpy": int
 })
 
+transfer_allocation_schema = Schema({
+    Optional("received_mmk"): Or(int, float)
+})
+
+statement_job_schema = Schema({
+    "year": int
+})
+
+exchange_rates_schema = Schema({
+    "rates": [Or({
+        "year": int,
+        "month": str,
+        "jpy_to_mmk": Or(int, float)
+    }, {
+        "transfer_id": int,
+        "jpy_to_mmk": Or(int, float)
+    })]
+})
+
 student_schema = Schema({
     "name": str,
     "deactivated_at": Or(None, str),
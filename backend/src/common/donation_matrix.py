@@ -0,0 +1,50 @@
+"""
+donation matrix module
+grouped donation rows (donator, month) are scattered into a donator x 12 months x field NumPy array,
+then flattened to one row-major list per donator for a compact spreadsheet payload
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+MONTHS = ("january", "february", "march", "april", "may", "june",
+          "july", "august", "september", "october", "november", "december")
+MATRIX_FIELDS = ("status", "mmk_amount", "jpy_amount")
+STATUS_CODES = ("none", "pending", "paid", "partial")
+
+
+def donation_matrix(year: int, rows: List[Tuple]) -> Dict[str, Any]:
+    """
+    pivot grouped donation rows to donator x month cells
+    :param year:
+    :param rows: (user_id, display_name, month, donation_count, paid_count, mmk_amount, jpy_amount) ordered by user
+    :return: months, fields, status codes, donators as [id, name] and one cell row per donator,
+             cell row is status, mmk_amount, jpy_amount of january then february and so on
+    """
+    donators, index = [], {}
+    for row in rows:
+        if row[0] not in index:
+            index[row[0]] = len(donators)
+            donators.append([row[0], row[1]])
+    cells = np.zeros((len(donators), len(MONTHS), len(MATRIX_FIELDS)), dtype=np.float64)
+    if rows:
+        donator_codes = np.fromiter((index[row[0]] for row in rows), dtype=np.int64, count=len(rows))
+        month_codes = np.fromiter((MONTHS.index(row[2]) for row in rows), dtype=np.int64, count=len(rows))
+        counts = np.array([row[3:] for row in rows], dtype=np.float64)
+        donation_count, paid_count = counts[:, 0], counts[:, 1]
+        status = np.select([paid_count == 0, paid_count == donation_count],
+                           [STATUS_CODES.index("pending"), STATUS_CODES.index("paid")], STATUS_CODES.index("partial"))
+        cells[donator_codes, month_codes] = np.column_stack([status, counts[:, 2], counts[:, 3]])
+    cells = cells.reshape(len(donators), -1).tolist()
+    status_columns = range(0, len(MONTHS) * len(MATRIX_FIELDS), len(MATRIX_FIELDS))
+    for cell_row in cells:
+        for column in status_columns:
+            cell_row[column] = int(cell_row[column])
+    return {
+        "year": year,
+        "months": list(MONTHS),
+        "fields": list(MATRIX_FIELDS),
+        "status_codes": list(STATUS_CODES),
+        "donators": donators,
+        "cells": cells
+    }
@@ -99,3 +99,17 @@ class ThingahaCustomError(Error):
         super().__init__(description)
         self.error_code = "E0007"
         self.reason = "Request ERROR"
+
+
+class TooManyRequests(Error):
+    """Raised when rate limit or concurrency limit is exceeded"""
+    def __init__(self, description, retry_after: int = 1):
+        """
+        Too many requests error
+        :param description:
+        :param retry_after: seconds to wait before retry
+        """
+        super().__init__(description)
+        self.error_code = "E0008"
+        self.reason = "Too Many Requests"
+        self.retry_after = retry_after
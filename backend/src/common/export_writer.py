@@ -0,0 +1,68 @@
+"""
+export writer module
+encode streamed row chunks to CSV or NDJSON text chunks and optionally gzip them,
+one output chunk per row chunk so memory is bounded by chunk size
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, List
+
+
+def _export_value(value: Any) -> Any:
+    """
+    date and datetime to ISO 8601 string, other values as is
+    :param value:
+    """
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(columns: List[str], row_chunks: Iterable[List]) -> Iterator[str]:
+    """
+    header line then one CSV text chunk per row chunk
+    :param columns: column names
+    :param row_chunks: iterator of row lists
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in row_chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_export_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(columns: List[str], row_chunks: Iterable[List]) -> Iterator[str]:
+    """
+    one JSON object line per row, one text chunk per row chunk
+    :param columns: column names
+    :param row_chunks: iterator of row lists
+    """
+    for rows in row_chunks:
+        yield "".join(json.dumps(dict(zip(columns, map(_export_value, row))), ensure_ascii=False) + "\n"
+                      for row in rows)
+
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """
+    gzip encode text chunks as one gzip stream
+    :param chunks: text chunks
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", csv_chunks),
+    "ndjson": ("application/x-ndjson", ndjson_chunks)
+}
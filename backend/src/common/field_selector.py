@@ -0,0 +1,61 @@
+"""
+sparse fieldset and nested object expansion for list and item APIs
+?fields= limits response fields and loaded columns, ?expand= limits joined nested objects
+"""
+from typing import Dict, List, Tuple
+
+from common.error import ValidateFail
+
+
+class FieldSelector:
+    """
+    parse fields and expand query string values
+    both are comma separated, missing parameter means all (backward compatible response)
+    and empty expand value means no nested object
+    """
+
+    def __init__(self, fields: Dict[str, Tuple[str, ...]], expands: Tuple[str, ...]) -> None:
+        """
+        :param fields: response field to model column names it is built from
+        :param expands: nested object names which can be expanded
+        """
+        self.fields = fields
+        self.expands = expands
+
+    @staticmethod
+    def __split(value: str, choices, name: str) -> List[str]:
+        """
+        split comma separated value and check each item is in choices
+        :param value:
+        :param choices:
+        :param name: query parameter name for error message
+        :return: list of items
+        """
+        items = [item.strip() for item in (value or "").split(",") if item.strip()]
+        unknown = [item for item in items if item not in choices]
+        if unknown:
+            raise ValidateFail("Unknown {} {}, should be one of {}".format(
+                name, ", ".join(unknown), ", ".join(choices)))
+        return items
+
+    def parse(self, args: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """
+        parse fields and expand from query string dict
+        :param args:
+        :return: response fields (id is always included) and expanded nested objects
+        """
+        fields = list(self.fields)
+        if args.get("fields"):
+            fields = ["id"] + [field for field in self.__split(args["fields"], self.fields, "fields") if field != "id"]
+        expand = list(self.expands)
+        if "expand" in args:
+            expand = self.__split(args["expand"], self.expands, "expand")
+        return fields, expand
+
+    def columns(self, fields: List[str]) -> List[str]:
+        """
+        model column names to load for response fields
+        :param fields:
+        :return: column names
+        """
+        return sorted({column for field in fields for column in self.fields[field]})
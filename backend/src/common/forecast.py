@@ -0,0 +1,115 @@
+"""
+funding forecast module
+history rates are computed once from monthly series with NumPy, then projections for what-if parameters
+are vectorized over the forecast months
+"""
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+MONTHS = ("january", "february", "march", "april", "may", "june",
+          "july", "august", "september", "october", "november", "december")
+
+
+def to_period(year: int, month: str) -> int:
+    """
+    month count since year 0, consecutive months differ by 1
+    """
+    return year * 12 + MONTHS.index(month)
+
+
+def from_period(period: int) -> Tuple[int, str]:
+    return period // 12, MONTHS[period % 12]
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return float(numerator / denominator) if denominator else 0.0
+
+
+def history_rates(monthly: List[Tuple], donator_months: List[Tuple], extra_funds: List[Tuple],
+                  window: int = 12) -> Dict[str, Any]:
+    """
+    average rates of last window months with donations
+    :param monthly: (year, month, mmk_amount, jpy_amount, jpy_donation_mmk_amount, donators, students)
+    :param donator_months: distinct (user_id, year, month) of paid donations
+    :param extra_funds: (year, month, mmk_amount) of extra funds
+    :param window: months of history to average
+    :return: mmk per student month, jpy and mmk per donator month, jpy rate, monthly lapse rate,
+             extra fund mmk per month and history months
+    """
+    if not monthly:
+        return {"mmk_per_student": 0.0, "jpy_per_donator": 0.0, "mmk_per_donator": 0.0, "jpy_rate": 0.0,
+                "lapse_rate": 0.0, "extra_fund_mmk": 0.0, "months": 0}
+    periods = np.array([to_period(row[0], row[1]) for row in monthly])
+    values = np.array([row[2:] for row in monthly], dtype=np.float64)
+    recent = periods >= np.sort(periods)[-window:][0]
+    mmk, jpy, jpy_mmk, donators, students = values[recent].sum(axis=0)
+    first_period = int(periods[recent].min())
+
+    lapse_rate = 0.0
+    if donator_months:
+        donator_periods = np.array([(row[0], to_period(row[1], row[2])) for row in donator_months], dtype=np.int64)
+        donator_periods = donator_periods[donator_periods[:, 1] >= first_period]
+        keys = donator_periods[:, 0] * 100000 + donator_periods[:, 1]
+        # months with a following month in history, donators missing in next month are lapsed
+        followed = donator_periods[:, 1] < periods.max()
+        if followed.any():
+            lapse_rate = 1.0 - float(np.isin(keys[followed] + 1, keys).mean())
+
+    extra_fund_mmk = 0.0
+    if extra_funds:
+        extra_periods = np.array([to_period(row[0], row[1]) for row in extra_funds])
+        extra_amounts = np.array([row[2] for row in extra_funds], dtype=np.float64)
+        extra_fund_mmk = _ratio(extra_amounts[extra_periods >= first_period].sum(), int(recent.sum()))
+    return {
+        "mmk_per_student": _ratio(mmk, students),
+        "jpy_per_donator": _ratio(jpy, donators),
+        "mmk_per_donator": _ratio(mmk - jpy_mmk, donators),
+        "jpy_rate": _ratio(jpy_mmk, jpy),
+        "lapse_rate": lapse_rate,
+        "extra_fund_mmk": extra_fund_mmk,
+        "months": int(recent.sum())
+    }
+
+
+def project(rates: Dict[str, Any], start_period: int, months: int, students: int, donators: int,
+            new_enrolments: float = 0, jpy_rate: float = None, mmk_per_student: float = None,
+            lapse_rate: float = None) -> List[Dict[str, Any]]:
+    """
+    project monthly obligation, expected donations and shortfall
+    :param rates: history rates
+    :param start_period: first forecast month period
+    :param months: forecast months
+    :param students: active students now
+    :param donators: active donators now
+    :param new_enrolments: students added each month (what-if)
+    :param jpy_rate: JPY to MMK rate (what-if), history rate if None
+    :param mmk_per_student: monthly MMK need per student (what-if), history rate if None
+    :param lapse_rate: monthly donator lapse rate (what-if), history rate if None
+    :return: list of monthly projection
+    """
+    jpy_rate = rates["jpy_rate"] if jpy_rate is None else jpy_rate
+    mmk_per_student = rates["mmk_per_student"] if mmk_per_student is None else mmk_per_student
+    lapse_rate = rates["lapse_rate"] if lapse_rate is None else lapse_rate
+    elapsed = np.arange(1, months + 1)
+    projected_students = students + new_enrolments * elapsed
+    projected_donators = donators * (1.0 - lapse_rate) ** elapsed
+    obligation = projected_students * mmk_per_student
+    expected = projected_donators * (rates["jpy_per_donator"] * jpy_rate + rates["mmk_per_donator"])
+    balance = expected - obligation
+    shortfall = np.maximum(-balance, 0.0)
+    cumulative_shortfall = np.maximum(-np.cumsum(balance), 0.0)
+    projection = []
+    for i in range(months):
+        year, month = from_period(start_period + i)
+        projection.append({
+            "year": year,
+            "month": month,
+            "students": round(float(projected_students[i]), 2),
+            "donators": round(float(projected_donators[i]), 2),
+            "obligation_mmk": round(float(obligation[i]), 2),
+            "expected_mmk": round(float(expected[i]), 2),
+            "shortfall_mmk": round(float(shortfall[i]), 2),
+            "cumulative_shortfall_mmk": round(float(cumulative_shortfall[i]), 2)
+        })
+    return projection
@@ -0,0 +1,151 @@
+"""
+in-memory index for myanmar division, district and township hierarchy
+reference table ids are generated from division.json order, so the index
+can resolve address names to ids without DB round trip
+"""
+import difflib
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Any
+
+from common.config import load_config
+from common.error import FileNotFound, ValidateFail
+
+NAME_SUFFIXES = (" union territory", " region", " state", " division", " district", " township")
+FUZZY_MATCH_CUTOFF = 0.85
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    normalize region name for matching
+    lower case, remove spaces and brackets, strip suffix like state or region
+    :param name:
+    :return: normalized name
+    """
+    if not name:
+        return ""
+    name = re.sub(r"\s+", " ", name.strip().lower())
+    for suffix in NAME_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return re.sub(r"[\s()\-_.]", "", name)
+
+
+class DivisionIndex:
+    """
+    division, district and township hierarchy with generated ids
+    """
+
+    def __init__(self, mm_divisions: List[Dict[str, Any]]) -> None:
+        self.divisions = []
+        self.districts = []
+        self.townships = []
+        self._division_ids = {}
+        self._district_ids = {}
+        self._township_ids = {}
+        self._division_township_ids = {}
+        for division in mm_divisions:
+            division_id = len(self.divisions) + 1
+            self.divisions.append({"id": division_id, "name": division["division_name"]})
+            self._division_ids[normalize_name(division["division_name"])] = division_id
+            self._district_ids[division_id] = {}
+            self._division_township_ids[division_id] = {}
+            for district in division["districts"]:
+                district_id = len(self.districts) + 1
+                self.districts.append({"id": district_id, "name": district["district_name"],
+                                       "division_id": division_id})
+                self._district_ids[division_id][normalize_name(district["district_name"])] = district_id
+                self._township_ids[district_id] = {}
+                for township in district["townships"]:
+                    township_id = len(self.townships) + 1
+                    self.townships.append({"id": township_id, "name": township["township_name"],
+                                           "district_id": district_id})
+                    township_name = normalize_name(township["township_name"])
+                    self._township_ids[district_id][township_name] = township_id
+                    self._division_township_ids[division_id].setdefault(township_name, []).append(
+                        (district_id, township_id))
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "DivisionIndex":
+        """
+        load index from division json file
+        :param file_path:
+        :return: DivisionIndex
+        """
+        try:
+            with open(file_path, "r", encoding="utf-8") as division_file:
+                return cls(json.load(division_file))
+        except FileNotFoundError:
+            raise FileNotFound("Division file not found")
+
+    @staticmethod
+    def _match(name: Optional[str], candidates: Dict[str, Any]) -> Optional[Any]:
+        """
+        match name with candidates, exact normalized match first then fuzzy match for typos
+        :param name:
+        :param candidates: normalized name dict
+        :return: matched value or None
+        """
+        normalized_name = normalize_name(name)
+        if not normalized_name:
+            return None
+        if normalized_name in candidates:
+            return candidates[normalized_name]
+        matches = difflib.get_close_matches(normalized_name, candidates.keys(), n=1, cutoff=FUZZY_MATCH_CUTOFF)
+        return candidates[matches[0]] if matches else None
+
+    def resolve(self, division: Optional[str], district: Optional[str],
+                township: Optional[str]) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """
+        resolve division, district and township names to reference ids
+        township is searched in whole division when district can't be resolved
+        :param division:
+        :param district:
+        :param township:
+        :return: division_id, district_id, township_id
+        """
+        division_id = self._match(division, self._division_ids)
+        if division_id is None:
+            return None, None, None
+        district_id = self._match(district, self._district_ids[division_id])
+        if district_id is not None:
+            return division_id, district_id, self._match(township, self._township_ids[district_id])
+        townships = self._match(township, self._division_township_ids[division_id])
+        if townships and len(townships) == 1:
+            district_id, township_id = townships[0]
+            return division_id, district_id, township_id
+        return division_id, None, None
+
+    def resolve_filter(self, division: Optional[str] = None, district: Optional[str] = None,
+                       township: Optional[str] = None) -> Dict[str, int]:
+        """
+        resolve region filter names to address reference id columns
+        :param division:
+        :param district:
+        :param township:
+        :return: dict of division_id, district_id and township_id for filter
+        """
+        if not (division or district or township):
+            return {}
+        if not division:
+            raise ValidateFail("division is required for district or township filter")
+        division_id, district_id, township_id = self.resolve(division, district, township)
+        if division_id is None or (district and district_id is None) or (township and township_id is None):
+            raise ValidateFail("Unknown region: {}, {}, {}".format(division, district, township))
+        region = {"division_id": division_id}
+        if district_id is not None:
+            region["district_id"] = district_id
+        if township_id is not None:
+            region["township_id"] = township_id
+        return region
+
+
+@lru_cache(maxsize=1)
+def get_division_index() -> DivisionIndex:
+    """
+    return shared division index loaded from conf division file
+    """
+    conf = load_config()
+    return DivisionIndex.from_file(os.path.dirname(__file__) + conf["common"]["mm_division"]["file_path"])
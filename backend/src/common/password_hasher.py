@@ -0,0 +1,113 @@
+"""
+password hash module
+PBKDF2 hashing is CPU bound, so hash and verify run in a bounded process pool
+instead of blocking request threads, and stored hashes are upgraded to conf hash method on login
+"""
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from threading import BoundedSemaphore, Lock
+from typing import Optional, Tuple, Callable, Any
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from common.config import load_config
+from common.error import ThingahaCustomError
+
+
+def _verify_and_rehash(hashed_password: str, password: str, method: str,
+                       method_prefix: str) -> Tuple[bool, Optional[str]]:
+    """
+    verify password, return new hash if password is valid and hash method is outdated
+    module level function to be picklable for process pool
+    :param hashed_password:
+    :param password:
+    :param method: conf hash method
+    :param method_prefix: hash prefix (before first $) generated by conf hash method
+    :return: valid or not, new hash or None
+    """
+    if not check_password_hash(hashed_password, password):
+        return False, None
+    if hashed_password.split("$", 1)[0] == method_prefix:
+        return True, None
+    return True, generate_password_hash(password, method)
+
+
+class PasswordHasher:
+    """
+    hash and verify password in process pool
+    workers 0 runs in caller thread, pending tasks are limited to max_pending
+    """
+
+    def __init__(self, method: str, workers: int = 0, max_pending: int = 0, timeout: float = 10.0) -> None:
+        """
+        :param method: werkzeug hash method e.g. pbkdf2:sha256:260000
+        :param workers: process count, 0 to hash in caller thread
+        :param max_pending: max tasks waiting or running in pool
+        :param timeout: seconds to wait for free slot and result
+        """
+        self.method = method
+        self.method_prefix = generate_password_hash("", method).split("$", 1)[0]
+        self.workers = workers
+        self.timeout = timeout
+        self._pending = BoundedSemaphore(max_pending or max(workers, 1) * 4)
+        self._pool = None
+        self._pool_lock = Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """
+        create process pool on first use, after app and db are initialized
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _run(self, func: Callable, *args) -> Any:
+        """
+        run func in process pool, or in caller thread if workers is 0
+        :param func:
+        :param args:
+        :return: func result
+        """
+        if not self.workers:
+            return func(*args)
+        if not self._pending.acquire(timeout=self.timeout):
+            raise ThingahaCustomError("Too many login requests, try again later")
+        try:
+            future = self._get_pool().submit(func, *args)
+        except Exception:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise ThingahaCustomError("Password check timeout, try again later")
+
+    def hash_password(self, password: str) -> str:
+        """
+        hash password with conf method
+        :param password:
+        :return: hashed password
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, hashed_password: Optional[str], password: str) -> Tuple[bool, Optional[str]]:
+        """
+        verify password
+        :param hashed_password:
+        :param password:
+        :return: valid or not, upgraded hash if stored hash method is not conf method
+        """
+        if not hashed_password:
+            return False, None
+        return self._run(_verify_and_rehash, hashed_password, password, self.method, self.method_prefix)
+
+
+@lru_cache(maxsize=1)
+def get_password_hasher() -> PasswordHasher:
+    """
+    return shared password hasher with conf hash method and pool size
+    """
+    conf = load_config()["common"]["password_hash"]
+    return PasswordHasher(conf["method"], conf["workers"], conf["max_pending"], conf["timeout"])
@@ -0,0 +1,64 @@
+"""
+query result cache for pagination counts and aggregated reports
+results are cached per query signature and dropped when a table they read from is written
+"""
+import time
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class QueryCache:
+    """
+    in process query result cache, each entry keeps write generation of its tables
+    writes in other processes are only seen after ttl seconds
+    """
+
+    def __init__(self, ttl: float = 60.0, max_keys: int = 1000) -> None:
+        """
+        :param ttl: seconds to keep result
+        :param max_keys: entry count to keep, oldest entries are dropped when exceeded
+        """
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._results: Dict[str, Tuple[Any, Dict[str, int], float]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        return cached result if no table was written after it was cached
+        :param key: query signature
+        :return: result or None
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            result, generations, expires_at = entry
+            if expires_at < time.monotonic() or \
+                    any(self._generations.get(table, 0) != generation for table, generation in generations.items()):
+                del self._results[key]
+                return None
+            return result
+
+    def set(self, key: str, tables: Iterable[str], result: Any) -> None:
+        """
+        cache result with current write generation of tables
+        :param key: query signature
+        :param tables: table names query reads from
+        :param result:
+        """
+        with self._lock:
+            if len(self._results) >= self.max_keys:
+                for old_key in sorted(self._results, key=lambda k: self._results[k][2])[:len(self._results) // 2]:
+                    del self._results[old_key]
+            self._results[key] = (result, {table: self._generations.get(table, 0) for table in tables},
+                                 time.monotonic() + self.ttl)
+
+    def invalidate(self, table: str) -> None:
+        """
+        mark table as written, cached results reading it become stale
+        :param table: table name
+        """
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
@@ -0,0 +1,83 @@
+"""
+declarative filter and sort builder for list APIs
+filters and sort keys are declared per model and built into one query
+"""
+from typing import Dict, Any, Callable, List, Tuple, Union
+
+from sqlalchemy import Column
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+from common.error import ValidateFail
+
+FilterTarget = Union[InstrumentedAttribute, Callable[[str], Any]]
+
+
+class QueryFilter:
+    """
+    build filter conditions and order by clauses from query string values
+    filter value can be comma separated for IN condition
+    sort value is comma separated keys, "-" prefix for descending
+    """
+
+    def __init__(self, filters: Dict[str, FilterTarget], sorts: Dict[str, InstrumentedAttribute],
+                 default_sort: str = "id") -> None:
+        """
+        :param filters: filter key to column or callable returning filter condition
+        :param sorts: sort key to column, sort columns must be indexed
+        :param default_sort: default sort value
+        """
+        for key, column in sorts.items():
+            if not self.__is_indexed(column):
+                raise ValueError("Sort key {} should be indexed column".format(key))
+        self.filters = filters
+        self.sorts = sorts
+        self.default_sort = default_sort
+
+    @staticmethod
+    def __is_indexed(column: InstrumentedAttribute) -> bool:
+        """
+        check column is primary key or has index
+        :param column:
+        :return: bool
+        """
+        table_column: Column = column.property.columns[0]
+        return bool(table_column.primary_key or table_column.index or any(
+            index.columns.keys()[0] == table_column.name for index in table_column.table.indexes))
+
+    def __filter_condition(self, key: str, value: str):
+        """
+        build filter condition for one key
+        :param key:
+        :param value:
+        :return: filter condition
+        """
+        target = self.filters[key]
+        values = [item.strip() for item in value.split(",") if item.strip()]
+        if not isinstance(target, InstrumentedAttribute):
+            return target(values)
+        column_type = target.property.columns[0].type
+        try:
+            values = [column_type.python_type(item) for item in values]
+        except (ValueError, NotImplementedError):
+            raise ValidateFail("Invalid filter value {} for {}".format(value, key))
+        if not values or any(item not in column_type.enums for item in values if hasattr(column_type, "enums")):
+            raise ValidateFail("Invalid filter value {} for {}".format(value, key))
+        return target == values[0] if len(values) == 1 else target.in_(values)
+
+    def build(self, args: Dict[str, str]) -> Tuple[List, List]:
+        """
+        build filter conditions and order by clauses
+        :param args: query string dict, keys other than filters and sort are ignored
+        :return: filter conditions and order by clauses
+        """
+        criterion = [self.__filter_condition(key, value) for key, value in args.items()
+                     if key in self.filters and value]
+        order_by = []
+        for sort_key in (args.get("sort") or self.default_sort).split(","):
+            sort_key = sort_key.strip()
+            descending = sort_key.startswith("-")
+            column = self.sorts.get(sort_key.lstrip("-"))
+            if column is None:
+                raise ValidateFail("Sort key should be one of {}".format(", ".join(self.sorts.keys())))
+            order_by.append(column.desc() if descending else column.asc())
+        return criterion, order_by
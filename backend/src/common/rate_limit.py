@@ -0,0 +1,165 @@
+"""
+rate limit module
+token buckets per ip and per user kept in memory or in shared database backend,
+and concurrency limits for heavy route classes (search, upload, export)
+"""
+import math
+import time
+from functools import lru_cache, wraps
+from threading import BoundedSemaphore, Lock
+from typing import Dict, Any, Callable
+
+from flask import g
+
+from common.config import load_config
+from common.error import TooManyRequests
+
+
+class MemoryBackend:
+    """
+    token buckets in process memory, used as local stand-in for shared backend
+    """
+
+    def __init__(self, max_keys: int = 10000) -> None:
+        """
+        :param max_keys: bucket count to keep, refilled buckets are dropped when exceeded
+        """
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = Lock()
+
+    def __prune(self, now: float) -> None:
+        """
+        drop buckets which are full again, they are same as new bucket
+        :param now:
+        """
+        self._buckets = {key: bucket for key, bucket in self._buckets.items()
+                         if bucket[0] + (now - bucket[1]) * bucket[2] < bucket[3]}
+
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """
+        take cost tokens from bucket
+        :param key: bucket key
+        :param rate: refill tokens per second
+        :param capacity: max tokens
+        :param cost:
+        :return: 0 if allowed else seconds to wait
+        """
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > self.max_keys:
+                self.__prune(now)
+            tokens, updated_at, _, _ = self._buckets.get(key, (capacity, now, rate, capacity))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= cost
+            self._buckets[key] = (tokens - cost if allowed else tokens, now, rate, capacity)
+        return 0.0 if allowed else (cost - tokens) / rate
+
+
+class DatabaseBackend:
+    """
+    token buckets shared by all app processes in rate_limit_buckets table
+    """
+
+    @staticmethod
+    def consume(key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """
+        take cost tokens from bucket in one upsert statement
+        :param key: bucket key
+        :param rate: refill tokens per second
+        :param capacity: max tokens
+        :param cost:
+        :return: 0 if allowed else seconds to wait
+        """
+        # model needs app db, import here to keep this module usable without app
+        from models.rate_limit import RateLimitBucketModel
+
+        return RateLimitBucketModel.consume(key, rate, capacity, cost)
+
+
+class RateLimiter:
+    """
+    token bucket limits by name (ip, user, login) and concurrency limits by route class
+    """
+
+    def __init__(self, backend, limits: Dict[str, Dict[str, float]], concurrency: Dict[str, int],
+                 enabled: bool = True) -> None:
+        """
+        :param backend: MemoryBackend or DatabaseBackend
+        :param limits: limit name to rate (tokens per second) and capacity
+        :param concurrency: route class to max concurrent requests per process
+        :param enabled:
+        """
+        self.backend = backend
+        self.limits = limits
+        self.enabled = enabled
+        self._semaphores = {name: BoundedSemaphore(size) for name, size in concurrency.items()}
+
+    def check(self, limit_name: str, key: Any) -> None:
+        """
+        consume one token from limit bucket of key
+        :param limit_name: ip, user or login
+        :param key: ip address or user id
+        :return: None, raise TooManyRequests if bucket is empty
+        """
+        if not self.enabled:
+            return
+        limit = self.limits[limit_name]
+        retry_after = self.backend.consume("{}:{}".format(limit_name, key), limit["rate"], limit["capacity"])
+        if retry_after:
+            raise TooManyRequests("Too many requests, retry after {} seconds".format(math.ceil(retry_after)),
+                                  math.ceil(retry_after))
+
+    def acquire(self, route_class: str) -> bool:
+        """
+        take concurrency slot of route class without waiting
+        :param route_class: search, upload or export
+        :return: True if slot is taken (release is required)
+        """
+        if not self.enabled:
+            return False
+        if not self._semaphores[route_class].acquire(blocking=False):
+            raise TooManyRequests("Too many concurrent {} requests, try again later".format(route_class))
+        return True
+
+    def release(self, route_class: str) -> None:
+        """
+        release concurrency slot of route class
+        :param route_class:
+        """
+        self._semaphores[route_class].release()
+
+
+def concurrency_limit(route_class: str) -> Callable:
+    """
+    limit concurrent requests of route class, nested call in same request reuses the slot
+    :param route_class: search, upload or export
+    """
+    def decorator(func):
+        @wraps(func)
+        def decorated(*args, **kwargs):
+            held = g.setdefault("concurrency_slots", set())
+            if route_class in held:
+                return func(*args, **kwargs)
+            limiter = get_rate_limiter()
+            if not limiter.acquire(route_class):
+                return func(*args, **kwargs)
+            held.add(route_class)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                held.discard(route_class)
+                limiter.release(route_class)
+        return decorated
+    return decorator
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    """
+    return shared rate limiter from conf
+    """
+    conf = load_config()["common"]["rate_limit"]
+    backend = DatabaseBackend() if conf["backend"] == "database" else MemoryBackend()
+    return RateLimiter(backend, {name: conf[name] for name in ("ip", "user", "login")},
+                       conf["concurrency"], conf["enabled"])
@@ -0,0 +1,99 @@
+"""
+donor statement renderer
+render annual statement files of donators from grouped donation rows,
+module level functions to be picklable for process pool
+"""
+import csv
+import html
+import os
+from typing import Any, Dict, List
+
+MONTHS = ("january", "february", "march", "april", "may", "june",
+          "july", "august", "september", "october", "november", "december")
+STATEMENT_FORMATS = ("csv", "html")
+
+
+def statement_totals(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    per student, per month and grand mmk and jpy totals of one donator
+    :param rows: grouped rows of student_id, student_name, month, donation_count, mmk_amount, jpy_amount
+    :return: students, months and total
+    """
+    students, months = {}, {}
+    total = {"donation_count": 0, "mmk_amount": 0.0, "jpy_amount": 0.0}
+    for row in rows:
+        student = students.setdefault(row["student_id"], {"student_id": row["student_id"],
+                                                          "student_name": row["student_name"],
+                                                          "donation_count": 0, "mmk_amount": 0.0, "jpy_amount": 0.0})
+        month = months.setdefault(row["month"], {"month": row["month"],
+                                                 "donation_count": 0, "mmk_amount": 0.0, "jpy_amount": 0.0})
+        for totals in (student, month, total):
+            totals["donation_count"] += row["donation_count"]
+            totals["mmk_amount"] += row["mmk_amount"]
+            totals["jpy_amount"] += row["jpy_amount"]
+    return {
+        "students": list(students.values()),
+        "months": [months[month] for month in MONTHS if month in months],
+        "total": total
+    }
+
+
+def _write_csv(path: str, statement: Dict[str, Any], totals: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["student_id", "student_name", "month", "donation_count", "mmk_amount", "jpy_amount"])
+        for row in statement["rows"]:
+            writer.writerow([row["student_id"], row["student_name"], row["month"], row["donation_count"],
+                             row["mmk_amount"], row["jpy_amount"]])
+        for student in totals["students"]:
+            writer.writerow([student["student_id"], student["student_name"], "total", student["donation_count"],
+                             student["mmk_amount"], student["jpy_amount"]])
+        for month in totals["months"]:
+            writer.writerow(["", "total", month["month"], month["donation_count"],
+                             month["mmk_amount"], month["jpy_amount"]])
+        total = totals["total"]
+        writer.writerow(["", "total", "total", total["donation_count"], total["mmk_amount"], total["jpy_amount"]])
+
+
+def _html_table(headers: List[str], rows: List[List[Any]]) -> str:
+    return "<table><tr>{}</tr>{}</table>".format(
+        "".join("<th>{}</th>".format(html.escape(header)) for header in headers),
+        "".join("<tr>{}</tr>".format("".join("<td>{}</td>".format(html.escape(str(value))) for value in row))
+                for row in rows))
+
+
+def _write_html(path: str, year: int, statement: Dict[str, Any], totals: Dict[str, Any]) -> None:
+    amount_headers = ["Donations", "MMK", "JPY"]
+    total = totals["total"]
+    body = "".join([
+        "<h1>Donation statement {}</h1>".format(year),
+        "<p>{} &lt;{}&gt;</p>".format(html.escape(statement["user_name"]), html.escape(statement["email"] or "")),
+        "<h2>Students</h2>",
+        _html_table(["Student"] + amount_headers,
+                    [[student["student_name"], student["donation_count"], student["mmk_amount"],
+                      student["jpy_amount"]] for student in totals["students"]]),
+        "<h2>Months</h2>",
+        _html_table(["Month"] + amount_headers,
+                    [[month["month"].capitalize(), month["donation_count"], month["mmk_amount"],
+                      month["jpy_amount"]] for month in totals["months"]]),
+        "<h2>Total</h2>",
+        _html_table(amount_headers, [[total["donation_count"], total["mmk_amount"], total["jpy_amount"]]])
+    ])
+    with open(path, "w", encoding="utf-8") as html_file:
+        html_file.write("<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Donation statement {}</title>"
+                        "</head><body>{}</body></html>".format(year, body))
+
+
+def render_statements(output_dir: str, year: int, statements: List[Dict[str, Any]]) -> int:
+    """
+    write <user_id>.csv and <user_id>.html statement of each donator to output_dir
+    :param output_dir: job directory
+    :param year:
+    :param statements: list of user_id, user_name, email and grouped rows
+    :return: rendered statement count
+    """
+    for statement in statements:
+        totals = statement_totals(statement["rows"])
+        _write_csv(os.path.join(output_dir, "{}.csv".format(statement["user_id"])), statement, totals)
+        _write_html(os.path.join(output_dir, "{}.html".format(statement["user_id"])), year, statement, totals)
+    return len(statements)
@@ -4,6 +4,7 @@ from flask_cors import cross_origin
 from flask_jwt_extended import jwt_required
 
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail, ThingahaCustomError
+from common.rate_limit import concurrency_limit
 from controller.api import api, post_request_empty, custom_error, full_admin, sub_admin
 from service.address.address_service import AddressService
 
@@ -126,6 +127,7 @@ def get_all_addresses():
 
 @api.route("/addresses/search", methods=["GET"])
 @jwt_required
+@concurrency_limit("search")
 @cross_origin()
 def search_addresses():
     """
@@ -0,0 +1,27 @@
+"""API route for dashboard analytics API"""
+from flask import request, current_app, jsonify
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required
+
+from common.error import SQLCustomError, ValidateFail
+from controller.api import api, sub_admin
+from service.analytics.analytics_service import AnalyticsService
+
+analytics_service = AnalyticsService()
+
+
+@api.route("/analytics/query", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def query_analytics():
+    """
+    group donations by dimensions and sum amounts, e.g. ?group_by=year,month&metrics=count,mmk_amount&country=jp
+    :return:
+    """
+    try:
+        current_app.logger.info("Query analytics: %s", request.args.to_dict())
+        return jsonify({"data": analytics_service.query(request.args.to_dict())}), 200
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Fail to query analytics: %s", error.description)
+        return jsonify({"errors": [error.__dict__]}), 400
@@ -6,15 +6,20 @@ current version: v1
 import os
 from datetime import timedelta
 from functools import wraps
+from typing import List, Optional
 
-from flask import Blueprint, json
+from flask import Blueprint, g, json, request
 from flask_cors import cross_origin
 from flask_jwt_extended import (
     JWTManager, jwt_required, create_access_token,
-    get_jwt_claims
+    get_jwt_claims, get_jwt_identity, verify_jwt_in_request_optional
 )
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 
-from common.error import ThingahaCustomError, FileNotFound
+from common.error import ThingahaCustomError, FileNotFound, ValidateFail, TooManyRequests
+from common.rate_limit import get_rate_limiter
+from database import COUNT_STRATEGIES
 
 
 api = Blueprint("api", __name__, url_prefix="/api/v1")
@@ -22,6 +27,49 @@ api = Blueprint("api", __name__, url_prefix="/api/v1")
 jwt: JWTManager = None
 division_file_path: str = None
 default_address: dict = None
+MAX_BATCH_IDS = 100
+
+
+@api.before_request
+def check_rate_limit():
+    """
+    consume token from per ip bucket, per user bucket if JWT is given
+    and login bucket per ip for login request
+    """
+    rate_limiter = get_rate_limiter()
+    rate_limiter.check("ip", request.remote_addr)
+    if request.endpoint == "api.login":
+        rate_limiter.check("login", request.remote_addr)
+    try:
+        verify_jwt_in_request_optional()
+    except (JWTExtendedException, PyJWTError):
+        # invalid token is rejected by jwt_required of the route
+        return None
+    user_id = get_jwt_identity()
+    if user_id is not None:
+        rate_limiter.check("user", user_id)
+    return None
+
+
+@api.before_request
+def set_count_strategy():
+    """
+    total count strategy of paginated list for this request (?count=exact|cached|estimated)
+    """
+    count_strategy = request.args.get("count")
+    if count_strategy and count_strategy not in COUNT_STRATEGIES:
+        return custom_error("count should be one of {}".format(", ".join(COUNT_STRATEGIES)))
+    g.count_strategy = count_strategy
+    return None
+
+
+@api.errorhandler(TooManyRequests)
+def too_many_requests(error: TooManyRequests):
+    """
+    return 429 with Retry-After header for rate limit and concurrency limit
+    """
+    current_app.logger.warning("Too many requests: %s %s", request.remote_addr, error.description)
+    return jsonify({"errors": [error.__dict__]}), 429, {"Retry-After": str(error.retry_after)}
 
 
 @api.route("/login", methods=["POST"])
@@ -34,12 +82,15 @@ def login():
         return custom_error("Email or username required")
     if not password:
         return custom_error("Missing password parameter")
-    user = user_service.get_user_by_email(email_or_username)
-    if user is None:
-        user = user_service.get_user_by_username(email_or_username)
+    user = user_service.get_user_by_email_or_username(email_or_username)
     if not user:
         return custom_error("Requested {} is not a registered member".format(email_or_username))
-    if user_service.check_password(password, user):
+    try:
+        valid_password = user_service.check_password(password, user)
+    except ThingahaCustomError as error:
+        current_app.logger.error("Login password check fail: %s", error.description)
+        return custom_error(error.description, 503)
+    if valid_password:
         access_token = create_access_token(
             identity=user, expires_delta=timedelta(days=1))
         return jsonify({
@@ -128,6 +179,28 @@ def custom_error(error_message: str, status_code: int = 400):
     return jsonify({"errors": [ThingahaCustomError(error_message).__dict__]}), status_code
 
 
+def get_region_args() -> dict:
+    """
+    return division, district and township filter from query string
+    """
+    return {key: request.args.get(key) for key in ("division", "district", "township") if request.args.get(key)}
+
+
+def get_id_args() -> Optional[List[int]]:
+    """
+    return ids from query string (?ids=1,2,3) for batch lookup, None if not requested
+    """
+    if not request.args.get("ids"):
+        return None
+    try:
+        ids = list(dict.fromkeys(int(item) for item in request.args["ids"].split(",") if item.strip()))
+    except ValueError:
+        raise ValidateFail("ids should be comma separated integers")
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValidateFail("ids should be at most {} items".format(MAX_BATCH_IDS))
+    return ids
+
+
 def get_default_address() -> dict:
     """
     return default addresses from conf
@@ -144,3 +217,11 @@ from controller.transfer import *
 from controller.extrafund import *
 from controller.student import *
 from controller.extrafund import *
+from controller.stats import *
+from controller.batch import *
+from controller.export import *
+from controller.statement import *
+from controller.analytics import *
+from controller.forecast import *
+from controller.exchange_rate import *
+from controller.report import *
@@ -4,7 +4,7 @@ from flask_cors import cross_origin
 from flask_jwt_extended import jwt_required
 
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail
-from controller.api import api, post_request_empty, custom_error, full_admin, sub_admin
+from controller.api import api, post_request_empty, custom_error, full_admin, sub_admin, get_id_args
 from service.attendance.attendance_service import AttendanceService
 
 attendance_service = AttendanceService()
@@ -17,14 +17,16 @@ def get_attendances():
     try:
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
-        grade = request.args.get("grade")
-        year = request.args.get("year")
-        attendances = attendance_service.get_all_attendances(page, grade, year, per_page)
+        ids = get_id_args()
+        if ids is not None:
+            attendances = attendance_service.get_attendances_by_ids(ids, request.args.to_dict())
+        else:
+            attendances = attendance_service.get_all_attendances(page, per_page, request.args.to_dict())
         current_app.logger.info("Get all attendance records")
         return jsonify({
             "data": attendances
         }), 200
-    except SQLCustomError as error:
+    except (SQLCustomError, ValidateFail) as error:
         current_app.logger.error("Error in get all attendance records")
         return jsonify({"errors": [error.__dict__]}), 400
 
@@ -41,9 +43,9 @@ def get_attendance_by_id(attendance_id: int):
         current_app.logger.info("Return data for attendance_id: {}".format(attendance_id))
         return jsonify({
             "data": {
-                "attendance": attendance_service.get_attendance_by_id(attendance_id)
+                "attendance": attendance_service.get_attendance_by_id(attendance_id, request.args.to_dict())
             }}), 200
-    except SQLCustomError as error:
+    except (SQLCustomError, ValidateFail) as error:
         current_app.logger.error("Return error for attendances: {}".format(attendance_id))
         return jsonify({"errors": [error.__dict__]}), 400
 
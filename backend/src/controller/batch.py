@@ -0,0 +1,60 @@
+"""API route for batch API, run several read requests in one round trip"""
+from urllib.parse import urlsplit
+
+from flask import request, current_app, jsonify
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required
+
+from controller.api import api, post_request_empty, custom_error
+
+MAX_BATCH_REQUESTS = 20
+
+
+def run_sub_request(path: str) -> dict:
+    """
+    dispatch one GET sub request with the same authorization header as batch request
+    :param path: api path with query string
+    :return: status and body of sub request
+    """
+    with current_app.test_request_context(path, method="GET",
+                                          headers={"Authorization": request.headers.get("Authorization", "")}):
+        response = current_app.full_dispatch_request()
+    return {
+        "path": path,
+        "status": response.status_code,
+        "body": response.get_json()
+    }
+
+
+@api.route("/batch", methods=["POST"])
+@jwt_required
+@cross_origin()
+def batch():
+    """
+    run read sub requests in order, e.g. {"requests": [{"method": "GET", "path": "/api/v1/students/1"}]}
+    :return: list of sub request status and body
+    """
+    data = request.get_json()
+    if data is None:
+        return post_request_empty()
+    sub_requests = data.get("requests")
+    if not isinstance(sub_requests, list) or not sub_requests:
+        return custom_error("requests should be non empty list")
+    if len(sub_requests) > MAX_BATCH_REQUESTS:
+        return custom_error("requests should be at most {} items".format(MAX_BATCH_REQUESTS))
+    paths = []
+    for sub_request in sub_requests:
+        if not isinstance(sub_request, dict) or sub_request.get("method", "GET").upper() != "GET":
+            return custom_error("Only GET sub request is allowed in batch")
+        path = sub_request.get("path") or ""
+        url = urlsplit(path)
+        if url.scheme or url.netloc or not url.path.startswith(api.url_prefix + "/") or \
+                url.path.rstrip("/") == api.url_prefix + "/batch":
+            return custom_error("Invalid sub request path: {}".format(path))
+        paths.append(path)
+    current_app.logger.info("Run batch requests: %s", paths)
+    return jsonify({
+        "data": {
+            "responses": [run_sub_request(path) for path in paths]
+        }
+    }), 200
@@ -19,13 +19,53 @@ def get_donations():
         per_page = request.args.get("per_page", 20, type=int)
         current_app.logger.info("Get all donation records")
         return jsonify({
-            "data": donation_service.get_all_donations_records(page, per_page)
+            "data": donation_service.get_all_donations_records(page, per_page, request.args.to_dict())
         }), 200
-    except SQLCustomError as error:
+    except (SQLCustomError, ValidateFail) as error:
         current_app.logger.error("Error in get all donation records")
         return jsonify({"errors": [error.__dict__]}), 400
 
 
+@api.route("/donations/unallocated", methods=["GET"])
+@jwt_required
+@cross_origin()
+def get_unallocated_donations():
+    """
+    get paid donations which are not allocated to transfer, filter by year and month
+    :return:
+    """
+    try:
+        page = request.args.get("page", 1, type=int)
+        per_page = request.args.get("per_page", 20, type=int)
+        current_app.logger.info("Get unallocated donation records")
+        return jsonify({
+            "data": donation_service.get_unallocated_donations(page, per_page, request.args.to_dict())
+        }), 200
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Error in get unallocated donation records")
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
+@api.route("/donations/matrix", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def get_donation_matrix():
+    """
+    donator x month status and amount grid of year, e.g. ?year=2020
+    :return:
+    """
+    try:
+        year = request.args.get("year", None, type=int)
+        current_app.logger.info("Get donation matrix of %s", year)
+        return jsonify({
+            "data": donation_service.get_donation_matrix(year)
+        }), 200
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Error in get donation matrix")
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
 @api.route("/donations/<int:donation_id>", methods=["GET"])
 @jwt_required
 @cross_origin()
@@ -35,13 +75,13 @@ def get_donation_by_id(donation_id: int):
     :return:
     """
     try:
-        donation = donation_service.get_donation_by_id(donation_id)
+        donation = donation_service.get_donation_by_id(donation_id, request.args.to_dict())
         current_app.logger.info("Return data for donation_id: {}".format(donation_id))
         return jsonify({
             "data": {
                 "donation": donation
             }}), 200
-    except (SQLCustomError, ThingahaCustomError) as error:
+    except (SQLCustomError, ThingahaCustomError, ValidateFail) as error:
         current_app.logger.error("Return error for donations: {}".format(donation_id))
         return jsonify({"errors": [error.__dict__]}), 400
 
@@ -75,6 +115,27 @@ def create_donation():
         return jsonify({"errors": [error.__dict__]}), 400
 
 
+@api.route("/donations/bulk", methods=["PATCH"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def bulk_update_donations():
+    """
+    set paid_at and/or transfer_id for donations by id list or filter
+    :return: updated count
+    """
+    data = request.get_json()
+    if data is None:
+        return post_request_empty()
+    try:
+        result = donation_service.bulk_update_donations(data)
+        current_app.logger.info("Bulk update donations: %s", result["updated_count"])
+        return jsonify({"data": result}), 200
+    except (RequestDataEmpty, SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Bulk update donation request fail")
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
 @api.route("/donations/<int:donation_id>", methods=["DELETE"])
 @jwt_required
 @full_admin
@@ -0,0 +1,66 @@
+"""API route for exchange rate API"""
+from flask import request, current_app, jsonify
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from common.error import SQLCustomError, RequestDataEmpty, ValidateFail
+from controller.api import api, post_request_empty, full_admin, sub_admin
+from service.exchange_rate.exchange_rate_service import ExchangeRateService
+
+exchange_rate_service = ExchangeRateService()
+
+
+@api.route("/exchange_rates", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def get_exchange_rates():
+    """
+    get JPY to MMK rates, filter by year
+    :return:
+    """
+    try:
+        year = request.args.get("year", None, type=int)
+        current_app.logger.info("Get exchange rates")
+        return jsonify({"data": {"exchange_rates": exchange_rate_service.get_exchange_rates(year)}}), 200
+    except SQLCustomError as error:
+        current_app.logger.error("Fail to get exchange rates: %s", error.description)
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
+@api.route("/exchange_rates", methods=["PUT"])
+@jwt_required
+@full_admin
+@cross_origin()
+def set_exchange_rates():
+    """
+    set JPY to MMK rates by month or transfer and recompute MMK amounts
+    :return: recomputation audit rows of changed months
+    """
+    try:
+        changes = exchange_rate_service.set_exchange_rates(request.get_json(), get_jwt_identity())
+        current_app.logger.info("Exchange rates of %s months are changed", len(changes))
+        return jsonify({"data": {"changes": changes}}), 200
+    except RequestDataEmpty as error:
+        current_app.logger.error("Exchange rate request data empty: %s", error)
+        return post_request_empty()
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Fail to set exchange rates: %s", error.description)
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
+@api.route("/exchange_rates/changes", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def get_exchange_rate_changes():
+    """
+    get audit trail of rate changes and MMK recomputation, filter by year
+    :return:
+    """
+    try:
+        year = request.args.get("year", None, type=int)
+        return jsonify({"data": {"changes": exchange_rate_service.get_exchange_rate_changes(year)}}), 200
+    except SQLCustomError as error:
+        current_app.logger.error("Fail to get exchange rate changes: %s", error.description)
+        return jsonify({"errors": [error.__dict__]}), 400
@@ -0,0 +1,48 @@
+"""API route for streaming CSV/NDJSON export of full tables"""
+from flask import request, current_app, jsonify, Response, stream_with_context
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required
+
+from common.error import ValidateFail
+from common.rate_limit import get_rate_limiter
+from controller.api import api, sub_admin
+from service.export.export_service import ExportService
+
+export_service = ExportService()
+
+
+@api.route("/exports/<string:resource>", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def export_resource(resource: str):
+    """
+    stream donations, attendances, students, users or gaps as CSV (?format=csv) or NDJSON (?format=ndjson)
+    with list API filters, gzip encoded if client accepts gzip
+    export concurrency slot is held until streaming is finished
+    :param resource:
+    :return:
+    """
+    export_format = request.args.get("format", "csv")
+    gzip = request.accept_encodings["gzip"] > 0
+    rate_limiter = get_rate_limiter()
+    acquired = rate_limiter.acquire("export")
+    try:
+        mimetype, chunks = export_service.export(resource, request.args.to_dict(), export_format, gzip)
+    except Exception as error:
+        if acquired:
+            rate_limiter.release("export")
+        if not isinstance(error, ValidateFail):
+            raise
+        current_app.logger.error("Fail to export %s: %s", resource, error.description)
+        return jsonify({"errors": [error.__dict__]}), 400
+    headers = {
+        "Content-Disposition": "attachment; filename={}.{}".format(resource, export_format),
+        "Vary": "Accept-Encoding"
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    response = Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+    if acquired:
+        response.call_on_close(lambda: rate_limiter.release("export"))
+    return response
@@ -0,0 +1,35 @@
+"""API route for funding forecast API"""
+from flask import request, current_app, jsonify
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required
+
+from common.error import SQLCustomError, ValidateFail
+from controller.api import api, sub_admin
+from service.forecast.forecast_service import ForecastService
+
+forecast_service = ForecastService()
+
+
+@api.route("/forecast", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def get_forecast():
+    """
+    project monthly MMK obligation, expected donations and shortfall with what-if parameters,
+    e.g. ?months=12&new_enrolments=5&jpy_rate=13.5
+    :return:
+    """
+    try:
+        months = request.args.get("months", 12, type=int)
+        new_enrolments = request.args.get("new_enrolments", 0, type=float)
+        jpy_rate = request.args.get("jpy_rate", None, type=float)
+        mmk_per_student = request.args.get("mmk_per_student", None, type=float)
+        lapse_rate = request.args.get("lapse_rate", None, type=float)
+        current_app.logger.info("Get forecast for %s months", months)
+        return jsonify({
+            "data": forecast_service.get_forecast(months, new_enrolments, jpy_rate, mmk_per_student, lapse_rate)
+        }), 200
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Fail to get forecast: %s", error.description)
+        return jsonify({"errors": [error.__dict__]}), 400
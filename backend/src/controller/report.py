@@ -0,0 +1,32 @@
+"""API route for sponsorship gap report API"""
+from flask import request, current_app, jsonify
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required
+
+from common.error import SQLCustomError, ValidateFail
+from controller.api import api, sub_admin
+from service.report.report_service import ReportService
+
+report_service = ReportService()
+
+
+@api.route("/reports/gaps", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def get_gaps():
+    """
+    students without donation (?kind=students) or lapsed donators (?kind=donators) of month,
+    e.g. ?year=2020&month=january, export with /exports/gaps and same query
+    :return:
+    """
+    try:
+        page = request.args.get("page", 1, type=int)
+        per_page = request.args.get("per_page", 20, type=int)
+        current_app.logger.info("Get gap report")
+        return jsonify({
+            "data": report_service.get_gaps(request.args.to_dict(), page, per_page)
+        }), 200
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Fail to get gap report: %s", error.description)
+        return jsonify({"errors": [error.__dict__]}), 400
@@ -4,8 +4,9 @@ from flask_cors import cross_origin
 from flask_jwt_extended import jwt_required
 
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail, ThingahaCustomError
+from common.rate_limit import concurrency_limit
 from controller.api import api, post_request_empty, address_service, custom_error, full_admin, sub_admin, \
-    get_default_address
+    get_default_address, get_region_args, get_id_args
 from service.school.school_service import SchoolService
 
 school_service = SchoolService()
@@ -22,11 +23,15 @@ def get_school():
     try:
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
+        ids = get_id_args()
+        if ids is not None:
+            current_app.logger.info("Get school records by ids.")
+            return jsonify({"data": school_service.get_schools_by_ids(ids)}), 200
         current_app.logger.info("Get all school records.")
         return jsonify({
-                "data": school_service.get_all_schools(page, per_page)
+                "data": school_service.get_all_schools(page, per_page, get_region_args())
             }), 200
-    except SQLCustomError as error:
+    except (SQLCustomError, ValidateFail) as error:
         current_app.logger.error("Error in get all school records")
         return jsonify({"errors": [error.__dict__]}), 400
 
@@ -106,20 +111,13 @@ def delete_school(school_id):
     """
     try:
         current_app.logger.info("Delete school id: {}".format(school_id))
-        school_delete_status = False
-        school = school_service.get_school_by_id(school_id)
-
-        if len(school) == 0:
+        if not school_service.delete_school_by_id(school_id):
             current_app.logger.error(
                 "No school id to delete: {}".format(school_id))
             return jsonify({"errors": ["No school id to delete"]}), 404
 
-        if school_service.delete_school_by_id(school_id):
-            school_delete_status = address_service.delete_address_by_id(
-                school["address"]["id"])
-
         return jsonify({
-            "status": school_delete_status
+            "status": True
         }), 200
 
     except SQLCustomError as error:
@@ -185,6 +183,7 @@ def update_school(school_id: int):
 
 @api.route("/schools/search", methods=["GET"])
 @jwt_required
+@concurrency_limit("search")
 @cross_origin()
 def search_school():
     """
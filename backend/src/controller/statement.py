@@ -0,0 +1,87 @@
+"""API route for asynchronous annual donor statement API"""
+from flask import request, current_app, jsonify, send_file
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required, get_jwt_claims, get_jwt_identity
+
+from common.error import SQLCustomError, RequestDataEmpty, ValidateFail
+from controller.api import api, post_request_empty, custom_error, sub_admin
+from service.statement.statement_service import StatementService
+
+statement_service = StatementService()
+
+
+@api.route("/donation_statements", methods=["POST"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def create_statement_job():
+    """
+    start annual donor statement job, e.g. {"year": 2020}
+    :return: job with progress
+    """
+    try:
+        job = statement_service.create_statement_job(request.get_json(), current_app._get_current_object())
+        current_app.logger.info("Start statement job %s", job["id"])
+        return jsonify({"data": job}), 202
+    except RequestDataEmpty as error:
+        current_app.logger.error("Statement job request data empty: %s", error)
+        return post_request_empty()
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Fail to start statement job: %s", error)
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
+@api.route("/donation_statements/<int:job_id>", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def get_statement_job(job_id: int):
+    """
+    get statement job progress and download url
+    :param job_id:
+    :return:
+    """
+    try:
+        return jsonify({"data": statement_service.get_statement_job(job_id)}), 200
+    except SQLCustomError as error:
+        current_app.logger.error("Fail to get statement job %s: %s", job_id, error)
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
+@api.route("/donation_statements/<int:job_id>/download", methods=["GET"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def download_statements(job_id: int):
+    """
+    download zip archive of all statements of job
+    :param job_id:
+    :return:
+    """
+    try:
+        return send_file(statement_service.get_statement_file(job_id), mimetype="application/zip",
+                         as_attachment=True, attachment_filename="statements_{}.zip".format(job_id))
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Fail to download statements of job %s: %s", job_id, error)
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
+@api.route("/donation_statements/<int:job_id>/users/<int:user_id>", methods=["GET"])
+@jwt_required
+@cross_origin()
+def download_user_statement(job_id: int, user_id: int):
+    """
+    download statement of one donator as html (default) or csv (?format=csv), donator can get own statement only
+    :param job_id:
+    :param user_id:
+    :return:
+    """
+    if get_jwt_claims() not in ["admin", "sub_admin"] and get_jwt_identity() != user_id:
+        return custom_error("Invalid user role to apply this action.", 403)
+    file_format = request.args.get("format", "html")
+    try:
+        return send_file(statement_service.get_statement_file(job_id, user_id, file_format),
+                         as_attachment=file_format == "csv")
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Fail to download statement of user %s in job %s: %s", user_id, job_id, error)
+        return jsonify({"errors": [error.__dict__]}), 400
@@ -0,0 +1,29 @@
+"""API route for stats API"""
+from flask import request, current_app, jsonify
+from flask_cors import cross_origin
+from flask_jwt_extended import jwt_required
+
+from common.error import SQLCustomError, ValidateFail
+from controller.api import api, get_region_args
+from service.region.region_service import RegionService
+
+region_service = RegionService()
+
+
+@api.route("/stats/regions", methods=["GET"])
+@jwt_required
+@cross_origin()
+def get_region_stats():
+    """
+    get students, schools and donators count per division, district or township
+    :return:
+    """
+    try:
+        level = request.args.get("level", "division")
+        current_app.logger.info("Get region stats by %s", level)
+        return jsonify({
+            "data": region_service.get_region_stats(level, get_region_args())
+        }), 200
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Fail to get region stats: %s", error.description)
+        return jsonify({"errors": [error.__dict__]}), 400
@@ -10,8 +10,10 @@ from flask_jwt_extended import jwt_required
 from common.aws_client import get_client, get_s3_url, get_bucket
 from common.config import S3_BUCKET
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail, ThingahaCustomError
+from common.rate_limit import concurrency_limit
 from controller.api import address_service
-from controller.api import api, post_request_empty, custom_error, sub_admin, full_admin, get_default_address
+from controller.api import api, post_request_empty, custom_error, sub_admin, full_admin, get_default_address, \
+    get_region_args, get_id_args
 from service.student.student_service import StudentService
 
 student_service = StudentService()
@@ -25,11 +27,15 @@ def get_students():
     try:
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 20, type=int)
+        ids = get_id_args()
+        if ids is not None:
+            current_app.logger.info("Get student records by ids")
+            return jsonify({"data": student_service.get_students_by_ids(ids)}), 200
         current_app.logger.info("Get all student records")
         return jsonify({
-            "data": student_service.get_all_students(page, per_page)
+            "data": student_service.get_all_students(page, per_page, get_region_args())
         }), 200
-    except SQLCustomError as error:
+    except (SQLCustomError, ValidateFail) as error:
         current_app.logger.error("Error in get all student records")
         return jsonify({"errors": [error.__dict__]}), 400
 
@@ -105,12 +111,8 @@ def delete_students(student_id: int):
     """
     try:
         current_app.logger.info("Delete student id: {}".format(student_id))
-        student_delete_status = False
-        student = student_service.get_student_by_id(student_id)
-        if student_service.delete_student_by_id(student_id):
-            student_delete_status = address_service.delete_address_by_id(student["address"]["id"])
         return jsonify({
-            "status": student_delete_status
+            "status": student_service.delete_student_by_id(student_id)
             }), 200
     except SQLCustomError as error:
         current_app.logger.error("Fail to delete student_id: %s".format(student_id))
@@ -222,6 +224,7 @@ def upload_file(img, file_name: str) -> bool:
 @api.route("/student/upload", methods=["POST"])
 @jwt_required
 @sub_admin
+@concurrency_limit("upload")
 @cross_origin()
 def upload_s3_file():
     """
@@ -248,6 +251,7 @@ def upload_s3_file():
 @api.route("/student/upload", methods=["PUT"])
 @jwt_required
 @sub_admin
+@concurrency_limit("upload")
 @cross_origin()
 def update_file():
     """
@@ -287,6 +291,7 @@ def delete_s3_file():
 
 @api.route("/students/search", methods=["GET"])
 @jwt_required
+@concurrency_limit("search")
 @cross_origin()
 def search_student():
     """
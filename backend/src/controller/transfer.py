@@ -83,6 +83,25 @@ def update_transfers(transfer_id: int):
         return jsonify({"errors": [error.__dict__]}), 400
 
 
+@api.route("/transfers/<int:transfer_id>/allocate", methods=["POST"])
+@jwt_required
+@sub_admin
+@cross_origin()
+def allocate_transfer_donations(transfer_id: int):
+    """
+    allocate paid donations of transfer year and month to transfer
+    :param transfer_id:
+    :return:
+    """
+    try:
+        result = transfer_service.allocate_donations(transfer_id, request.get_json(silent=True))
+        current_app.logger.info("Allocate %s donations to transfer_id: %s", result["allocated_count"], transfer_id)
+        return jsonify({"data": result}), 200
+    except (SQLCustomError, ValidateFail) as error:
+        current_app.logger.error("Allocate donations fail: transfer_id: %s", transfer_id)
+        return jsonify({"errors": [error.__dict__]}), 400
+
+
 @api.route("/transfers/<int:transfer_id>", methods=["DELETE"])
 @jwt_required
 @full_admin
@@ -5,7 +5,9 @@ from flask_cors import cross_origin
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt_claims
 
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail, ThingahaCustomError
-from controller.api import api, custom_error, post_request_empty, sub_admin, full_admin, get_default_address
+from common.rate_limit import concurrency_limit
+from controller.api import api, custom_error, post_request_empty, sub_admin, full_admin, get_default_address, \
+    get_region_args, get_id_args
 from service.address.address_service import AddressService
 from service.user.user_service import UserService
 
@@ -25,11 +27,15 @@ def get_all_users():
         role = request.args.get("role")
         country = request.args.get("country")
         per_page = request.args.get("per_page", 20, type=int)
+        ids = get_id_args()
+        if ids is not None:
+            current_app.logger.info("Get users by ids")
+            return jsonify({"data": user_service.get_users_by_ids(ids)}), 200
         current_app.logger.info("Get all users")
         return jsonify({
-            "data": user_service.get_all_users(page, role, country, per_page)
+            "data": user_service.get_all_users(page, role, country, per_page, get_region_args())
         }), 200
-    except SQLCustomError as error:
+    except (SQLCustomError, ValidateFail) as error:
         current_app.logger.error("Fail to get all users: %s", error)
         return jsonify({"errors": [error.__dict__]}), 400
 
@@ -158,19 +164,16 @@ def update_user(user_id: int):
 def delete_user(user_id: int):
     """
     delete user by id
+    donation history is deleted in chunks first when chunk_size is given
     """
     try:
         current_app.logger.info("Delete user : user_id: %s", user_id)
-        user_delete_status = False
-        user = user_service.get_user_by_id(user_id)
-        if len(user) == 0:
+        chunk_size = request.args.get("chunk_size", None, type=int)
+        if not user_service.delete_user_by_id(user_id, chunk_size):
             current_app.logger.error("No user id to delete: {}".format(user_id))
             return jsonify({"errors": ["No user id to delete"]}), 404
-
-        if user_service.delete_user_by_id(user_id):
-            user_delete_status = address_service.delete_address_by_id(user["address"]["id"])
         return jsonify({
-            "status": user_delete_status
+            "status": True
         }), 200
     except SQLCustomError as error:
         current_app.logger.error("Fail to delete user : user_id: %s", user_id)
@@ -179,6 +182,7 @@ def delete_user(user_id: int):
 
 @api.route("/users/search", methods=["GET"])
 @jwt_required
+@concurrency_limit("search")
 @cross_origin()
 def search_user():
     """
@@ -1,13 +1,159 @@
 """
 database init and db config
 """
-from flask_sqlalchemy import SQLAlchemy
+import json
+from typing import Iterator, List
+
+from flask import abort, g, has_app_context
+from flask_sqlalchemy import SQLAlchemy, BaseQuery, Pagination
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.util import find_tables
 
 from common.config import load_config
+from common.query_cache import QueryCache
 
 conf = load_config()
 
-db = SQLAlchemy()
+MAX_PER_PAGE = conf["common"]["rate_limit"]["max_per_page"]
+COUNT_STRATEGIES = ("exact", "cached", "estimated")
+DEFAULT_COUNT_STRATEGY = conf["common"]["count"]["strategy"]
+query_cache = QueryCache(conf["common"]["count"]["cache_ttl"])
+
+
+class CountedPagination(Pagination):
+    """
+    pagination which tells whether total is a planner estimate
+    """
+
+    def __init__(self, query, page, per_page, total, items, estimated: bool = False):
+        super().__init__(query, page, per_page, total, items)
+        self.estimated = estimated
+
+
+class CappedQuery(BaseQuery):
+    """
+    query class which caps per_page of paginate for all models
+    and counts total with exact, cached or estimated count strategy
+    """
+
+    def paginate(self, page=None, per_page=None, error_out=True, max_per_page=None,
+                 count_strategy: str = None) -> CountedPagination:
+        """
+        page query, count strategy defaults to request count strategy
+        :param page:
+        :param per_page:
+        :param error_out:
+        :param max_per_page:
+        :param count_strategy: exact, cached or estimated
+        :return: CountedPagination
+        """
+        page = page or 1
+        per_page = min(per_page or 20, max_per_page or MAX_PER_PAGE, MAX_PER_PAGE)
+        if page < 1 or per_page < 0:
+            if error_out:
+                abort(404)
+            page, per_page = max(page, 1), max(per_page, 0)
+        items = self.limit(per_page).offset((page - 1) * per_page).all()
+        if not items and page != 1 and error_out:
+            abort(404)
+        seen = (page - 1) * per_page + len(items)
+        if len(items) < per_page and (items or page == 1):
+            # last page, total is known without count query
+            return CountedPagination(self, page, per_page, seen, items)
+        total, estimated = self.__count(count_strategy or get_count_strategy())
+        return CountedPagination(self, page, per_page, max(total, seen), items, estimated)
+
+    def __count(self, count_strategy: str) -> (int, bool):
+        """
+        count query rows, estimated count is used only for unfiltered query
+        :param count_strategy: exact, cached or estimated
+        :return: total count and estimated or not
+        """
+        query = self.order_by(None)
+        if count_strategy == "estimated" and query.whereclause is None:
+            return query.__estimate(), True
+        if count_strategy == "exact":
+            return query.count(), False
+        statement = query.statement
+        compiled = statement.compile(dialect=query.session.get_bind().dialect)
+        key = "{} {!r}".format(compiled, sorted(compiled.params.items()))
+        total = query_cache.get(key)
+        if total is None:
+            total = query.count()
+            query_cache.set(key, {table.name for table in find_tables(statement)}, total)
+        return total, False
+
+    def __estimate(self) -> int:
+        """
+        planner row estimate, pg_class.reltuples for single table query else EXPLAIN of query
+        :return: estimated row count
+        """
+        statement = self.statement
+        tables = find_tables(statement)
+        if len(tables) == 1:
+            reltuples = self.session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": tables[0].name}).scalar()
+            # reltuples is -1 (or 0 before PostgreSQL 14) until table is analyzed
+            if reltuples and reltuples > 0:
+                return reltuples
+        compiled = statement.compile(dialect=self.session.get_bind().dialect)
+        plan = self.session.connection().execute("EXPLAIN (FORMAT JSON) {}".format(compiled), compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def get_count_strategy() -> str:
+    """
+    count strategy of current request, set by api before_request
+    """
+    if has_app_context():
+        return g.get("count_strategy") or DEFAULT_COUNT_STRATEGY
+    return DEFAULT_COUNT_STRATEGY
+
+
+@event.listens_for(Engine, "after_execute")
+def invalidate_counts(connection, clauseelement, multiparams, params, result):
+    """
+    drop cached results of written table, and again on commit so results cached before commit are dropped too
+    """
+    if isinstance(clauseelement, UpdateBase) and getattr(clauseelement, "table", None) is not None:
+        query_cache.invalidate(clauseelement.table.name)
+        connection.info.setdefault("written_tables", set()).add(clauseelement.table.name)
+
+
+@event.listens_for(Engine, "commit")
+def invalidate_committed_counts(connection):
+    for table in connection.info.pop("written_tables", ()):
+        query_cache.invalidate(table)
+
+
+@event.listens_for(Engine, "rollback")
+def clear_written_tables(connection):
+    connection.info.pop("written_tables", None)
+
+
+db = SQLAlchemy(query_class=CappedQuery)
+
+
+def stream_rows(statement, chunk_size: int = 1000) -> Iterator[List]:
+    """
+    execute select on own connection with server side cursor and yield rows in chunks,
+    memory is bounded by chunk_size whatever the result size
+    :param statement: select statement
+    :param chunk_size: rows fetched per round trip
+    :return: iterator of row lists
+    """
+    with db.engine.connect() as connection:
+        result = connection.execution_options(stream_results=True).execute(statement)
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
 
 SQLALCHEMY_DATABASE_URI = "{}{}:{}@{}:{}/{}".format(
     conf["postgres"]["url"], conf["postgres"]["user"],
@@ -0,0 +1,55 @@
+"""cascade deletes for attendances, donations and extrafunds
+
+Revision ID: 4b2f6e1d9c3a
+Revises: 1e9c73166fb0
+Create Date: 2026-10-19 10:12:41.530211
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b2f6e1d9c3a'
+down_revision = '1e9c73166fb0'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table, ondelete)
+CASCADE_FOREIGN_KEYS = [
+    ('attendances', 'student_id', 'students', 'CASCADE'),
+    ('attendances', 'school_id', 'schools', 'CASCADE'),
+    ('donations', 'user_id', 'users', 'CASCADE'),
+    ('donations', 'attendance_id', 'attendances', 'CASCADE'),
+    ('donations', 'transfer_id', 'transfers', 'SET NULL'),
+    ('extrafunds', 'transfer_id', 'transfers', 'CASCADE'),
+]
+
+FOREIGN_KEY_INDEXES = [
+    ('attendances', 'student_id'),
+    ('attendances', 'school_id'),
+    ('donations', 'user_id'),
+    ('donations', 'attendance_id'),
+    ('donations', 'transfer_id'),
+    ('students', 'address_id'),
+    ('schools', 'address_id'),
+    ('users', 'address_id'),
+]
+
+
+def upgrade():
+    for table, column, referred_table, ondelete in CASCADE_FOREIGN_KEYS:
+        constraint_name = '{}_{}_fkey'.format(table, column)
+        op.drop_constraint(constraint_name, table, type_='foreignkey')
+        op.create_foreign_key(constraint_name, table, referred_table, [column], ['id'], ondelete=ondelete)
+    for table, column in FOREIGN_KEY_INDEXES:
+        op.create_index(op.f('ix_{}_{}'.format(table, column)), table, [column], unique=False)
+
+
+def downgrade():
+    for table, column in FOREIGN_KEY_INDEXES:
+        op.drop_index(op.f('ix_{}_{}'.format(table, column)), table_name=table)
+    for table, column, referred_table, _ in CASCADE_FOREIGN_KEYS:
+        constraint_name = '{}_{}_fkey'.format(table, column)
+        op.drop_constraint(constraint_name, table, type_='foreignkey')
+        op.create_foreign_key(constraint_name, table, referred_table, [column], ['id'])
@@ -0,0 +1,92 @@
+"""division, district and township reference tables
+
+Revision ID: 7d1e5a2c8f40
+Revises: 4b2f6e1d9c3a
+Create Date: 2026-10-19 11:03:17.884102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from common.mm_division import get_division_index
+
+
+# revision identifiers, used by Alembic.
+revision = '7d1e5a2c8f40'
+down_revision = '4b2f6e1d9c3a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    divisions = op.create_table('divisions',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.UnicodeText(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    districts = op.create_table('districts',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.UnicodeText(), nullable=False),
+    sa.Column('division_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['division_id'], ['divisions.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('division_id', 'name')
+    )
+    op.create_index(op.f('ix_districts_division_id'), 'districts', ['division_id'], unique=False)
+    townships = op.create_table('townships',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.UnicodeText(), nullable=False),
+    sa.Column('district_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['district_id'], ['districts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('district_id', 'name')
+    )
+    op.create_index(op.f('ix_townships_district_id'), 'townships', ['district_id'], unique=False)
+
+    division_index = get_division_index()
+    op.bulk_insert(divisions, division_index.divisions)
+    op.bulk_insert(districts, division_index.districts)
+    op.bulk_insert(townships, division_index.townships)
+
+    op.add_column('addresses', sa.Column('division_id', sa.Integer(), nullable=True))
+    op.add_column('addresses', sa.Column('district_id', sa.Integer(), nullable=True))
+    op.add_column('addresses', sa.Column('township_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('addresses_division_id_fkey', 'addresses', 'divisions', ['division_id'], ['id'])
+    op.create_foreign_key('addresses_district_id_fkey', 'addresses', 'districts', ['district_id'], ['id'])
+    op.create_foreign_key('addresses_township_id_fkey', 'addresses', 'townships', ['township_id'], ['id'])
+
+    # back-fill ids once per distinct name combination, fuzzy matching handles typos
+    connection = op.get_bind()
+    names = connection.execute(sa.text("SELECT DISTINCT division, district, township FROM addresses")).fetchall()
+    for division, district, township in names:
+        division_id, district_id, township_id = division_index.resolve(division, district, township)
+        if division_id is None:
+            continue
+        connection.execute(sa.text(
+            "UPDATE addresses SET division_id = :division_id, district_id = :district_id, "
+            "township_id = :township_id WHERE division IS NOT DISTINCT FROM :division "
+            "AND district IS NOT DISTINCT FROM :district AND township IS NOT DISTINCT FROM :township"),
+            division_id=division_id, district_id=district_id, township_id=township_id,
+            division=division, district=district, township=township)
+
+    op.create_index(op.f('ix_addresses_division_id'), 'addresses', ['division_id'], unique=False)
+    op.create_index(op.f('ix_addresses_district_id'), 'addresses', ['district_id'], unique=False)
+    op.create_index(op.f('ix_addresses_township_id'), 'addresses', ['township_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_addresses_township_id'), table_name='addresses')
+    op.drop_index(op.f('ix_addresses_district_id'), table_name='addresses')
+    op.drop_index(op.f('ix_addresses_division_id'), table_name='addresses')
+    op.drop_constraint('addresses_township_id_fkey', 'addresses', type_='foreignkey')
+    op.drop_constraint('addresses_district_id_fkey', 'addresses', type_='foreignkey')
+    op.drop_constraint('addresses_division_id_fkey', 'addresses', type_='foreignkey')
+    op.drop_column('addresses', 'township_id')
+    op.drop_column('addresses', 'district_id')
+    op.drop_column('addresses', 'division_id')
+    op.drop_index(op.f('ix_townships_district_id'), table_name='townships')
+    op.drop_table('townships')
+    op.drop_index(op.f('ix_districts_division_id'), table_name='districts')
+    op.drop_table('districts')
+    op.drop_table('divisions')
@@ -0,0 +1,32 @@
+"""indexes for attendance and donation filter and sort columns
+
+Revision ID: 9a4c1e7b2d56
+Revises: 7d1e5a2c8f40
+Create Date: 2026-10-19 13:05:18.402117
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4c1e7b2d56'
+down_revision = '7d1e5a2c8f40'
+branch_labels = None
+depends_on = None
+
+FILTER_INDEXES = [
+    ('attendances', 'grade'),
+    ('attendances', 'year'),
+    ('donations', 'year'),
+    ('donations', 'month'),
+]
+
+
+def upgrade():
+    for table, column in FILTER_INDEXES:
+        op.create_index(op.f('ix_{}_{}'.format(table, column)), table, [column], unique=False)
+
+
+def downgrade():
+    for table, column in FILTER_INDEXES:
+        op.drop_index(op.f('ix_{}_{}'.format(table, column)), table_name=table)
@@ -0,0 +1,36 @@
+"""donor statement jobs
+
+Revision ID: a8d4f2c6e917
+Revises: f3a7c0e4d615
+Create Date: 2026-10-19 17:32:14.208113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4f2c6e917'
+down_revision = 'f3a7c0e4d615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('statement_jobs',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('year', sa.Integer(), nullable=False),
+                    sa.Column('status', sa.Enum('pending', 'running', 'done', 'failed', name='statement_job_status'),
+                              nullable=False),
+                    sa.Column('total', sa.Integer(), nullable=False),
+                    sa.Column('done', sa.Integer(), nullable=False),
+                    sa.Column('error', sa.Text(), nullable=True),
+                    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                    sa.Column('finished_at', sa.DateTime(), nullable=True),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+
+
+def downgrade():
+    op.drop_table('statement_jobs')
+    sa.Enum(name='statement_job_status').drop(op.get_bind(), checkfirst=False)
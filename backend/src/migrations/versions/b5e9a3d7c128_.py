@@ -0,0 +1,61 @@
+"""exchange rates, rate change audit trail and extra fund jpy amount
+
+Revision ID: b5e9a3d7c128
+Revises: a8d4f2c6e917
+Create Date: 2026-10-19 18:40:51.774390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e9a3d7c128'
+down_revision = 'a8d4f2c6e917'
+branch_labels = None
+depends_on = None
+
+month_enum = sa.Enum('january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september',
+                     'october', 'november', 'december', name='exchange_rate_month')
+
+
+def upgrade():
+    op.create_table('exchange_rates',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('year', sa.Integer(), nullable=False),
+                    sa.Column('month', month_enum, nullable=False),
+                    sa.Column('jpy_to_mmk', sa.Float(), nullable=False),
+                    sa.Column('transfer_id', sa.Integer(), nullable=True),
+                    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                    sa.ForeignKeyConstraint(['transfer_id'], ['transfers.id'], ondelete='SET NULL'),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('year', 'month', name='uq_exchange_rates_year_month')
+                    )
+    op.create_table('exchange_rate_changes',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('year', sa.Integer(), nullable=False),
+                    sa.Column('month', postgresql.ENUM(name='exchange_rate_month', create_type=False), nullable=False),
+                    sa.Column('old_rate', sa.Float(), nullable=True),
+                    sa.Column('new_rate', sa.Float(), nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=True),
+                    sa.Column('donation_count', sa.Integer(), nullable=False),
+                    sa.Column('donation_mmk_before', sa.Float(), nullable=False),
+                    sa.Column('donation_mmk_after', sa.Float(), nullable=False),
+                    sa.Column('transfer_count', sa.Integer(), nullable=False),
+                    sa.Column('extra_fund_count', sa.Integer(), nullable=False),
+                    sa.Column('extra_fund_mmk_before', sa.Float(), nullable=False),
+                    sa.Column('extra_fund_mmk_after', sa.Float(), nullable=False),
+                    sa.Column('changed_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index(op.f('ix_exchange_rate_changes_year'), 'exchange_rate_changes', ['year'], unique=False)
+    op.add_column('extrafunds', sa.Column('jpy_amount', sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('extrafunds', 'jpy_amount')
+    op.drop_index(op.f('ix_exchange_rate_changes_year'), table_name='exchange_rate_changes')
+    op.drop_table('exchange_rate_changes')
+    op.drop_table('exchange_rates')
+    month_enum.drop(op.get_bind(), checkfirst=False)
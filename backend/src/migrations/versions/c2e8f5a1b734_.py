@@ -0,0 +1,27 @@
+"""indexes for unallocated donations and transfers without extra funds
+
+Revision ID: c2e8f5a1b734
+Revises: 9a4c1e7b2d56
+Create Date: 2026-10-19 15:21:07.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e8f5a1b734'
+down_revision = '9a4c1e7b2d56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_donations_unallocated', 'donations', ['year', 'month'], unique=False,
+                    postgresql_where=sa.text('paid_at IS NOT NULL AND transfer_id IS NULL'))
+    op.create_index(op.f('ix_extrafunds_transfer_id'), 'extrafunds', ['transfer_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_extrafunds_transfer_id'), table_name='extrafunds')
+    op.drop_index('ix_donations_unallocated', table_name='donations')
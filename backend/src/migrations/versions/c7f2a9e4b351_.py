@@ -0,0 +1,27 @@
+"""donation indexes for gap report anti-joins
+
+Revision ID: c7f2a9e4b351
+Revises: b5e9a3d7c128
+Create Date: 2026-10-19 19:25:08.406118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f2a9e4b351'
+down_revision = 'b5e9a3d7c128'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_donations_attendance_year_month', 'donations', ['attendance_id', 'year', 'month'],
+                    unique=False)
+    op.create_index('ix_donations_user_year_month', 'donations', ['user_id', 'year', 'month'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_donations_user_year_month', table_name='donations')
+    op.drop_index('ix_donations_attendance_year_month', table_name='donations')
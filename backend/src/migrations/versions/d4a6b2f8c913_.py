@@ -0,0 +1,163 @@
+"""partition attendances and donations by year
+
+Revision ID: d4a6b2f8c913
+Revises: c7f2a9e4b351
+Create Date: 2026-10-19 20:11:37.951804
+
+Data is moved online: partitioned copies are filled in committed batches while triggers on the old tables
+mirror concurrent writes, then the tables are swapped in one short transaction.
+
+"""
+from datetime import date
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a6b2f8c913'
+down_revision = 'c7f2a9e4b351'
+branch_labels = None
+depends_on = None
+
+COPY_BATCH_SIZE = 10000
+# attendances first, donations trigger checks attendance exists
+TABLES = ('attendances', 'donations')
+FOREIGN_KEYS = {
+    'attendances': [('student_id', 'students', 'CASCADE'), ('school_id', 'schools', 'CASCADE')],
+    'donations': [('user_id', 'users', 'CASCADE'), ('transfer_id', 'transfers', 'SET NULL')],
+}
+INDEXES = {
+    'attendances': [
+        ('ix_attendances_student_id', 'student_id', None),
+        ('ix_attendances_school_id', 'school_id', None),
+        ('ix_attendances_grade', 'grade', None),
+        ('ix_attendances_year', 'year', None),
+    ],
+    'donations': [
+        ('ix_donations_user_id', 'user_id', None),
+        ('ix_donations_attendance_id', 'attendance_id', None),
+        ('ix_donations_transfer_id', 'transfer_id', None),
+        ('ix_donations_year', 'year', None),
+        ('ix_donations_month', 'month', None),
+        ('ix_donations_unallocated', 'year, month', 'paid_at IS NOT NULL AND transfer_id IS NULL'),
+        ('ix_donations_attendance_year_month', 'attendance_id, year, month', None),
+        ('ix_donations_user_year_month', 'user_id, year, month', None),
+    ],
+}
+
+MIRROR_FUNCTION = """
+CREATE FUNCTION mirror_to_partitioned() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        EXECUTE format('DELETE FROM %I WHERE id = $1', TG_TABLE_NAME || '_partitioned') USING OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        EXECUTE format('INSERT INTO %I SELECT ($1).*', TG_TABLE_NAME || '_partitioned') USING NEW;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+INTEGRITY_TRIGGERS = """
+CREATE OR REPLACE FUNCTION attendances_delete_donations() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('thingaha.moving_partition', true) IS DISTINCT FROM 'on' THEN
+        DELETE FROM donations WHERE attendance_id = OLD.id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER attendances_delete_donations AFTER DELETE ON attendances
+    FOR EACH ROW EXECUTE PROCEDURE attendances_delete_donations();
+CREATE OR REPLACE FUNCTION donations_check_attendance() RETURNS trigger AS $$
+BEGIN
+    PERFORM 1 FROM attendances WHERE id = NEW.attendance_id FOR KEY SHARE;
+    IF NOT FOUND THEN
+        RAISE foreign_key_violation USING MESSAGE = format('attendance %s of donation %s does not exist',
+                                                             NEW.attendance_id, NEW.id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER donations_check_attendance AFTER INSERT OR UPDATE OF attendance_id ON donations
+    FOR EACH ROW EXECUTE PROCEDURE donations_check_attendance();
+"""
+
+
+def create_indexes(table, suffix=''):
+    for name, columns, where in INDEXES[table]:
+        op.execute('CREATE INDEX {}{} ON {}{} ({}){}'.format(
+            name, suffix, table, suffix, columns, ' WHERE {}'.format(where) if where else ''))
+
+
+def upgrade():
+    bind = op.get_bind()
+    this_year = date.today().year
+    op.execute(MIRROR_FUNCTION)
+    for table in TABLES:
+        new_table = '{}_partitioned'.format(table)
+        op.execute('CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS) PARTITION BY RANGE (year)'.format(new_table, table))
+        op.execute('ALTER TABLE {} ADD CONSTRAINT {}_pkey PRIMARY KEY (id, year)'.format(new_table, new_table))
+        for column, referred_table, ondelete in FOREIGN_KEYS[table]:
+            op.execute('ALTER TABLE {} ADD CONSTRAINT {}_{}_fkey FOREIGN KEY ({}) REFERENCES {} (id) '
+                       'ON DELETE {}'.format(new_table, table, column, column, referred_table, ondelete))
+        # indexes are built on empty table so the copy never blocks writes mirrored from the old table
+        create_indexes(table, '_partitioned')
+        years = {row[0] for row in bind.execute('SELECT DISTINCT year FROM {}'.format(table))}
+        for year in sorted(years | {this_year, this_year + 1}):
+            op.execute('CREATE TABLE {}_y{} PARTITION OF {} FOR VALUES FROM ({}) TO ({})'.format(
+                table, year, new_table, year, year + 1))
+        op.execute('CREATE TABLE {}_default PARTITION OF {} DEFAULT'.format(table, new_table))
+        op.execute('CREATE TRIGGER mirror_to_partitioned AFTER INSERT OR UPDATE OR DELETE ON {} '
+                   'FOR EACH ROW EXECUTE PROCEDURE mirror_to_partitioned()'.format(table))
+
+    # copy in committed batches, rows written meanwhile are mirrored by trigger and skipped here
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            max_id = bind.execute('SELECT coalesce(max(id), 0) FROM {}'.format(table)).scalar()
+            for start in range(0, max_id, COPY_BATCH_SIZE):
+                bind.execute(
+                    'INSERT INTO {table}_partitioned SELECT * FROM {table} t '
+                    'WHERE t.id > {start} AND t.id <= {end} '
+                    'AND NOT EXISTS (SELECT 1 FROM {table}_partitioned p WHERE p.id = t.id) '
+                    'ON CONFLICT DO NOTHING'.format(table=table, start=start, end=start + COPY_BATCH_SIZE))
+
+    # swap, writes wait only for this transaction
+    op.execute('LOCK TABLE attendances, donations IN ACCESS EXCLUSIVE MODE')
+    for table in reversed(TABLES):
+        op.execute('DROP TRIGGER mirror_to_partitioned ON {}'.format(table))
+        op.execute('ALTER TABLE {} RENAME TO {}_unpartitioned'.format(table, table))
+        op.execute('ALTER TABLE {}_partitioned RENAME TO {}'.format(table, table))
+        op.execute('ALTER SEQUENCE {}_id_seq OWNED BY {}.id'.format(table, table))
+    for table in reversed(TABLES):
+        op.execute('DROP TABLE {}_unpartitioned'.format(table))
+    for table in TABLES:
+        op.execute('ALTER TABLE {} RENAME CONSTRAINT {}_partitioned_pkey TO {}_pkey'.format(table, table, table))
+        for name, _, _ in INDEXES[table]:
+            op.execute('ALTER INDEX {}_partitioned RENAME TO {}'.format(name, name))
+    op.execute('DROP FUNCTION mirror_to_partitioned()')
+    op.execute(INTEGRITY_TRIGGERS)
+
+
+def downgrade():
+    op.execute('LOCK TABLE attendances, donations IN ACCESS EXCLUSIVE MODE')
+    op.execute('DROP TRIGGER donations_check_attendance ON donations')
+    op.execute('DROP TRIGGER attendances_delete_donations ON attendances')
+    op.execute('DROP FUNCTION donations_check_attendance()')
+    op.execute('DROP FUNCTION attendances_delete_donations()')
+    for table in TABLES:
+        op.execute('CREATE TABLE {}_unpartitioned (LIKE {} INCLUDING DEFAULTS)'.format(table, table))
+        op.execute('INSERT INTO {}_unpartitioned SELECT * FROM {}'.format(table, table))
+    for table in reversed(TABLES):
+        op.execute('ALTER SEQUENCE {}_id_seq OWNED BY {}_unpartitioned.id'.format(table, table))
+        op.execute('DROP TABLE {}'.format(table))
+    for table in TABLES:
+        op.execute('ALTER TABLE {}_unpartitioned RENAME TO {}'.format(table, table))
+        op.execute('ALTER TABLE {} ADD CONSTRAINT {}_pkey PRIMARY KEY (id)'.format(table, table))
+        for column, referred_table, ondelete in FOREIGN_KEYS[table]:
+            op.execute('ALTER TABLE {} ADD CONSTRAINT {}_{}_fkey FOREIGN KEY ({}) REFERENCES {} (id) '
+                       'ON DELETE {}'.format(table, table, column, column, referred_table, ondelete))
+        create_indexes(table)
+    op.execute('ALTER TABLE donations ADD CONSTRAINT donations_attendance_id_fkey FOREIGN KEY (attendance_id) '
+               'REFERENCES attendances (id) ON DELETE CASCADE')
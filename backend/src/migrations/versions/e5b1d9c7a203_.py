@@ -0,0 +1,26 @@
+"""functional indexes for case insensitive login lookup
+
+Revision ID: e5b1d9c7a203
+Revises: c2e8f5a1b734
+Create Date: 2026-10-19 16:02:44.907251
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b1d9c7a203'
+down_revision = 'c2e8f5a1b734'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_lower_email', 'users', [sa.text('lower(email)')], unique=False)
+    op.create_index('ix_users_lower_username', 'users', [sa.text('lower(username)')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_lower_username', table_name='users')
+    op.drop_index('ix_users_lower_email', table_name='users')
@@ -0,0 +1,30 @@
+"""shared rate limit token buckets
+
+Revision ID: f3a7c0e4d615
+Revises: e5b1d9c7a203
+Create Date: 2026-10-19 16:48:30.552910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c0e4d615'
+down_revision = 'e5b1d9c7a203'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('rate_limit_buckets',
+                    sa.Column('key', sa.String(), nullable=False),
+                    sa.Column('tokens', sa.Float(), nullable=False),
+                    sa.Column('allowed', sa.Boolean(), nullable=False),
+                    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+                    sa.PrimaryKeyConstraint('key')
+                    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_buckets')
@@ -2,14 +2,15 @@
 
 from __future__ import annotations
 
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from flask_sqlalchemy import Pagination
-from sqlalchemy import or_
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql import Delete
 
 from common.error import SQLCustomError
-from database import db
+from database import db, MAX_PER_PAGE, CountedPagination
 
 
 class AddressModel(db.Model):
@@ -24,16 +25,23 @@ class AddressModel(db.Model):
     township = db.Column(db.UnicodeText())
     street_address = db.Column(db.UnicodeText())
     type = db.Column(db.Enum("user", "student", "school", name="addresses_types"), default="user", nullable=False)
+    division_id = db.Column(db.Integer, db.ForeignKey("divisions.id"), nullable=True, index=True)
+    district_id = db.Column(db.Integer, db.ForeignKey("districts.id"), nullable=True, index=True)
+    township_id = db.Column(db.Integer, db.ForeignKey("townships.id"), nullable=True, index=True)
 
     def __repr__(self):
         return f"<Address {self.format_address()}>"
 
-    def __init__(self, division: str, district: str, township: str, street_address: str, type: str = "user") -> None:
+    def __init__(self, division: str, district: str, township: str, street_address: str, type: str = "user",
+                 division_id: int = None, district_id: int = None, township_id: int = None) -> None:
         self.division = division
         self.district = district
         self.township = township
         self.street_address = street_address
         self.type = type
+        self.division_id = division_id
+        self.district_id = district_id
+        self.township_id = township_id
 
     def format_address(self):
         """
@@ -57,6 +65,15 @@ class AddressModel(db.Model):
             "street_address": self.street_address
         }
 
+    @staticmethod
+    def region_filter(region: Dict[str, int]) -> List:
+        """
+        filter conditions for indexed division_id, district_id and township_id columns
+        :param region: resolved region ids
+        :return: filter conditions list
+        """
+        return [getattr(AddressModel, column) == region_id for column, region_id in (region or {}).items()]
+
     @staticmethod
     def create_address(new_address: AddressModel, flush: bool = False) -> int:
         """
@@ -91,6 +108,9 @@ class AddressModel(db.Model):
             target_address.township = address.township
             target_address.street_address = address.street_address
             target_address.type = address.type
+            target_address.division_id = address.division_id
+            target_address.district_id = address.district_id
+            target_address.township_id = address.township_id
             db.session.commit()
             return True
         except SQLAlchemyError as error:
@@ -110,31 +130,83 @@ class AddressModel(db.Model):
             raise error
 
     @staticmethod
-    def get_all_addresses(page: int = 1, per_page: int = 20) -> Pagination:
+    def _paginate_with_owner(page: int, per_page: int, *criterion) -> Pagination:
         """
-        get all address record
+        page addresses together with owner (school, user or student) id and name
+        owners are resolved by LEFT JOIN and total count by window function, so one query per page
         :param page:
         :param per_page:
-        :return: get all address info
+        :param criterion: filter conditions for addresses
+        :return: Pagination of (address, owner_id, owner_name, total_count)
+        """
+        per_page = min(per_page, MAX_PER_PAGE)
+        # owner models import AddressModel, import them here to avoid circular import
+        from models.school import SchoolModel
+        from models.student import StudentModel
+        from models.user import UserModel
+
+        query = db.session.query(
+            AddressModel,
+            func.coalesce(SchoolModel.id, UserModel.id, StudentModel.id).label("owner_id"),
+            func.coalesce(SchoolModel.name, UserModel.username, StudentModel.name).label("owner_name"),
+            func.count().over().label("total_count")). \
+            outerjoin(SchoolModel, and_(SchoolModel.address_id == AddressModel.id, AddressModel.type == "school")). \
+            outerjoin(UserModel, and_(UserModel.address_id == AddressModel.id, AddressModel.type == "user")). \
+            outerjoin(StudentModel, and_(StudentModel.address_id == AddressModel.id, AddressModel.type == "student")). \
+            filter(*criterion)
+        items = query.order_by(AddressModel.id).limit(per_page).offset((page - 1) * per_page).all()
+        if items:
+            total = items[0].total_count
+        else:
+            total = db.session.query(func.count(AddressModel.id)).filter(*criterion).scalar()
+        return CountedPagination(query, page, per_page, total, items)
+
+    @staticmethod
+    def get_region_counts(level: str, region: Dict[str, int] = None) -> List:
         """
+        count students, schools and donators per region in one aggregated query
+        :param level: division, district or township
+        :param region: division_id, district_id, township_id filter
+        :return: list of (id, name, students, schools, donators)
+        """
+        # owner models import AddressModel, import them here to avoid circular import
+        from models.region import DivisionModel, DistrictModel, TownshipModel
+        from models.school import SchoolModel
+        from models.student import StudentModel
+        from models.user import UserModel
+
+        region_model, region_column = {
+            "division": (DivisionModel, AddressModel.division_id),
+            "district": (DistrictModel, AddressModel.district_id),
+            "township": (TownshipModel, AddressModel.township_id)
+        }[level]
         try:
-            return db.session.query(AddressModel).paginate(page=page, per_page=per_page, error_out=False)
+            return db.session.query(
+                region_model.id, region_model.name,
+                func.count(StudentModel.id).label("students"),
+                func.count(SchoolModel.id).label("schools"),
+                func.count(UserModel.id).label("donators")). \
+                join(AddressModel, region_column == region_model.id). \
+                outerjoin(StudentModel, StudentModel.address_id == AddressModel.id). \
+                outerjoin(SchoolModel, SchoolModel.address_id == AddressModel.id). \
+                outerjoin(UserModel, and_(UserModel.address_id == AddressModel.id, UserModel.role == "donator")). \
+                filter(*AddressModel.region_filter(region)). \
+                group_by(region_model.id, region_model.name).order_by(region_model.id).all()
         except SQLAlchemyError as error:
             raise error
 
     @staticmethod
-    def get_all_addresses_by_type(page: int, per_page: int, address_type: str) -> Pagination:
+    def get_all_addresses(page: int = 1, per_page: int = 20, address_type: str = None) -> Pagination:
         """
-        get all address record by address type
+        get all address record with owner, filter by address type if given
         :param page:
         :param per_page:
         :param address_type:
-        :return: get all address info by address type
+        :return: get all address info
         """
         try:
-            return db.session.query(AddressModel).filter(AddressModel.type == address_type).paginate(page=page,
-                                                                                                     per_page=per_page,
-                                                                                                     error_out=False)
+            criterion = [AddressModel.type == address_type] if address_type else []
+            return AddressModel._paginate_with_owner(page, per_page, *criterion)
         except SQLAlchemyError as error:
             raise error
 
@@ -154,23 +226,38 @@ class AddressModel(db.Model):
             db.session.rollback()
             raise error
 
+    @staticmethod
+    def delete_address_with_owner(owner_delete: Delete) -> bool:
+        """
+        delete owner record (user, student or school) and its address in one statement
+        attendances and donations of the owner are removed by FK cascades
+        :param owner_delete: owner DELETE statement returning address_id
+        :return: bool
+        """
+        try:
+            deleted_owner = owner_delete.cte("deleted_owner")
+            result = db.session.execute(AddressModel.__table__.delete().where(
+                AddressModel.id.in_(select([deleted_owner.c.address_id]))))
+            db.session.commit()
+            return result.rowcount > 0
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            raise error
+
     @staticmethod
     def search_address_by_query(page: int, per_page: int, query: str) -> Pagination:
         """
-        delete address by id
+        search address with owner by query
         :param page:
         :param per_page:
         :param query:
         :return: Pagination
         """
         try:
-            return db.session.query(AddressModel).filter(or_(AddressModel.division.ilike('%' + query + '%'),
-                                                             AddressModel.district.ilike('%' + query + '%'),
-                                                             AddressModel.township.ilike('%' + query + '%'),
-                                                             AddressModel.street_address.ilike('%' + query + '%'),
-                                                             )).paginate(
-                page=page,
-                per_page=per_page,
-                error_out=False)
+            return AddressModel._paginate_with_owner(page, per_page,
+                                                     or_(AddressModel.division.ilike('%' + query + '%'),
+                                                         AddressModel.district.ilike('%' + query + '%'),
+                                                         AddressModel.township.ilike('%' + query + '%'),
+                                                         AddressModel.street_address.ilike('%' + query + '%')))
         except SQLAlchemyError as error:
             raise error
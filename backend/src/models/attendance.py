@@ -2,32 +2,38 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import List
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 
 from flask_sqlalchemy import Pagination
-from sqlalchemy import and_
+from sqlalchemy import DDL, and_, event, func, null, select, true
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Load, Query, joinedload, relationship
 
 from common.error import SQLCustomError
-from database import db
+from common.field_selector import FieldSelector
+from common.query_filter import QueryFilter
+from database import db, stream_rows
+from models.partition import MOVING_PARTITION_SETTING, year_partitioned
 from models.school import SchoolModel
 from models.student import StudentModel
 
 
 class AttendanceModel(db.Model):
     __tablename__ = "attendances"
+    __table_args__ = {"postgresql_partition_by": "RANGE (year)"}
 
-    id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey("students.id"), nullable=False)
-    school_id = db.Column(db.Integer, db.ForeignKey("schools.id"), nullable=False)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    student_id = db.Column(db.Integer, db.ForeignKey("students.id", ondelete="CASCADE"), nullable=False, index=True)
+    school_id = db.Column(db.Integer, db.ForeignKey("schools.id", ondelete="CASCADE"), nullable=False, index=True)
     grade = db.Column(
         db.Enum("KG", "G-1", "G-2", "G-3", "G-4", "G-5", "G-6", "G-7", "G-8", "G-9", "G-10", "G-11", "G-12",
-                name="grade"))
-    year = db.Column(db.Integer, nullable=False)
+                name="grade"), index=True)
+    # partition key, part of table primary key (id, year), rows are identified by id alone
+    year = db.Column(db.Integer, primary_key=True, index=True)
     enrolled_date = db.Column(db.Date(), nullable=True)
     school = relationship("SchoolModel", foreign_keys=[school_id])
     student = relationship("StudentModel", foreign_keys=[student_id])
+    __mapper_args__ = {"primary_key": [id]}
 
     def __init__(self, student_id: str, school_id: str, grade: str, year: str, enrolled_date: date) -> None:
         self.student_id = student_id
@@ -39,21 +45,47 @@ class AttendanceModel(db.Model):
     def __repr__(self):
         return f"<Attendance for student id:  {self.student_id}>"
 
-    def attendance_dict(self, school: SchoolModel, student: StudentModel):
+    def attendance_dict(self, school: Optional[SchoolModel], student: Optional[StudentModel],
+                        fields: List[str] = None) -> Dict[str, Any]:
         """
         Return object data for viewing easily serializable format
-        :param school:
-        :param student:
+        :param school: None if school is not expanded
+        :param student: None if student is not expanded
+        :param fields: attendance fields to return, all fields if None
         :return:
         """
-        return {
-            "id": self.id,
-            "grade": self.grade,
-            "year": self.year,
-            "enrolled_date": self.enrolled_date.strftime("%d-%m-%Y"),
-            "school": school.school_dict(),
-            "student": student.student_dict()
-        }
+        fields = fields or list(ATTENDANCE_FIELD_SELECTOR.fields)
+        attendance = {field: getattr(self, field) for field in fields if field != "enrolled_date"}
+        if "enrolled_date" in fields:
+            attendance["enrolled_date"] = self.enrolled_date.strftime("%d-%m-%Y")
+        if school is not None:
+            attendance["school"] = school.school_dict()
+        if student is not None:
+            attendance["student"] = student.student_dict()
+        return attendance
+
+    @staticmethod
+    def _query_with_expand(columns: List[str] = None, expand: List[str] = None, criterion: List = None) -> Query:
+        """
+        query attendance with only requested columns, school and student are joined only if expanded
+        :param columns: attendance columns to load, all columns if None
+        :param expand: school and/or student, both if None
+        :param criterion: filter conditions
+        :return: query of (attendance, school or None, student or None)
+        """
+        expand = ATTENDANCE_FIELD_SELECTOR.expands if expand is None else expand
+        query = db.session.query(AttendanceModel,
+                                 SchoolModel if "school" in expand else null(),
+                                 StudentModel if "student" in expand else null())
+        if columns:
+            query = query.options(Load(AttendanceModel).load_only(*columns))
+        if "school" in expand:
+            query = query.join(SchoolModel, AttendanceModel.school_id == SchoolModel.id). \
+                options(joinedload(SchoolModel.address))
+        if "student" in expand:
+            query = query.join(StudentModel, AttendanceModel.student_id == StudentModel.id). \
+                options(joinedload(StudentModel.address))
+        return query.filter(*(criterion or []))
 
     @staticmethod
     def create_attendance(new_attendance: AttendanceModel) -> bool:
@@ -71,85 +103,86 @@ class AttendanceModel(db.Model):
             raise error
 
     @staticmethod
-    def get_all_attendances(page: int = 1, per_page: int = 20) -> Pagination:
+    def get_all_attendances(page: int = 1, per_page: int = 20, criterion: List = None,
+                            order_by: List = None, columns: List[str] = None, expand: List[str] = None) -> Pagination:
         """
         get all Attendance records
         :params page
         :params per_page
+        :params criterion: filter conditions from ATTENDANCE_QUERY_FILTER
+        :params order_by: order by clauses from ATTENDANCE_QUERY_FILTER
+        :params columns: attendance columns to load
+        :params expand: nested school and/or student to join
         :return: Attendance Pagination Object
         """
         try:
-            return db.session.query(AttendanceModel, SchoolModel, StudentModel).\
-                filter(AttendanceModel.school_id == SchoolModel.id).\
-                filter(AttendanceModel.student_id == StudentModel.id).paginate(page=page, per_page=per_page, error_out=False)
+            return AttendanceModel._query_with_expand(columns, expand, criterion).\
+                order_by(*(order_by or [AttendanceModel.id])).\
+                paginate(page=page, per_page=per_page, error_out=False)
         except SQLAlchemyError as error:
             raise error
 
     @staticmethod
-    def get_attendances_by_year(page: int, year: int, per_page: int = 20) -> Pagination:
+    def get_attendances_export(criterion: List = None, order_by: List = None,
+                               chunk_size: int = 1000) -> Tuple[List[str], Iterator[List]]:
         """
-        get all attendance by year
-        :params page
-        :params year
-        :params per_page
-        :return: Attendance Pagination Object
+        flat attendance rows with student and school name for export, streamed by server side cursor
+        :param criterion: filter conditions from ATTENDANCE_QUERY_FILTER
+        :param order_by: order by clauses from ATTENDANCE_QUERY_FILTER
+        :param chunk_size: rows per chunk
+        :return: column names and lazy iterator of row chunks
         """
-        try:
-            return db.session.query(AttendanceModel, SchoolModel, StudentModel).\
-                filter(AttendanceModel.school_id == SchoolModel.id).\
-                filter(AttendanceModel.student_id == StudentModel.id).\
-                filter(AttendanceModel.year == year).paginate(page=page,  per_page=per_page, error_out=False)
-        except SQLAlchemyError as error:
-            raise error
+        statement = select([
+            AttendanceModel.id, AttendanceModel.grade, AttendanceModel.year, AttendanceModel.enrolled_date,
+            AttendanceModel.student_id, StudentModel.name.label("student_name"),
+            AttendanceModel.school_id, SchoolModel.name.label("school_name")
+        ]).select_from(
+            AttendanceModel.__table__.join(StudentModel.__table__, AttendanceModel.student_id == StudentModel.id).
+            join(SchoolModel.__table__, AttendanceModel.school_id == SchoolModel.id)
+        ).where(and_(true(), *(criterion or []))).order_by(*(order_by or [AttendanceModel.id]))
+        return [column.key for column in statement.c], stream_rows(statement, chunk_size)
 
     @staticmethod
-    def get_attendances_by_grade(page: int, grade: str, per_page: int = 20) -> Pagination:
+    def get_active_student_count(year: int) -> int:
         """
-        get all attendances by grade
-        :params page
-        :params per_page
-        :params grade
-        :return: Attendance Pagination Object
+        count students attending in year who are not deactivated
+        :param year:
+        :return: student count
         """
         try:
-            return db.session.query(AttendanceModel, SchoolModel, StudentModel). \
-                filter(AttendanceModel.school_id == SchoolModel.id). \
-                filter(AttendanceModel.student_id == StudentModel.id). \
-                filter(AttendanceModel.grade == grade).paginate(page=page, per_page=per_page, error_out=False)
+            return db.session.query(func.count(func.distinct(AttendanceModel.student_id))). \
+                join(StudentModel, AttendanceModel.student_id == StudentModel.id). \
+                filter(AttendanceModel.year == year, StudentModel.deactivated_at.is_(None)).scalar()
         except SQLAlchemyError as error:
             raise error
 
     @staticmethod
-    def get_attendances_by_grade_year(page: int, grade: str, year: int, per_page: int = 20) -> Pagination:
+    def get_attendance_by_id(attendance_id: int, columns: List[str] = None,
+                             expand: List[str] = None) -> List[AttendanceModel]:
         """
-        get all attendances by grade and year
-        :params page
-        :params grade
-        :params year
-        :params per_page
-        :return: Attendance Pagination Object
+        get all Attendance records
+        :param attendance_id
+        :param columns: attendance columns to load
+        :param expand: nested school and/or student to join
+        :return: Attendance list
         """
         try:
-            return db.session.query(AttendanceModel, SchoolModel, StudentModel). \
-                filter(AttendanceModel.school_id == SchoolModel.id). \
-                filter(AttendanceModel.student_id == StudentModel.id).\
-                filter(and_(AttendanceModel.grade == grade, AttendanceModel.year == year)).\
-                paginate(page=page, per_page=per_page, error_out=False)
+            return AttendanceModel._query_with_expand(columns, expand, [AttendanceModel.id == attendance_id]).first()
         except SQLAlchemyError as error:
             raise error
 
     @staticmethod
-    def get_attendance_by_id(attendance_id: int) -> List[AttendanceModel]:
+    def get_attendances_by_ids(attendance_ids: List[int], columns: List[str] = None,
+                               expand: List[str] = None) -> List:
         """
-        get all Attendance records
-        :param attendance_id
-        :return: Attendance list
+        get attendances by ids in one IN query
+        :param attendance_ids:
+        :param columns: attendance columns to load
+        :param expand: nested school and/or student to join
+        :return: list of (attendance, school, student)
         """
         try:
-            return db.session.query(AttendanceModel, SchoolModel, StudentModel). \
-                filter(AttendanceModel.school_id == SchoolModel.id). \
-                filter(AttendanceModel.student_id == StudentModel.id).\
-                filter(AttendanceModel.id == attendance_id).first()
+            return AttendanceModel._query_with_expand(columns, expand, [AttendanceModel.id.in_(attendance_ids)]).all()
         except SQLAlchemyError as error:
             raise error
 
@@ -191,3 +224,43 @@ class AttendanceModel(db.Model):
         except SQLAlchemyError as error:
             db.session.rollback()
             raise error
+
+
+year_partitioned(AttendanceModel.__table__, AttendanceModel)
+# donations.attendance_id can not reference partitioned attendances(id), cascade delete is done by trigger
+event.listen(AttendanceModel.__table__, "after_create", DDL("""
+CREATE OR REPLACE FUNCTION attendances_delete_donations() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('{setting}', true) IS DISTINCT FROM 'on' THEN
+        DELETE FROM donations WHERE attendance_id = OLD.id;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER attendances_delete_donations AFTER DELETE ON attendances
+    FOR EACH ROW EXECUTE PROCEDURE attendances_delete_donations();
+""".format(setting=MOVING_PARTITION_SETTING)))
+
+ATTENDANCE_QUERY_FILTER = QueryFilter(
+    filters={
+        "school_id": AttendanceModel.school_id,
+        "student_id": AttendanceModel.student_id,
+        "year": AttendanceModel.year,
+        "grade": AttendanceModel.grade
+    },
+    sorts={
+        "id": AttendanceModel.id,
+        "school_id": AttendanceModel.school_id,
+        "student_id": AttendanceModel.student_id,
+        "year": AttendanceModel.year,
+        "grade": AttendanceModel.grade
+    })
+
+ATTENDANCE_FIELD_SELECTOR = FieldSelector(
+    fields={
+        "id": ("id",),
+        "grade": ("grade",),
+        "year": ("year",),
+        "enrolled_date": ("enrolled_date",)
+    },
+    expands=("school", "student"))
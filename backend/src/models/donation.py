@@ -2,30 +2,48 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 
 from flask_sqlalchemy import Pagination
+from sqlalchemy import DDL, and_, case, event, exists, func, null, select, true
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Load, Query, joinedload
+from sqlalchemy.sql.util import find_tables
 
-from common.error import SQLCustomError
-from database import db
+from common.error import SQLCustomError, ValidateFail
+from common.field_selector import FieldSelector
+from common.query_filter import QueryFilter
+from database import db, stream_rows
 from models.attendance import AttendanceModel
+from models.partition import year_partitioned
+from models.school import SchoolModel
 from models.student import StudentModel
+from models.transfer import TransferModel
 from models.user import UserModel
 
 
 class DonationModel(db.Model):
     __tablename__ = "donations"
+    __table_args__ = (db.Index("ix_donations_unallocated", "year", "month",
+                               postgresql_where=db.text("paid_at IS NOT NULL AND transfer_id IS NULL")),
+                      db.Index("ix_donations_attendance_year_month", "attendance_id", "year", "month"),
+                      db.Index("ix_donations_user_year_month", "user_id", "year", "month"),
+                      {"postgresql_partition_by": "RANGE (year)"})
 
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    attendance_id = db.Column(db.Integer, db.ForeignKey("attendances.id"), nullable=False)
-    transfer_id = db.Column(db.Integer, db.ForeignKey("transfers.id"), nullable=True)
-    year = db.Column(db.Integer, nullable=False)
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # references attendances.id, checked by trigger as partitioned attendances has no unique id
+    attendance_id = db.Column(db.Integer, nullable=False, index=True)
+    transfer_id = db.Column(db.Integer, db.ForeignKey("transfers.id", ondelete="SET NULL"), nullable=True, index=True)
+    # partition key, part of table primary key (id, year), rows are identified by id alone
+    year = db.Column(db.Integer, primary_key=True, index=True)
     month = db.Column(db.Enum("january", "february", "march", "april", "may", "june",
-                              "july", "august", "september", "october", "november", "december", name="month"))
+                              "july", "august", "september", "october", "november", "december", name="month"),
+                      index=True)
     mmk_amount = db.Column(db.Float())
     jpy_amount = db.Column(db.Float())
     paid_at = db.Column(db.DateTime(), nullable=True)
+    __mapper_args__ = {"primary_key": [id]}
 
     def __init__(self, user_id: int, attendance_id: int, transfer_id: int, year: int, month: str, mmk_amount: float,
                  jpy_amount: float, paid_at: datetime) -> None:
@@ -41,23 +59,52 @@ class DonationModel(db.Model):
     def __repr__(self):
         return f"<Donation Records for user_id {self.user_id}>"
 
-    def donation_dict(self, user: UserModel, student: StudentModel):
+    def donation_dict(self, user: Optional[UserModel], student: Optional[StudentModel],
+                      fields: List[str] = None) -> Dict[str, Any]:
         """
         Return object data for viewing easily serializable format
-        :param user:
-        :param student:
+        :param user: None if user is not expanded
+        :param student: None if student is not expanded
+        :param fields: donation fields to return, all fields if None
         :return:
         """
-        return {
-            "id": self.id,
-            "user": user.as_dict(),
-            "year": self.year,
-            "month": self.month,
-            "student": student.student_dict(),
-            "mmk_amount": self.mmk_amount,
-            "jpy_amount": self.jpy_amount,
-            "status": "pending" if self.paid_at is None else "paid"
-        }
+        fields = fields or list(DONATION_FIELD_SELECTOR.fields)
+        donation = {field: getattr(self, field) for field in fields if field != "status"}
+        if "status" in fields:
+            donation["status"] = "pending" if self.paid_at is None else "paid"
+        if user is not None:
+            donation["user"] = user.as_dict()
+        if student is not None:
+            donation["student"] = student.student_dict()
+        return donation
+
+    @staticmethod
+    def _query_with_expand(columns: List[str] = None, expand: List[str] = None, criterion: List = None) -> Query:
+        """
+        query donation with only requested columns, user and student are joined only if expanded
+        attendances is joined for student expansion or attendance filter
+        :param columns: donation columns to load, all columns if None
+        :param expand: user and/or student, both if None
+        :param criterion: filter conditions
+        :return: query of (donation, user or None, student or None)
+        """
+        expand = DONATION_FIELD_SELECTOR.expands if expand is None else expand
+        criterion = criterion or []
+        query = db.session.query(DonationModel,
+                                 UserModel if "user" in expand else null(),
+                                 StudentModel if "student" in expand else null())
+        if columns:
+            query = query.options(Load(DonationModel).load_only(*columns))
+        if "user" in expand:
+            query = query.join(UserModel, DonationModel.user_id == UserModel.id). \
+                options(joinedload(UserModel.address))
+        if "student" in expand or any(AttendanceModel.__table__ in find_tables(condition, check_columns=True)
+                                      for condition in criterion):
+            query = query.join(AttendanceModel, DonationModel.attendance_id == AttendanceModel.id)
+        if "student" in expand:
+            query = query.join(StudentModel, AttendanceModel.student_id == StudentModel.id). \
+                options(joinedload(StudentModel.address))
+        return query.filter(*criterion)
 
     @staticmethod
     def create_donation(new_donation: DonationModel) -> int:
@@ -74,34 +121,265 @@ class DonationModel(db.Model):
             raise error
 
     @staticmethod
-    def get_all_donations(page: int = 1, per_page: int = 20) -> Pagination:
+    def get_all_donations(page: int = 1, per_page: int = 20, criterion: List = None,
+                          order_by: List = None, columns: List[str] = None, expand: List[str] = None) -> Pagination:
         """
         get all donation records
         :params page
         :params per_page
+        :params criterion: filter conditions from DONATION_QUERY_FILTER
+        :params order_by: order by clauses from DONATION_QUERY_FILTER
+        :params columns: donation columns to load
+        :params expand: nested user and/or student to join
         :return: donation list
         """
         try:
-            return db.session.query(DonationModel, UserModel, StudentModel). \
-                filter(DonationModel.user_id == UserModel.id). \
-                filter(DonationModel.attendance_id == AttendanceModel.id). \
-                filter(AttendanceModel.id == StudentModel.id).paginate(page=page, per_page=per_page, error_out=False)
+            return DonationModel._query_with_expand(columns, expand, criterion). \
+                order_by(*(order_by or [DonationModel.id])). \
+                paginate(page=page, per_page=per_page, error_out=False)
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def get_donations_export(criterion: List = None, order_by: List = None,
+                             chunk_size: int = 1000) -> Tuple[List[str], Iterator[List]]:
+        """
+        flat donation rows with donator, student and school for export, streamed by server side cursor
+        :param criterion: filter conditions from DONATION_QUERY_FILTER
+        :param order_by: order by clauses from DONATION_QUERY_FILTER
+        :param chunk_size: rows per chunk
+        :return: column names and lazy iterator of row chunks
+        """
+        statement = select([
+            DonationModel.id, DonationModel.year, DonationModel.month, DonationModel.mmk_amount,
+            DonationModel.jpy_amount, DonationModel.paid_at, DonationModel.transfer_id,
+            DonationModel.user_id, UserModel.display_name.label("user_name"), DonationModel.attendance_id,
+            AttendanceModel.student_id, StudentModel.name.label("student_name"), AttendanceModel.school_id
+        ]).select_from(
+            DonationModel.__table__.join(UserModel.__table__, DonationModel.user_id == UserModel.id).
+            join(AttendanceModel.__table__, DonationModel.attendance_id == AttendanceModel.id).
+            join(StudentModel.__table__, AttendanceModel.student_id == StudentModel.id)
+        ).where(and_(true(), *(criterion or []))).order_by(*(order_by or [DonationModel.id]))
+        return [column.key for column in statement.c], stream_rows(statement, chunk_size)
+
+    @staticmethod
+    def get_statement_donator_count(year: int) -> int:
+        """
+        count donators who paid donation in year
+        :param year:
+        :return: donator count
+        """
+        try:
+            return db.session.query(func.count(func.distinct(DonationModel.user_id))). \
+                filter(DonationModel.year == year, DonationModel.paid_at.isnot(None)).scalar()
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def get_statement_rows(year: int, chunk_size: int = 1000) -> Tuple[List[str], Iterator[List]]:
+        """
+        paid donation totals per donator, student and month of year in one grouped pass,
+        ordered by donator so rows of one donator are contiguous
+        :param year:
+        :param chunk_size: rows per chunk
+        :return: column names and lazy iterator of row chunks
+        """
+        statement = select([
+            DonationModel.user_id, UserModel.display_name.label("user_name"), UserModel.email,
+            AttendanceModel.student_id, StudentModel.name.label("student_name"), DonationModel.month,
+            func.count().label("donation_count"),
+            func.coalesce(func.sum(DonationModel.mmk_amount), 0).label("mmk_amount"),
+            func.coalesce(func.sum(DonationModel.jpy_amount), 0).label("jpy_amount")
+        ]).select_from(
+            DonationModel.__table__.join(UserModel.__table__, DonationModel.user_id == UserModel.id).
+            join(AttendanceModel.__table__, DonationModel.attendance_id == AttendanceModel.id).
+            join(StudentModel.__table__, AttendanceModel.student_id == StudentModel.id)
+        ).where(and_(DonationModel.year == year, DonationModel.paid_at.isnot(None))).group_by(
+            DonationModel.user_id, UserModel.display_name, UserModel.email,
+            AttendanceModel.student_id, StudentModel.name, DonationModel.month
+        ).order_by(DonationModel.user_id, AttendanceModel.student_id, DonationModel.month)
+        return [column.key for column in statement.c], stream_rows(statement, chunk_size)
+
+    @staticmethod
+    def get_donation_matrix_rows(year: int) -> List[Tuple]:
+        """
+        donation count, paid count and amounts per donator and month of year in one grouped query
+        :param year:
+        :return: list of (user_id, display_name, month, donation_count, paid_count, mmk_amount, jpy_amount)
+                 ordered by donator
+        """
+        try:
+            return db.session.query(
+                DonationModel.user_id, UserModel.display_name, DonationModel.month, func.count(),
+                func.count(DonationModel.paid_at),
+                func.coalesce(func.sum(DonationModel.mmk_amount), 0),
+                func.coalesce(func.sum(DonationModel.jpy_amount), 0)
+            ).join(UserModel, DonationModel.user_id == UserModel.id).filter(DonationModel.year == year). \
+                group_by(DonationModel.user_id, UserModel.display_name, DonationModel.month). \
+                order_by(UserModel.display_name, DonationModel.user_id).all()
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def _student_gaps_query(year: int, month: str) -> Query:
+        """
+        active students attending in year without donation for month, anti-join on
+        ix_donations_attendance_year_month so cost does not grow with donations of other years
+        :param year:
+        :param month:
+        :return: query ordered by attendance id
+        """
+        donated = exists().where(and_(DonationModel.attendance_id == AttendanceModel.id,
+                                      DonationModel.year == year, DonationModel.month == month))
+        return db.session.query(
+            AttendanceModel.id.label("attendance_id"), AttendanceModel.student_id,
+            StudentModel.name.label("student_name"), AttendanceModel.school_id,
+            SchoolModel.name.label("school_name"), AttendanceModel.grade
+        ).join(StudentModel, AttendanceModel.student_id == StudentModel.id). \
+            join(SchoolModel, AttendanceModel.school_id == SchoolModel.id). \
+            filter(AttendanceModel.year == year, StudentModel.deactivated_at.is_(None), ~donated). \
+            order_by(AttendanceModel.id)
+
+    @staticmethod
+    def _lapsed_donators_query(year: int, month: str) -> Query:
+        """
+        donators with donation in previous month and none in month, semi-join and anti-join on
+        ix_donations_user_year_month
+        :param year:
+        :param month:
+        :return: query ordered by user id
+        """
+        months = DonationModel.month.type.enums
+        previous_year, previous_month = (year - 1, months[-1]) if month == months[0] else \
+            (year, months[months.index(month) - 1])
+        donated = exists().where(and_(DonationModel.user_id == UserModel.id,
+                                      DonationModel.year == year, DonationModel.month == month))
+        donated_before = exists().where(and_(DonationModel.user_id == UserModel.id,
+                                             DonationModel.year == previous_year,
+                                             DonationModel.month == previous_month))
+        return db.session.query(
+            UserModel.id.label("user_id"), UserModel.display_name, UserModel.email, UserModel.country
+        ).filter(donated_before, ~donated).order_by(UserModel.id)
+
+    @staticmethod
+    def _gaps_query(kind: str, year: int, month: str) -> Query:
+        if kind == "students":
+            return DonationModel._student_gaps_query(year, month)
+        return DonationModel._lapsed_donators_query(year, month)
+
+    @staticmethod
+    def get_gaps(kind: str, year: int, month: str, page: int = 1, per_page: int = 20) -> Pagination:
+        """
+        page of students without donation or lapsed donators
+        :param kind: students or donators
+        :param year:
+        :param month:
+        :param page:
+        :param per_page:
+        :return: Pagination of keyed rows
+        """
+        try:
+            return DonationModel._gaps_query(kind, year, month).paginate(page=page, per_page=per_page,
+                                                                          error_out=False)
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def get_gaps_export(kind: str, year: int, month: str,
+                        chunk_size: int = 1000) -> Tuple[List[str], Iterator[List]]:
+        """
+        students without donation or lapsed donators for export, streamed by server side cursor
+        :param kind: students or donators
+        :param year:
+        :param month:
+        :param chunk_size: rows per chunk
+        :return: column names and lazy iterator of row chunks
+        """
+        statement = DonationModel._gaps_query(kind, year, month).statement
+        return [column.key for column in statement.c], stream_rows(statement, chunk_size)
+
+    @staticmethod
+    def get_analytics_rows(after_id: int = 0, chunk_size: int = 10000) -> Tuple[List[str], Iterator[List]]:
+        """
+        donation rows joined with donator country, role and attendance school, grade for analytics snapshot
+        :param after_id: only donations with larger id, for incremental append
+        :param chunk_size: rows per chunk
+        :return: column names and lazy iterator of row chunks ordered by id
+        """
+        statement = select([
+            DonationModel.id, DonationModel.year, DonationModel.month, DonationModel.mmk_amount,
+            DonationModel.jpy_amount, DonationModel.paid_at.isnot(None).label("paid"),
+            UserModel.country, UserModel.role, AttendanceModel.school_id, AttendanceModel.grade
+        ]).select_from(
+            DonationModel.__table__.join(UserModel.__table__, DonationModel.user_id == UserModel.id).
+            join(AttendanceModel.__table__, DonationModel.attendance_id == AttendanceModel.id)
+        ).where(DonationModel.id > after_id).order_by(DonationModel.id)
+        return [column.key for column in statement.c], stream_rows(statement, chunk_size)
+
+    @staticmethod
+    def get_monthly_history(since_year: int) -> List[Tuple]:
+        """
+        paid donation totals per month for forecast, jpy donations (jpy_amount > 0) are summed separately
+        :param since_year: first year of history
+        :return: list of (year, month, mmk_amount, jpy_amount, jpy_donation_mmk_amount, donators, students)
+        """
+        paid_in_jpy = DonationModel.jpy_amount > 0
+        try:
+            return db.session.query(
+                DonationModel.year, DonationModel.month,
+                func.coalesce(func.sum(DonationModel.mmk_amount), 0),
+                func.coalesce(func.sum(DonationModel.jpy_amount), 0),
+                func.coalesce(func.sum(case([(paid_in_jpy, DonationModel.mmk_amount)], else_=0)), 0),
+                func.count(func.distinct(DonationModel.user_id)),
+                func.count(func.distinct(AttendanceModel.student_id))
+            ).join(AttendanceModel, DonationModel.attendance_id == AttendanceModel.id). \
+                filter(DonationModel.year >= since_year, DonationModel.paid_at.isnot(None)). \
+                group_by(DonationModel.year, DonationModel.month).all()
         except SQLAlchemyError as error:
             raise error
 
     @staticmethod
-    def get_donation_by_id(donation_id: int) -> DonationModel:
+    def get_donator_months(since_year: int) -> List[Tuple[int, int, str]]:
+        """
+        distinct (user_id, year, month) of paid donations for donator lapse rate
+        :param since_year: first year of history
+        :return: list of (user_id, year, month)
+        """
+        try:
+            return db.session.query(DonationModel.user_id, DonationModel.year, DonationModel.month). \
+                filter(DonationModel.year >= since_year, DonationModel.paid_at.isnot(None)).distinct().all()
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def recompute_mmk_amounts(year: int, month: str, rate: float) -> Tuple[int, float, float]:
+        """
+        set mmk_amount = jpy_amount * rate of JPY donations of month in one UPDATE, caller commits
+        :param year:
+        :param month:
+        :param rate: JPY to MMK rate
+        :return: updated count, mmk total before and after
+        """
+        table = DonationModel.__table__
+        before = select([table.c.id, table.c.mmk_amount.label("mmk_amount")]). \
+            where(and_(table.c.year == year, table.c.month == month, table.c.jpy_amount > 0)).alias("before")
+        updated = table.update().where(table.c.id == before.c.id). \
+            values(mmk_amount=func.round(table.c.jpy_amount * rate)). \
+            returning(before.c.mmk_amount.label("before"), table.c.mmk_amount.label("after")).cte("updated")
+        return db.session.execute(select([func.count(), func.coalesce(func.sum(updated.c.before), 0),
+                                          func.coalesce(func.sum(updated.c.after), 0)])).first()
+
+    @staticmethod
+    def get_donation_by_id(donation_id: int, columns: List[str] = None, expand: List[str] = None) -> DonationModel:
         """
         get all donation records
         :param donation_id
+        :param columns: donation columns to load
+        :param expand: nested user and/or student to join
         :return: donation list
         """
         try:
-            return db.session.query(DonationModel, UserModel, StudentModel). \
-                filter(DonationModel.user_id == UserModel.id). \
-                filter(DonationModel.attendance_id == AttendanceModel.id). \
-                filter(AttendanceModel.id == StudentModel.id). \
-                filter(DonationModel.id == donation_id).first()
+            return DonationModel._query_with_expand(columns, expand, [DonationModel.id == donation_id]).first()
         except SQLAlchemyError as error:
             raise error
 
@@ -121,6 +399,108 @@ class DonationModel(db.Model):
             db.session.rollback()
             raise error
 
+    @staticmethod
+    def delete_donations_by_user_id(user_id: int, chunk_size: int) -> int:
+        """
+        delete donations of user in chunks, each chunk is committed separately
+        to keep row locks short for donators with long donation history
+        :param user_id:
+        :param chunk_size:
+        :return: deleted donation count
+        """
+        try:
+            deleted_count = 0
+            while True:
+                chunk = db.session.query(DonationModel.id).filter(DonationModel.user_id == user_id).\
+                    limit(chunk_size).subquery()
+                count = db.session.query(DonationModel).filter(DonationModel.id.in_(chunk)).\
+                    delete(synchronize_session=False)
+                db.session.commit()
+                deleted_count += count
+                if count < chunk_size:
+                    return deleted_count
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            raise error
+
+    @staticmethod
+    def bulk_update_donations(criterion: List, values: Dict[str, Any]) -> List[int]:
+        """
+        update donations matched by criterion in one UPDATE ... RETURNING statement
+        attendances is added to UPDATE ... FROM when criterion has attendance filter
+        :param criterion: filter conditions from DONATION_QUERY_FILTER or id list
+        :param values: paid_at and/or transfer_id
+        :return: updated donation ids
+        """
+        try:
+            if any(AttendanceModel.__table__ in find_tables(condition, check_columns=True) for condition in criterion):
+                criterion = criterion + [DonationModel.attendance_id == AttendanceModel.id]
+            result = db.session.execute(DonationModel.__table__.update().where(and_(*criterion)).
+                                        values(**values).returning(DonationModel.id))
+            donation_ids = [row.id for row in result]
+            db.session.commit()
+            return donation_ids
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            raise error
+
+    @staticmethod
+    def unallocated_criterion() -> List:
+        """
+        filter conditions for paid donations which are not allocated to transfer
+        transfer_id is set to NULL when transfer is deleted, so the anti-join to transfers is
+        transfer_id IS NULL and it is served by partial index ix_donations_unallocated
+        :return: filter conditions list
+        """
+        return [DonationModel.paid_at.isnot(None), DonationModel.transfer_id.is_(None)]
+
+    @staticmethod
+    def get_unallocated_totals(criterion: List) -> Tuple[float, float]:
+        """
+        get total mmk and jpy amount of unallocated donations
+        :param criterion: year and month filter conditions
+        :return: total mmk, total jpy
+        """
+        try:
+            return db.session.query(func.coalesce(func.sum(DonationModel.mmk_amount), 0),
+                                    func.coalesce(func.sum(DonationModel.jpy_amount), 0)). \
+                filter(*DonationModel.unallocated_criterion(), *criterion).one()
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def allocate_to_transfer(transfer: TransferModel) -> Tuple[int, float, float]:
+        """
+        assign paid, unallocated donations of transfer year and month to transfer and
+        recompute transfer total_mmk and total_jpy in one statement
+        :param transfer:
+        :return: allocated donation count, transfer total mmk, transfer total jpy
+        """
+        try:
+            allocated = DonationModel.__table__.update(). \
+                where(and_(DonationModel.year == transfer.year, DonationModel.month == transfer.month,
+                           *DonationModel.unallocated_criterion())). \
+                values(transfer_id=transfer.id). \
+                returning(DonationModel.mmk_amount, DonationModel.jpy_amount).cte("allocated")
+
+            # rows updated in the CTE are not visible to the outer statement, so already
+            # allocated and newly allocated amounts are summed separately
+            def transfer_total(column_name: str):
+                return select([func.coalesce(func.sum(DonationModel.__table__.c[column_name]), 0)]). \
+                    where(DonationModel.transfer_id == transfer.id).as_scalar() + \
+                    select([func.coalesce(func.sum(allocated.c[column_name]), 0)]).as_scalar()
+
+            allocated_count = select([func.count()]).select_from(allocated).as_scalar().label("allocated_count")
+            result = db.session.execute(
+                TransferModel.__table__.update().where(TransferModel.id == transfer.id).
+                values(total_mmk=transfer_total("mmk_amount"), total_jpy=transfer_total("jpy_amount")).
+                returning(allocated_count, TransferModel.total_mmk, TransferModel.total_jpy)).first()
+            db.session.commit()
+            return result.allocated_count, result.total_mmk, result.total_jpy
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            raise error
+
     @staticmethod
     def update_donation(donation_id: int, donation: DonationModel) -> bool:
         """
@@ -146,3 +526,65 @@ class DonationModel(db.Model):
         except SQLAlchemyError as error:
             db.session.rollback()
             raise error
+
+
+year_partitioned(DonationModel.__table__, DonationModel)
+event.listen(DonationModel.__table__, "after_create", DDL("""
+CREATE OR REPLACE FUNCTION donations_check_attendance() RETURNS trigger AS $$
+BEGIN
+    PERFORM 1 FROM attendances WHERE id = NEW.attendance_id FOR KEY SHARE;
+    IF NOT FOUND THEN
+        RAISE foreign_key_violation USING MESSAGE = format('attendance %%s of donation %%s does not exist',
+                                                             NEW.attendance_id, NEW.id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+CREATE TRIGGER donations_check_attendance AFTER INSERT OR UPDATE OF attendance_id ON donations
+    FOR EACH ROW EXECUTE PROCEDURE donations_check_attendance();
+"""))
+
+
+def _donation_status_condition(statuses: List[str]):
+    """
+    filter condition for donation status, paid when paid_at is set else pending
+    :param statuses: paid and/or pending
+    :return: filter condition
+    """
+    if not statuses or not set(statuses) <= {"paid", "pending"}:
+        raise ValidateFail("Donation status should be paid or pending")
+    if set(statuses) == {"paid", "pending"}:
+        return true()
+    return DonationModel.paid_at.isnot(None) if statuses[0] == "paid" else DonationModel.paid_at.is_(None)
+
+
+DONATION_QUERY_FILTER = QueryFilter(
+    filters={
+        "user_id": DonationModel.user_id,
+        "attendance_id": DonationModel.attendance_id,
+        "transfer_id": DonationModel.transfer_id,
+        "school_id": AttendanceModel.school_id,
+        "student_id": AttendanceModel.student_id,
+        "year": DonationModel.year,
+        "month": DonationModel.month,
+        "status": _donation_status_condition
+    },
+    sorts={
+        "id": DonationModel.id,
+        "user_id": DonationModel.user_id,
+        "attendance_id": DonationModel.attendance_id,
+        "transfer_id": DonationModel.transfer_id,
+        "year": DonationModel.year,
+        "month": DonationModel.month
+    })
+
+DONATION_FIELD_SELECTOR = FieldSelector(
+    fields={
+        "id": ("id",),
+        "year": ("year",),
+        "month": ("month",),
+        "mmk_amount": ("mmk_amount",),
+        "jpy_amount": ("jpy_amount",),
+        "status": ("paid_at",)
+    },
+    expands=("user", "student"))
@@ -0,0 +1,162 @@
+"""exchange rate model class, JPY to MMK rate per month and audit trail of MMK recomputation"""
+from __future__ import annotations
+
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import db
+from models.donation import DonationModel
+from models.extrafund import ExtraFundsModel
+from models.transfer import TransferModel
+
+MONTH_ENUM = db.Enum("january", "february", "march", "april", "may", "june",
+                     "july", "august", "september", "october", "november", "december", name="exchange_rate_month")
+
+
+class ExchangeRateModel(db.Model):
+    __tablename__ = "exchange_rates"
+    __table_args__ = (db.UniqueConstraint("year", "month", name="uq_exchange_rates_year_month"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(MONTH_ENUM, nullable=False)
+    jpy_to_mmk = db.Column(db.Float(), nullable=False)
+    transfer_id = db.Column(db.Integer, db.ForeignKey("transfers.id", ondelete="SET NULL"), nullable=True)
+    updated_at = db.Column(db.DateTime(), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<ExchangeRate {self.year} {self.month}: {self.jpy_to_mmk}>"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return object data in easily serializable format
+        """
+        return {
+            "id": self.id,
+            "year": self.year,
+            "month": self.month,
+            "jpy_to_mmk": self.jpy_to_mmk,
+            "transfer_id": self.transfer_id,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    @staticmethod
+    def get_exchange_rates(year: int = None) -> List[ExchangeRateModel]:
+        """
+        get exchange rates ordered by year and month
+        :param year: year filter
+        :return: exchange rate list
+        """
+        try:
+            query = db.session.query(ExchangeRateModel)
+            if year:
+                query = query.filter(ExchangeRateModel.year == year)
+            return query.order_by(ExchangeRateModel.year, ExchangeRateModel.month).all()
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def set_rates(rates: List[Tuple[int, str, float, Optional[int]]], user_id: Optional[int]) -> List[Dict[str, Any]]:
+        """
+        upsert rates and recompute MMK amounts of changed months in one transaction,
+        one set based UPDATE per month for donations, transfers and extra funds, and one audit row per month
+        :param rates: list of (year, month, jpy_to_mmk, transfer_id)
+        :param user_id: user who changes rates
+        :return: audit rows of changed months
+        """
+        try:
+            changes = []
+            for year, month, rate, transfer_id in rates:
+                current = db.session.query(ExchangeRateModel).filter(
+                    ExchangeRateModel.year == year, ExchangeRateModel.month == month).with_for_update().first()
+                old_rate = current.jpy_to_mmk if current else None
+                db.session.execute(insert(ExchangeRateModel.__table__).values(
+                    year=year, month=month, jpy_to_mmk=rate, transfer_id=transfer_id, updated_at=func.now()
+                ).on_conflict_do_update(constraint="uq_exchange_rates_year_month", set_={
+                    "jpy_to_mmk": rate,
+                    "transfer_id": func.coalesce(transfer_id, ExchangeRateModel.__table__.c.transfer_id),
+                    "updated_at": func.now()
+                }))
+                if old_rate == rate:
+                    continue
+                donation_count, donation_before, donation_after = DonationModel.recompute_mmk_amounts(year, month, rate)
+                extra_fund_count, extra_fund_before, extra_fund_after = \
+                    ExtraFundsModel.recompute_mmk_amounts(year, month, rate)
+                change = ExchangeRateChangeModel(
+                    year=year, month=month, old_rate=old_rate, new_rate=rate, user_id=user_id,
+                    donation_count=donation_count, donation_mmk_before=donation_before,
+                    donation_mmk_after=donation_after,
+                    transfer_count=TransferModel.recompute_total_mmk(year, month, rate),
+                    extra_fund_count=extra_fund_count, extra_fund_mmk_before=extra_fund_before,
+                    extra_fund_mmk_after=extra_fund_after)
+                db.session.add(change)
+                changes.append(change)
+            db.session.commit()
+            return [change.as_dict() for change in changes]
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            raise error
+
+
+class ExchangeRateChangeModel(db.Model):
+    """
+    append only audit trail of rate changes and recomputed MMK totals
+    """
+    __tablename__ = "exchange_rate_changes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False, index=True)
+    month = db.Column(MONTH_ENUM, nullable=False)
+    old_rate = db.Column(db.Float(), nullable=True)
+    new_rate = db.Column(db.Float(), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    donation_count = db.Column(db.Integer, nullable=False, default=0)
+    donation_mmk_before = db.Column(db.Float(), nullable=False, default=0)
+    donation_mmk_after = db.Column(db.Float(), nullable=False, default=0)
+    transfer_count = db.Column(db.Integer, nullable=False, default=0)
+    extra_fund_count = db.Column(db.Integer, nullable=False, default=0)
+    extra_fund_mmk_before = db.Column(db.Float(), nullable=False, default=0)
+    extra_fund_mmk_after = db.Column(db.Float(), nullable=False, default=0)
+    changed_at = db.Column(db.DateTime(), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<ExchangeRateChange {self.year} {self.month}: {self.old_rate} -> {self.new_rate}>"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return object data in easily serializable format
+        """
+        return {
+            "id": self.id,
+            "year": self.year,
+            "month": self.month,
+            "old_rate": self.old_rate,
+            "new_rate": self.new_rate,
+            "user_id": self.user_id,
+            "donation_count": self.donation_count,
+            "donation_mmk_before": self.donation_mmk_before,
+            "donation_mmk_after": self.donation_mmk_after,
+            "transfer_count": self.transfer_count,
+            "extra_fund_count": self.extra_fund_count,
+            "extra_fund_mmk_before": self.extra_fund_mmk_before,
+            "extra_fund_mmk_after": self.extra_fund_mmk_after,
+            "changed_at": self.changed_at.isoformat() if self.changed_at else None
+        }
+
+    @staticmethod
+    def get_changes(year: int = None) -> List[ExchangeRateChangeModel]:
+        """
+        get rate changes, newest first
+        :param year: year filter
+        :return: change list
+        """
+        try:
+            query = db.session.query(ExchangeRateChangeModel)
+            if year:
+                query = query.filter(ExchangeRateChangeModel.year == year)
+            return query.order_by(ExchangeRateChangeModel.id.desc()).all()
+        except SQLAlchemyError as error:
+            raise error
@@ -1,9 +1,10 @@
 """extra funds model class, include migrate and CRUD actions"""
 from __future__ import annotations
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from flask_sqlalchemy import Pagination
+from sqlalchemy import and_, func, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import relationship
 
@@ -17,12 +18,15 @@ class ExtraFundsModel(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     mmk_amount = db.Column(db.Float())
-    transfer_id = db.Column(db.Integer, db.ForeignKey("transfers.id"), nullable=False)
+    jpy_amount = db.Column(db.Float(), nullable=True)
+    transfer_id = db.Column(db.Integer, db.ForeignKey("transfers.id", ondelete="CASCADE"), nullable=False,
+                            index=True)
     transfer = relationship("TransferModel", foreign_keys=[transfer_id])
 
-    def __init__(self, mmk_amount: float, transfer_id: int) -> None:
+    def __init__(self, mmk_amount: float, transfer_id: int, jpy_amount: float = None) -> None:
         self.mmk_amount = mmk_amount
         self.transfer_id = transfer_id
+        self.jpy_amount = jpy_amount
 
     def __repr__(self):
         return f"<Extra fund record for {self.mmk_amount}>"
@@ -34,6 +38,7 @@ class ExtraFundsModel(db.Model):
         return {
             "id": self.id,
             "mmk_amount": self.mmk_amount,
+            "jpy_amount": self.jpy_amount,
             "transfer": self.transfer.as_dict()
         }
 
@@ -80,6 +85,7 @@ class ExtraFundsModel(db.Model):
             if not target_extra_fund:
                 raise SQLCustomError("No record for requested extra fund")
             target_extra_fund.mmk_amount = extra_funds.mmk_amount
+            target_extra_fund.jpy_amount = extra_funds.jpy_amount
             target_extra_fund.transfer_id = extra_funds.transfer_id
             db.session.commit()
             return True
@@ -115,16 +121,65 @@ class ExtraFundsModel(db.Model):
             db.session.rollback()
             raise error
 
+    @staticmethod
+    def get_extra_fund_total(transfer_id: int) -> float:
+        """
+        get total extra fund mmk amount of transfer
+        :param transfer_id:
+        :return: total mmk amount
+        """
+        try:
+            return db.session.query(func.coalesce(func.sum(ExtraFundsModel.mmk_amount), 0)). \
+                filter(ExtraFundsModel.transfer_id == transfer_id).scalar()
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def get_monthly_history(since_year: int) -> List[Tuple[int, str, float]]:
+        """
+        extra fund mmk totals per transfer month for forecast
+        :param since_year: first year of history
+        :return: list of (year, month, mmk_amount)
+        """
+        try:
+            return db.session.query(TransferModel.year, TransferModel.month,
+                                    func.coalesce(func.sum(ExtraFundsModel.mmk_amount), 0)). \
+                join(TransferModel, ExtraFundsModel.transfer_id == TransferModel.id). \
+                filter(TransferModel.year >= since_year).group_by(TransferModel.year, TransferModel.month).all()
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def recompute_mmk_amounts(year: int, month: str, rate: float) -> Tuple[int, float, float]:
+        """
+        set mmk_amount = jpy_amount * rate of extra funds with jpy_amount for transfers of month in one UPDATE,
+        caller commits
+        :param year:
+        :param month:
+        :param rate: JPY to MMK rate
+        :return: updated count, mmk total before and after
+        """
+        table = ExtraFundsModel.__table__
+        before = select([table.c.id, table.c.mmk_amount.label("mmk_amount")]). \
+            select_from(table.join(TransferModel.__table__, table.c.transfer_id == TransferModel.id)). \
+            where(and_(TransferModel.year == year, TransferModel.month == month,
+                       table.c.jpy_amount.isnot(None))).alias("before")
+        updated = table.update().where(table.c.id == before.c.id). \
+            values(mmk_amount=func.round(table.c.jpy_amount * rate)). \
+            returning(before.c.mmk_amount.label("before"), table.c.mmk_amount.label("after")).cte("updated")
+        return db.session.execute(select([func.count(), func.coalesce(func.sum(updated.c.before), 0),
+                                          func.coalesce(func.sum(updated.c.after), 0)])).first()
+
     @staticmethod
     def get_new_transfers() -> List[TransferModel]:
         """
         get all Transfer records which do not have extra fund ids
-        :param: int
+        anti-join on indexed extrafunds.transfer_id
         :return: Transfer list
         """
         try:
-            subquery = db.session.query(ExtraFundsModel.transfer_id)
-            query = db.session.query(TransferModel)
-            return query.filter(TransferModel.id.notin_(subquery))
+            return db.session.query(TransferModel). \
+                outerjoin(ExtraFundsModel, ExtraFundsModel.transfer_id == TransferModel.id). \
+                filter(ExtraFundsModel.id.is_(None)).order_by(TransferModel.id).all()
         except SQLAlchemyError as error:
             raise error
@@ -0,0 +1,88 @@
+"""
+year partitioning of attendances and donations
+both tables are partitioned by RANGE (year) with one partition per year and a default partition,
+so queries filtered by year only scan partitions of that year
+"""
+from datetime import date
+from typing import Iterable
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import Table
+
+from database import db
+
+YEAR_PARTITIONED_TABLES = ("attendances", "donations")
+# set local while rows are moved out of default partition, delete triggers skip the move
+MOVING_PARTITION_SETTING = "thingaha.moving_partition"
+
+# (table, year) partitions known to exist in this process
+_created_partitions = set()
+
+
+def year_partitioned(table: Table, mapped_class) -> None:
+    """
+    add default partition after create_all and create yearly partition before first insert of a year
+    :param table: table with postgresql_partition_by RANGE (year)
+    :param mapped_class: model class of table
+    """
+    event.listen(table, "after_create", DDL("CREATE TABLE %(table)s_default PARTITION OF %(table)s DEFAULT"))
+
+    @event.listens_for(table, "after_create")
+    def forget_partitions(target, connection, **kwargs):
+        _created_partitions.difference_update({key for key in _created_partitions if key[0] == table.name})
+
+    @event.listens_for(mapped_class, "before_insert")
+    def ensure_partition(mapper, connection, target):
+        if target.year is not None and (table.name, int(target.year)) not in _created_partitions:
+            create_year_partition(connection, table.name, int(target.year))
+
+
+def create_year_partition(connection: Connection, table_name: str, year: int) -> bool:
+    """
+    create partition of year if missing, rows of year already in default partition are moved to it
+    runs on caller connection, partition is created when caller commits
+    :param connection:
+    :param table_name: attendances or donations
+    :param year:
+    :return: True if partition was created
+    """
+    partition = "{}_y{}".format(table_name, year)
+    # creators of same partition in other sessions wait here until first one commits
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), name=partition)
+    exists = connection.execute(text(
+        "SELECT to_regclass(:partition) IS NOT NULL OR "
+        "NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        partition=partition, table=table_name).scalar()
+    if exists:
+        _created_partitions.add((table_name, year))
+        return False
+    connection.execute(text("SELECT set_config(:name, 'on', true)"), name=MOVING_PARTITION_SETTING)
+    connection.execute(text(
+        "CREATE TEMPORARY TABLE {partition}_moved ON COMMIT DROP AS "
+        "WITH moved AS (DELETE FROM {table}_default WHERE year = :year RETURNING *) SELECT * FROM moved".format(
+            partition=partition, table=table_name)), year=year)
+    connection.execute(text("CREATE TABLE {partition} PARTITION OF {table} FOR VALUES FROM ({year}) TO ({next})".
+                            format(partition=partition, table=table_name, year=year, next=year + 1)))
+    connection.execute(text("INSERT INTO {table} SELECT * FROM {partition}_moved; DROP TABLE {partition}_moved".
+                            format(partition=partition, table=table_name)))
+    connection.execute(text("SELECT set_config(:name, 'off', true)"), name=MOVING_PARTITION_SETTING)
+    _created_partitions.add((table_name, year))
+    return True
+
+
+def ensure_year_partitions(years: Iterable[int] = None) -> None:
+    """
+    create partitions of current and next year (or years) for all year partitioned tables in own transaction,
+    called before first request so inserts of a new year do not wait for partition DDL
+    :param years: years, current and next year if None
+    """
+    today = date.today()
+    try:
+        with db.engine.begin() as connection:
+            for table_name in YEAR_PARTITIONED_TABLES:
+                for year in years or (today.year, today.year + 1):
+                    create_year_partition(connection, table_name, year)
+    except SQLAlchemyError as error:
+        raise error
@@ -0,0 +1,46 @@
+"""rate limit bucket model class, shared token buckets for all app processes"""
+from __future__ import annotations
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import db
+
+
+class RateLimitBucketModel(db.Model):
+    __tablename__ = "rate_limit_buckets"
+
+    key = db.Column(db.String(), primary_key=True)
+    tokens = db.Column(db.Float(), nullable=False)
+    allowed = db.Column(db.Boolean(), nullable=False, default=True)
+    updated_at = db.Column(db.DateTime(), nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<RateLimitBucket {self.key}>"
+
+    @staticmethod
+    def consume(key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """
+        refill bucket by elapsed time and take cost tokens in one upsert statement
+        runs on own connection so request session transaction is not committed
+        :param key:
+        :param rate: refill tokens per second
+        :param capacity: max tokens
+        :param cost:
+        :return: 0 if allowed else seconds to wait
+        """
+        table = RateLimitBucketModel.__table__
+        refill = func.least(capacity, table.c.tokens + func.extract("epoch", func.now() - table.c.updated_at) * rate)
+        statement = insert(table).values(key=key, tokens=capacity - cost, allowed=True, updated_at=func.now())
+        statement = statement.on_conflict_do_update(index_elements=[table.c.key], set_={
+            "tokens": case([(refill >= cost, refill - cost)], else_=refill),
+            "allowed": refill >= cost,
+            "updated_at": func.now()
+        }).returning(table.c.tokens, table.c.allowed)
+        try:
+            with db.engine.begin() as connection:
+                bucket = connection.execute(statement).first()
+            return 0.0 if bucket.allowed else (cost - bucket.tokens) / rate
+        except SQLAlchemyError as error:
+            raise error
@@ -0,0 +1,98 @@
+"""division, district and township reference models, rows are generated from division.json"""
+from __future__ import annotations
+
+from typing import Dict, Any
+
+from sqlalchemy import event
+
+from common.mm_division import get_division_index
+from database import db
+
+
+class DivisionModel(db.Model):
+    """
+    division reference table
+    """
+    __tablename__ = "divisions"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.UnicodeText(), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"<Division {self.name}>"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return object data in easily serializable format
+        """
+        return {
+            "id": self.id,
+            "name": self.name
+        }
+
+
+class DistrictModel(db.Model):
+    """
+    district reference table
+    """
+    __tablename__ = "districts"
+    __table_args__ = (db.UniqueConstraint("division_id", "name"),)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.UnicodeText(), nullable=False)
+    division_id = db.Column(db.Integer, db.ForeignKey("divisions.id"), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<District {self.name}>"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return object data in easily serializable format
+        """
+        return {
+            "id": self.id,
+            "name": self.name,
+            "division_id": self.division_id
+        }
+
+
+class TownshipModel(db.Model):
+    """
+    township reference table
+    """
+    __tablename__ = "townships"
+    __table_args__ = (db.UniqueConstraint("district_id", "name"),)
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.UnicodeText(), nullable=False)
+    district_id = db.Column(db.Integer, db.ForeignKey("districts.id"), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<Township {self.name}>"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return object data in easily serializable format
+        """
+        return {
+            "id": self.id,
+            "name": self.name,
+            "district_id": self.district_id
+        }
+
+
+def _insert_reference_rows(rows_name: str):
+    """
+    return after_create listener which fills reference table from division index
+    :param rows_name: divisions, districts or townships
+    """
+    def insert_rows(target, connection, **kwargs):
+        rows = getattr(get_division_index(), rows_name)
+        if rows:
+            connection.execute(target.insert(), rows)
+    return insert_rows
+
+
+event.listen(DivisionModel.__table__, "after_create", _insert_reference_rows("divisions"))
+event.listen(DistrictModel.__table__, "after_create", _insert_reference_rows("districts"))
+event.listen(TownshipModel.__table__, "after_create", _insert_reference_rows("townships"))
@@ -6,7 +6,7 @@ from typing import Dict, Any, Tuple, List
 from flask_sqlalchemy import Pagination
 from sqlalchemy import or_
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, contains_eager
 
 from common.error import SQLCustomError
 from database import db
@@ -22,7 +22,7 @@ class SchoolModel(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(), nullable=False)
     contact_info = db.Column(db.String(), nullable=False)
-    address_id = db.Column(db.Integer, db.ForeignKey("addresses.id"), nullable=False)
+    address_id = db.Column(db.Integer, db.ForeignKey("addresses.id"), nullable=False, index=True)
     address = relationship("AddressModel", foreign_keys=[address_id])
 
     def __init__(self, name: str, contact_info: str, address_id: int) -> None:
@@ -66,14 +66,16 @@ class SchoolModel(db.Model):
             raise error
 
     @staticmethod
-    def get_all_schools(page: int = 1, per_page: int = 20) -> Pagination:
+    def get_all_schools(page: int = 1, per_page: int = 20, region: Dict[str, int] = None) -> Pagination:
         """
         get all school records
         :params page: int
+        :params region: division_id, district_id, township_id filter
         :return: school Pagination iterator
         """
         try:
-            return db.session.query(SchoolModel).join(AddressModel).paginate(page=page, per_page=per_page, error_out=False)
+            return db.session.query(SchoolModel).join(AddressModel).filter(
+                *AddressModel.region_filter(region)).paginate(page=page, per_page=per_page, error_out=False)
         except SQLAlchemyError as error:
             raise error
 
@@ -88,20 +90,30 @@ class SchoolModel(db.Model):
         except SQLAlchemyError as error:
             raise error
 
+    @staticmethod
+    def get_schools_by_ids(school_ids: List[int]) -> List[SchoolModel]:
+        """
+        get schools with address by ids in one IN query
+        :param school_ids:
+        :return: school list
+        """
+        try:
+            return db.session.query(SchoolModel).join(AddressModel).options(contains_eager(SchoolModel.address)). \
+                filter(SchoolModel.id.in_(school_ids)).all()
+        except SQLAlchemyError as error:
+            raise error
+
     @staticmethod
     def delete_school_by_id(school_id: int) -> bool:
         """
-        delete school by id
+        delete school with address, attendances and donations by id
         :param school_id:
         :return:
         """
         try:
-            if not db.session.query(SchoolModel).filter(SchoolModel.id == school_id).delete():
-                return False
-            db.session.commit()
-            return True
+            return AddressModel.delete_address_with_owner(
+                SchoolModel.__table__.delete().where(SchoolModel.id == school_id).returning(SchoolModel.__table__.c.address_id))
         except SQLAlchemyError as error:
-            db.session.rollback()
             raise error
 
     @staticmethod
@@ -143,15 +155,3 @@ class SchoolModel(db.Model):
                 error_out=False)
         except SQLAlchemyError as error:
             raise error
-
-    @staticmethod
-    def get_schools_by_address_ids(school_ids: Tuple) -> List[SchoolModel]:
-        """
-        get school info by ids
-        :param school_ids:
-        :return: schools info list
-        """
-        try:
-            return db.session.query(SchoolModel).filter(SchoolModel.address_id.in_(school_ids)).all()
-        except SQLAlchemyError as error:
-            raise error
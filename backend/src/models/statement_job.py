@@ -0,0 +1,96 @@
+"""donor statement job model class, progress of asynchronous annual statement generation"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import db
+
+
+class StatementJobModel(db.Model):
+    __tablename__ = "statement_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.Enum("pending", "running", "done", "failed", name="statement_job_status"),
+                       nullable=False, default="pending")
+    total = db.Column(db.Integer, nullable=False, default=0)
+    done = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text(), nullable=True)
+    created_at = db.Column(db.DateTime(), nullable=False, server_default=func.now())
+    finished_at = db.Column(db.DateTime(), nullable=True)
+
+    def __init__(self, year: int) -> None:
+        self.year = year
+        self.status = "pending"
+        self.total = 0
+        self.done = 0
+
+    def __repr__(self):
+        return f"<StatementJob {self.id} for {self.year}>"
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return object data in easily serializable format
+        """
+        return {
+            "id": self.id,
+            "year": self.year,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "progress": round(self.done / self.total, 4) if self.total else (1.0 if self.status == "done" else 0.0),
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    @staticmethod
+    def create_job(new_job: StatementJobModel) -> int:
+        """
+        create new statement job
+        :param new_job:
+        :return: job id
+        """
+        try:
+            db.session.add(new_job)
+            db.session.commit()
+            return new_job.id
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            raise error
+
+    @staticmethod
+    def get_job_by_id(job_id: int) -> Optional[StatementJobModel]:
+        """
+        get statement job by id
+        :param job_id:
+        :return: job or None
+        """
+        try:
+            return db.session.query(StatementJobModel).get(job_id)
+        except SQLAlchemyError as error:
+            raise error
+
+    @staticmethod
+    def update_job(job_id: int, **values) -> None:
+        """
+        update job status and progress in one UPDATE, done_increment adds to done counter
+        :param job_id:
+        :param values: status, total, error, finished_at, done_increment
+        """
+        done_increment = values.pop("done_increment", 0)
+        if done_increment:
+            values["done"] = StatementJobModel.done + done_increment
+        if values.get("status") in ("done", "failed"):
+            values["finished_at"] = datetime.utcnow()
+        try:
+            db.session.query(StatementJobModel).filter(StatementJobModel.id == job_id).\
+                update(values, synchronize_session=False)
+            db.session.commit()
+        except SQLAlchemyError as error:
+            db.session.rollback()
+            raise error
@@ -2,15 +2,15 @@
 from __future__ import annotations
 
 from datetime import datetime, date
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 
 from flask_sqlalchemy import Pagination
-from sqlalchemy import or_
+from sqlalchemy import and_, or_, select, true
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, contains_eager
 
 from common.error import SQLCustomError
-from database import db
+from database import db, stream_rows
 from models.address import AddressModel
 
 
@@ -25,7 +25,7 @@ class StudentModel(db.Model):
     mother_name = db.Column(db.UnicodeText())
     parents_occupation = db.Column(db.Text())
     photo = db.Column(db.Text())
-    address_id = db.Column(db.Integer, db.ForeignKey("addresses.id"), nullable=False)
+    address_id = db.Column(db.Integer, db.ForeignKey("addresses.id"), nullable=False, index=True)
     address = relationship("AddressModel", foreign_keys=[address_id])
 
     def __init__(self, name: str,
@@ -80,31 +80,52 @@ class StudentModel(db.Model):
             raise error
 
     @staticmethod
-    def get_student_by_address_ids(addresses_ids: tuple) -> List[StudentModel]:
+    def get_students_by_ids(student_ids: List[int]) -> List[StudentModel]:
         """
-        get student by ids
-        :param addresses_ids:
-        :return: student info
+        get students with address by ids in one IN query
+        :param student_ids:
+        :return: student list
         """
         try:
-            return db.session.query(StudentModel).filter(StudentModel.address_id.in_(addresses_ids)).all()
+            return db.session.query(StudentModel).join(AddressModel).options(contains_eager(StudentModel.address)). \
+                filter(StudentModel.id.in_(student_ids)).all()
         except SQLAlchemyError as error:
             raise error
 
     @staticmethod
-    def get_all_students(page: int = 1, per_page: int = 20) -> Pagination:
+    def get_all_students(page: int = 1, per_page: int = 20, region: Dict[str, int] = None) -> Pagination:
         """
         get all students
         :param page:
         :param per_page:
+        :param region: division_id, district_id, township_id filter
         :return: students list of dict
         """
         try:
             return db.session.query(StudentModel).join(AddressModel).\
+                filter(*AddressModel.region_filter(region)).\
                 paginate(page=page, per_page=per_page, error_out=False)
         except SQLAlchemyError as error:
             raise error
 
+    @staticmethod
+    def get_students_export(region: Dict[str, int] = None,
+                            chunk_size: int = 1000) -> Tuple[List[str], Iterator[List]]:
+        """
+        flat student rows with address for export, streamed by server side cursor
+        :param region: division_id, district_id, township_id filter
+        :param chunk_size: rows per chunk
+        :return: column names and lazy iterator of row chunks
+        """
+        statement = select([
+            StudentModel.id, StudentModel.name, StudentModel.birth_date, StudentModel.deactivated_at,
+            StudentModel.father_name, StudentModel.mother_name, StudentModel.parents_occupation,
+            AddressModel.division, AddressModel.district, AddressModel.township, AddressModel.street_address
+        ]).select_from(
+            StudentModel.__table__.join(AddressModel.__table__, StudentModel.address_id == AddressModel.id)
+        ).where(and_(true(), *AddressModel.region_filter(region))).order_by(StudentModel.id)
+        return [column.key for column in statement.c], stream_rows(statement, chunk_size)
+
     @staticmethod
     def create_student(new_student: StudentModel) -> int:
         """
@@ -149,17 +170,14 @@ class StudentModel(db.Model):
     @staticmethod
     def delete_student(student_id: int) -> bool:
         """
-        delete student by id
+        delete student with address, attendances and donations by id
         :param student_id:
         :return: bool
         """
         try:
-            if not db.session.query(StudentModel).filter(StudentModel.id == student_id).delete():
-                return False
-            db.session.commit()
-            return True
+            return AddressModel.delete_address_with_owner(
+                StudentModel.__table__.delete().where(StudentModel.id == student_id).returning(StudentModel.__table__.c.address_id))
         except SQLAlchemyError as error:
-            db.session.rollback()
             raise error
 
     @staticmethod
@@ -4,6 +4,7 @@ from __future__ import annotations
 from typing import Dict, Any
 
 from flask_sqlalchemy import Pagination
+from sqlalchemy import and_, func
 from sqlalchemy.exc import SQLAlchemyError
 
 from common.error import SQLCustomError
@@ -95,6 +96,19 @@ class TransferModel(db.Model):
             db.session.rollback()
             raise error
 
+    @staticmethod
+    def recompute_total_mmk(year: int, month: str, rate: float) -> int:
+        """
+        set total_mmk = total_jpy * rate of transfers of month in one UPDATE, caller commits
+        :param year:
+        :param month:
+        :param rate: JPY to MMK rate
+        :return: updated count
+        """
+        return db.session.execute(TransferModel.__table__.update().
+                                  where(and_(TransferModel.year == year, TransferModel.month == month)).
+                                  values(total_mmk=func.round(TransferModel.total_jpy * rate))).rowcount
+
     @staticmethod
     def update_transfer(transfer_id: int, transfer: TransferModel) -> bool:
         """
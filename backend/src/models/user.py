@@ -2,15 +2,15 @@
 
 from __future__ import annotations
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator, Tuple
 
 from flask_sqlalchemy import Pagination
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_, select, true
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, contains_eager
 
 from common.error import SQLCustomError
-from database import db
+from database import db, stream_rows
 from models.address import AddressModel
 
 
@@ -27,7 +27,7 @@ class UserModel(db.Model):
     role = db.Column(db.Enum("sub_admin", "donator", "admin", name="role"))
     country = db.Column(db.String(), nullable=True)
     donation_active = db.Column(db.Boolean, default=False)
-    address_id = db.Column(db.Integer, db.ForeignKey("addresses.id"), nullable=False)
+    address_id = db.Column(db.Integer, db.ForeignKey("addresses.id"), nullable=False, index=True)
     address = relationship("AddressModel", foreign_keys=[address_id])
 
     def __init__(self, display_name: str, username: str, email: str, address_id: int, role: str, country: str,
@@ -101,17 +101,14 @@ class UserModel(db.Model):
     @staticmethod
     def delete_user(user_id: int) -> bool:
         """
-        delete user by id
+        delete user with address and donations by id
         :param user_id:
         :return: bool
         """
         try:
-            if not db.session.query(UserModel).filter(UserModel.id == user_id).delete():
-                return False
-            db.session.commit()
-            return True
+            return AddressModel.delete_address_with_owner(
+                UserModel.__table__.delete().where(UserModel.id == user_id).returning(UserModel.__table__.c.address_id))
         except SQLAlchemyError as error:
-            db.session.rollback()
             raise error
 
     @staticmethod
@@ -127,38 +124,31 @@ class UserModel(db.Model):
             raise error
 
     @staticmethod
-    def get_users_by_address_ids(address_ids: tuple) -> List[UserModel]:
+    def get_users_by_ids(user_ids: List[int]) -> List[UserModel]:
         """
-        get user by ids
-        :param address_ids:
-        :return: user infos
+        get users with address by ids in one IN query
+        :param user_ids:
+        :return: user list
         """
         try:
-            return db.session.query(UserModel).filter(UserModel.address_id.in_(address_ids)).all()
+            return db.session.query(UserModel).join(AddressModel).options(contains_eager(UserModel.address)). \
+                filter(UserModel.id.in_(user_ids)).all()
         except SQLAlchemyError as error:
             raise error
 
     @staticmethod
-    def get_user_by_email(email: str) -> UserModel:
+    def get_user_by_email_or_username(email_or_username: str) -> UserModel:
         """
-        get user by email
-        :param email:
+        get user by case insensitive email or username in one query
+        served by ix_users_lower_email and ix_users_lower_username
+        :param email_or_username:
         :return: user info
         """
         try:
-            return db.session.query(UserModel).filter(UserModel.email == email).first()
-        except SQLAlchemyError as error:
-            raise error
-
-    @staticmethod
-    def get_user_by_username(username: str) -> UserModel:
-        """
-        get user by username
-        :param username:
-        :return: user info
-        """
-        try:
-            return db.session.query(UserModel).filter(UserModel.username == username).first()
+            value = email_or_username.lower()
+            return db.session.query(UserModel). \
+                filter(or_(func.lower(UserModel.email) == value, func.lower(UserModel.username) == value)). \
+                order_by(UserModel.id).first()
         except SQLAlchemyError as error:
             raise error
 
@@ -182,63 +172,69 @@ class UserModel(db.Model):
             raise error
 
     @staticmethod
-    def get_all_users(page: int = 1, per_page: int = 20) -> Pagination:
+    def get_all_users(page: int = 1, per_page: int = 20, role: str = None, country: str = None,
+                      region: Dict[str, int] = None) -> Pagination:
         """
-        get all users
+        get all users, filter by role, country and region if given
         :page integer
         :per_page int
+        :role str
+        :country str
+        :region division_id, district_id, township_id filter
         :return: users list of dict
         """
         try:
-            return db.session.query(UserModel).join(AddressModel).paginate(page=page, per_page=per_page,
-                                                                           error_out=False)
+            criterion = UserModel._user_criterion(role, country, region)
+            return db.session.query(UserModel).join(AddressModel).filter(*criterion).paginate(page=page,
+                                                                                              per_page=per_page,
+                                                                                              error_out=False)
         except SQLAlchemyError as error:
             raise error
 
     @staticmethod
-    def get_users_by_role(page: int, role: str, per_page: int = 20) -> Pagination:
+    def _user_criterion(role: str = None, country: str = None, region: Dict[str, int] = None) -> List:
         """
-        get all users by role
-        :params integer
-        :role str
-        :per_page int
-        :return: users list of Pagination
+        filter conditions for role, country and region
+        :param role:
+        :param country:
+        :param region: division_id, district_id, township_id filter
+        :return: filter conditions list
         """
-        try:
-            return db.session.query(UserModel).join(AddressModel).filter(
-                UserModel.role == role).paginate(page=page, per_page=per_page, error_out=False)
-        except SQLAlchemyError as error:
-            raise error
+        criterion = AddressModel.region_filter(region)
+        if role:
+            criterion.append(UserModel.role == role)
+        if country:
+            criterion.append(UserModel.country == country)
+        return criterion
 
     @staticmethod
-    def get_users_by_country(page: int, country: str, per_page: int = 20) -> Pagination:
+    def get_users_export(role: str = None, country: str = None, region: Dict[str, int] = None,
+                         chunk_size: int = 1000) -> Tuple[List[str], Iterator[List]]:
         """
-        get all users by country
-        :params integer
-        :country str
-        :per_page int
-        :return: users list of dict
+        flat user rows with address for export without password hash, streamed by server side cursor
+        :param role:
+        :param country:
+        :param region: division_id, district_id, township_id filter
+        :param chunk_size: rows per chunk
+        :return: column names and lazy iterator of row chunks
         """
-        try:
-            return db.session.query(UserModel).join(AddressModel).filter(
-                UserModel.country == country).paginate(page=page, per_page=per_page, error_out=False)
-        except SQLAlchemyError as error:
-            raise error
+        statement = select([
+            UserModel.id, UserModel.display_name, UserModel.username, UserModel.email, UserModel.role,
+            UserModel.country, UserModel.donation_active,
+            AddressModel.division, AddressModel.district, AddressModel.township, AddressModel.street_address
+        ]).select_from(
+            UserModel.__table__.join(AddressModel.__table__, UserModel.address_id == AddressModel.id)
+        ).where(and_(true(), *UserModel._user_criterion(role, country, region))).order_by(UserModel.id)
+        return [column.key for column in statement.c], stream_rows(statement, chunk_size)
 
     @staticmethod
-    def get_users_by_role_country(page: int, role: str, country: str, per_page: int = 20) -> Pagination:
+    def get_donation_active_count() -> int:
         """
-        get all users by role and country
-        :params page
-        :params role
-        :country role
-        :per_page int
-        :return: user info list
+        count donators with donation_active
+        :return: donator count
         """
         try:
-            return db.session.query(UserModel).join(AddressModel).filter(
-                and_(UserModel.country == country, UserModel.role == role)).paginate(page=page, per_page=per_page,
-                                                                                     error_out=False)
+            return db.session.query(func.count(UserModel.id)).filter(UserModel.donation_active.is_(True)).scalar()
         except SQLAlchemyError as error:
             raise error
 
@@ -272,3 +268,7 @@ class UserModel(db.Model):
         except SQLAlchemyError as error:
             db.session.rollback()
             raise error
+
+
+db.Index("ix_users_lower_email", func.lower(UserModel.email))
+db.Index("ix_users_lower_username", func.lower(UserModel.username))
@@ -7,11 +7,9 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from common.data_schema import address_schema
 from common.error import RequestDataEmpty, SQLCustomError, ValidateFail, ThingahaCustomError
+from common.mm_division import get_division_index
 from models.address import AddressModel
-from service.school.school_service import SchoolService
 from service.service import Service
-from service.student.student_service import StudentService
-from service.user.user_service import UserService
 
 
 class AddressService(Service):
@@ -23,6 +21,20 @@ class AddressService(Service):
     def __init__(self, logger=None) -> None:
         super().__init__(logger)
 
+    def __resolve_region_ids(self, data: Dict[str, str]) -> Tuple[int, Optional[int], Optional[int]]:
+        """
+        resolve division, district and township ids with in-memory division index
+        division is required, district and township are kept as free text if not matched
+        :param data:
+        :return: division_id, district_id, township_id
+        """
+        division_id, district_id, township_id = get_division_index().resolve(
+            data["division"], data["district"], data["township"])
+        if division_id is None:
+            self.logger.error("Unknown division %s", data["division"])
+            raise ValidateFail("Unknown division: {}".format(data["division"]))
+        return division_id, district_id, township_id
+
     def create_address(self, data: Dict[str, str], flush: bool = False) -> int:
         """
         create new address
@@ -36,13 +48,17 @@ class AddressService(Service):
         if not self.input_validate.validate_json(data, address_schema):
             self.logger.error("All address field input must be required.")
             raise ValidateFail("Address validation fail")
+        division_id, district_id, township_id = self.__resolve_region_ids(data)
         try:
             return AddressModel.create_address(AddressModel(
                 division=data["division"],
                 district=data["district"],
                 township=data["township"],
                 street_address=data["street_address"],
-                type=data["type"]), flush=flush)
+                type=data["type"],
+                division_id=division_id,
+                district_id=district_id,
+                township_id=township_id), flush=flush)
         except SQLAlchemyError:
             self.logger.error("Address create fail. error %s",
                               traceback.format_exc())
@@ -60,6 +76,7 @@ class AddressService(Service):
         if not self.input_validate.validate_json(data, address_schema):
             self.logger.error("All address field input must be required.")
             raise ValidateFail("Address update validation fail")
+        division_id, district_id, township_id = self.__resolve_region_ids(data)
         try:
             self.logger.info("update address info by id %s", address_id)
             return AddressModel.update_address(address_id, AddressModel(
@@ -67,7 +84,10 @@ class AddressService(Service):
                 district=data["district"],
                 township=data["township"],
                 street_address=data["street_address"],
-                type=data["type"]))
+                type=data["type"],
+                division_id=division_id,
+                district_id=district_id,
+                township_id=township_id))
         except SQLAlchemyError as e:
             self.logger.error("Address update fail. id %s, error %s, custom error: %s", address_id,
                               traceback.format_exc(), e)
@@ -108,40 +128,6 @@ class AddressService(Service):
                               address_id, traceback.format_exc())
             raise SQLCustomError(description="Delete address by ID SQL ERROR")
 
-    @staticmethod
-    def __return_address_types(page: int, per_page: int, address_type: str) -> Optional[Tuple[Pagination, Dict]]:
-        """
-        return address by requested types
-        :params page
-        :params :per_page
-        """
-        if address_type not in ["school", "user", "student"]:
-            return None, None
-        else:
-            addresses = AddressModel.get_all_addresses_by_type(page, per_page, address_type)
-            address_ids = tuple([address.id for address in addresses.items])
-            if address_type == "school":
-                return addresses, {address_type: SchoolService.get_schools_by_address_ids(address_ids)}
-            if address_type == "user":
-                return addresses, {address_type: UserService.get_user_by_address_ids(address_ids)}
-            if address_type == "student":
-                return addresses, {address_type: StudentService.get_students_by_address_ids(address_ids)}
-
-    @staticmethod
-    def __get_all_address_records(addresses: Pagination) -> Dict:
-        """
-        get all address records without types
-        :params addresses
-        """
-        schools_address_ids = [address.id for address in addresses.items if address.type == "school"]
-        users_address_ids = [address.id for address in addresses.items if address.type == "user"]
-        students_address_ids = [address.id for address in addresses.items if address.type == "student"]
-        return {
-            "school": SchoolService.get_schools_by_address_ids(tuple(schools_address_ids)),
-            "user": UserService.get_user_by_address_ids(tuple(users_address_ids)),
-            "student": StudentService.get_students_by_address_ids(tuple(students_address_ids))
-        }
-
     def get_all_addresses(self, page: int = 1, per_page: int = 20, address_type: str = None) -> (List[Dict[str, Any]], int):
         """
         get all addresses
@@ -150,51 +136,45 @@ class AddressService(Service):
         :params address_type int
         :return:
         """
+        if address_type and address_type not in ["school", "user", "student"]:
+            self.logger.error("Address type should be school or user or student")
+            raise ThingahaCustomError("Address type should be school or user or student")
         try:
-            if address_type:
-                addresses, address_records = self.__return_address_types(page, per_page, address_type)
-            else:
-                addresses = AddressModel.get_all_addresses(page, per_page)
-                address_records = self.__get_all_address_records(addresses)
-            if address_records is None:
-                self.logger.error("Address type should be school or user or student")
-                raise ThingahaCustomError("Address type should be school or user or student")
-            return self.__return_addresses_with_format(addresses, address_records)
+            addresses = AddressModel.get_all_addresses(page, per_page, address_type)
+            return self.__return_addresses_with_format(addresses)
         except SQLAlchemyError:
             self.logger.error(
                 "Get all addresses fail. error %s", traceback.format_exc())
             raise SQLCustomError(description="GET address SQL ERROR")
 
     @staticmethod
-    def __return_addresses_with_format(addresses: Pagination, address_records: Dict) -> Dict[str, List]:
+    def __return_addresses_with_format(addresses: Pagination) -> Dict[str, List]:
         """
         prepare return format for address get all API
-        :params addresses
-        :params address_records
+        :params addresses: Pagination of (address, owner_id, owner_name, total_count)
         """
-        try:
-            return {
-                "addresses": [{
-                    "id": address.id,
-                    "addressable": {
-                        "id": address_records[address.type][address.id].id,
-                        "name": address_records[address.type][address.id].username if address.type == "user" else
-                        address_records[address.type][address.id].name,
-                        "type": address.type
-                    },
-                    "division": address.division,
-                    "district": address.district,
-                    "township": address.township,
-                    "street_address": address.street_address,
-                } for address in addresses.items],
-                "total_count": addresses.total,
-                "current_page": addresses.page,
-                "next_page": addresses.next_num,
-                "prev_page": addresses.prev_num,
-                "pages": addresses.pages
-            }
-        except KeyError:
+        if any(owner_id is None for _, owner_id, _, _ in addresses.items):
             raise ThingahaCustomError("Address key mismatch error")
+        return {
+            "addresses": [{
+                "id": address.id,
+                "addressable": {
+                    "id": owner_id,
+                    "name": owner_name,
+                    "type": address.type
+                },
+                "division": address.division,
+                "district": address.district,
+                "township": address.township,
+                "street_address": address.street_address,
+            } for address, owner_id, owner_name, _ in addresses.items],
+            "total_count": addresses.total,
+            "count_estimated": addresses.estimated,
+            "current_page": addresses.page,
+            "next_page": addresses.next_num,
+            "prev_page": addresses.prev_num,
+            "pages": addresses.pages
+        }
 
     @staticmethod
     def __return_address_list(addresses: List[AddressModel]) -> List[Dict[str, Any]]:
@@ -216,8 +196,7 @@ class AddressService(Service):
         self.logger.info("Get users list by query %s", query)
         try:
             addresses = AddressModel.search_address_by_query(page, per_page, query)
-            address_records = self.__get_all_address_records(addresses)
-            return self.__return_addresses_with_format(addresses, address_records)
+            return self.__return_addresses_with_format(addresses)
         except SQLAlchemyError:
             self.logger.error("Get users by name fail. query %s. error %s", query,
                               traceback.format_exc())
@@ -0,0 +1,89 @@
+import time
+import traceback
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Dict, List
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from common.analytics import AnalyticsSnapshot, DIMENSIONS, METRICS
+from common.config import load_config
+from common.error import SQLCustomError, ValidateFail
+from models.donation import DonationModel
+from service.service import Service
+
+conf = load_config()["common"]["analytics"]
+
+
+@lru_cache(maxsize=1)
+def get_analytics_snapshot() -> AnalyticsSnapshot:
+    """
+    return shared analytics snapshot of this process
+    """
+    return AnalyticsSnapshot()
+
+
+class AnalyticsService(Service):
+    """
+    analytics service class for dashboard group by queries on in memory donation snapshot
+    snapshot is fully reloaded every refresh_seconds (updated and deleted donations),
+    donations created since last load are appended before each query
+    """
+    _refresh_lock = Lock()
+
+    def __init__(self, logger=None) -> None:
+        super().__init__(logger)
+
+    def __refresh(self) -> AnalyticsSnapshot:
+        """
+        reload snapshot if expired, else append new donations
+        :return: up to date snapshot
+        """
+        snapshot = get_analytics_snapshot()
+        with self._refresh_lock:
+            if snapshot.refreshed_at is None or time.monotonic() - snapshot.refreshed_at > conf["refresh_seconds"]:
+                self.logger.info("Reload analytics snapshot")
+                snapshot.load(*DonationModel.get_analytics_rows())
+            else:
+                snapshot.append(*DonationModel.get_analytics_rows(snapshot.max_id))
+        return snapshot
+
+    @staticmethod
+    def __parse_filters(args: Dict[str, str]) -> Dict[str, List[Any]]:
+        """
+        comma separated dimension filter values from query string, year and school_id as int
+        :param args:
+        :return: dimension to values
+        """
+        filters = {}
+        for dimension in DIMENSIONS:
+            if not args.get(dimension):
+                continue
+            values = [value.strip() for value in args[dimension].split(",") if value.strip()]
+            if dimension in ("year", "school_id"):
+                try:
+                    values = [int(value) for value in values]
+                except ValueError:
+                    raise ValidateFail("{} should be integer".format(dimension))
+            filters[dimension] = values
+        return filters
+
+    def query(self, args: Dict[str, str]) -> Dict[str, Any]:
+        """
+        group by and aggregate donations in snapshot
+        :param args: group_by and metrics (comma separated) and dimension filters query dict
+        :return: rows of dimension values and metrics with snapshot size
+        """
+        group_by = [name.strip() for name in args.get("group_by", "").split(",") if name.strip()]
+        metrics = [name.strip() for name in args.get("metrics", ",".join(METRICS)).split(",") if name.strip()]
+        filters = self.__parse_filters(args)
+        try:
+            snapshot = self.__refresh()
+        except SQLAlchemyError:
+            self.logger.error("Load analytics snapshot fail. error %s", traceback.format_exc())
+            raise SQLCustomError(description="Load analytics snapshot SQL ERROR")
+        return {
+            "rows": snapshot.query(group_by, metrics, filters),
+            "snapshot_size": snapshot.size,
+            "snapshot_age": round(time.monotonic() - snapshot.refreshed_at, 1)
+        }
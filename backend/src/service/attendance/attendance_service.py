@@ -6,7 +6,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from common.data_schema import attendance_schema
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail
-from models.attendance import AttendanceModel
+from models.attendance import AttendanceModel, ATTENDANCE_QUERY_FILTER, ATTENDANCE_FIELD_SELECTOR
 from service.service import Service
 
 
@@ -18,28 +18,24 @@ class AttendanceService(Service):
     def __init__(self, logger=None) -> None:
         super().__init__(logger)
 
-    def get_all_attendances(self, page: int, grade: str, year: int, per_page: int = 20) -> (List, Any):
+    def get_all_attendances(self, page: int = 1, per_page: int = 20, args: Dict[str, str] = None) -> (List, Any):
         """
         get all attendance
         :params page
-        :params grade
-        :params year
         :params per_page
+        :params args: filter (school_id, student_id, year, grade), sort, fields and expand query dict
         :return: attendance list of dict
         """
+        criterion, order_by = ATTENDANCE_QUERY_FILTER.build(args or {})
+        fields, expand = ATTENDANCE_FIELD_SELECTOR.parse(args or {})
         try:
-            if year and not grade:
-                attendances = AttendanceModel.get_attendances_by_year(page, year, per_page)
-            elif grade and not year:
-                attendances = AttendanceModel.get_attendances_by_grade(page, grade, per_page)
-            elif year and grade:
-                attendances = AttendanceModel.get_attendances_by_grade_year(page, grade, year, per_page)
-            else:
-                attendances = AttendanceModel.get_all_attendances(page, per_page)
+            attendances = AttendanceModel.get_all_attendances(page, per_page, criterion, order_by,
+                                                              ATTENDANCE_FIELD_SELECTOR.columns(fields), expand)
             return {
-                "attendances": [attendance.attendance_dict(school, student) for attendance, school, student in
+                "attendances": [attendance.attendance_dict(school, student, fields) for attendance, school, student in
                                 attendances.items],
                 "total_count": attendances.total,
+                "count_estimated": attendances.estimated,
                 "current_page": attendances.page,
                 "next_page": attendances.next_num,
                 "prev_page": attendances.prev_num,
@@ -49,23 +45,48 @@ class AttendanceService(Service):
             self.logger.error("Error: {}".format(error))
             raise SQLCustomError(description="GET Attendance SQL ERROR")
 
-    def get_attendance_by_id(self, attendance_id: int) -> Optional[List]:
+    def get_attendance_by_id(self, attendance_id: int, args: Dict[str, str] = None) -> Optional[List]:
         """
         get attendance info by id
         :param attendance_id:
+        :param args: fields and expand query dict
         :return: attendance list of dict
         """
+        fields, expand = ATTENDANCE_FIELD_SELECTOR.parse(args or {})
         try:
             self.logger.info("Get attendance info by attendance_id:{}".format(attendance_id))
-            attendance_by_id = AttendanceModel.get_attendance_by_id(attendance_id)
+            attendance_by_id = AttendanceModel.get_attendance_by_id(
+                attendance_id, ATTENDANCE_FIELD_SELECTOR.columns(fields), expand)
             if not attendance_by_id:
                 raise SQLCustomError(description="No data for requested attendance id: {}".format(attendance_id))
             attendance, school, student = attendance_by_id
-            return attendance.attendance_dict(school, student)
+            return attendance.attendance_dict(school, student, fields)
         except SQLAlchemyError:
             self.logger.error("Error: {}".format(traceback.format_exc()))
             raise SQLCustomError(description="GET Attendance by ID SQL ERROR")
 
+    def get_attendances_by_ids(self, attendance_ids: List[int], args: Dict[str, str] = None) -> Dict[str, Any]:
+        """
+        get attendances info by ids for batch lookup, missing ids are skipped
+        :param attendance_ids:
+        :param args: fields and expand query dict
+        :return: attendance list of dict in requested id order
+        """
+        fields, expand = ATTENDANCE_FIELD_SELECTOR.parse(args or {})
+        try:
+            self.logger.info("Get attendances info by ids:{}".format(attendance_ids))
+            position = {attendance_id: index for index, attendance_id in enumerate(attendance_ids)}
+            attendances = sorted(AttendanceModel.get_attendances_by_ids(
+                attendance_ids, ATTENDANCE_FIELD_SELECTOR.columns(fields), expand), key=lambda row: position[row[0].id])
+            return {
+                "attendances": [attendance.attendance_dict(school, student, fields) for attendance, school, student in
+                                attendances],
+                "total_count": len(attendances)
+            }
+        except SQLAlchemyError as error:
+            self.logger.error("Error: {}".format(error))
+            raise SQLCustomError(description="GET Attendance by IDs SQL ERROR")
+
     def create_attendance(self, data: Dict) -> bool:
         """
         create attendance records
@@ -3,9 +3,11 @@ from typing import List, Any, Optional, Dict
 
 from sqlalchemy.exc import SQLAlchemyError
 
-from common.data_schema import donation_schema
+from common.data_schema import donation_schema, donation_bulk_update_schema
+from common.donation_matrix import donation_matrix
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail, ThingahaCustomError
-from models.donation import DonationModel
+from database import query_cache
+from models.donation import DonationModel, DONATION_QUERY_FILTER, DONATION_FIELD_SELECTOR
 from service.service import Service
 
 
@@ -17,19 +19,26 @@ class DonationService(Service):
     def __init__(self, logger=None) -> None:
         super().__init__(logger)
 
-    def get_all_donations_records(self, page: int = 1, per_page : int = 20) -> (List, Any):
+    def get_all_donations_records(self, page: int = 1, per_page: int = 20, args: Dict[str, str] = None) -> (List, Any):
         """
         get all donation
         :params page
         :params per_page
+        :params args: filter (school_id, student_id, user_id, attendance_id, transfer_id, year, month, status),
+                      sort, fields and expand query dict
         :return: donation list of dict
         """
+        criterion, order_by = DONATION_QUERY_FILTER.build(args or {})
+        fields, expand = DONATION_FIELD_SELECTOR.parse(args or {})
         try:
             self.logger.info("Get Donation list")
-            donations = DonationModel.get_all_donations(page, per_page)
+            donations = DonationModel.get_all_donations(page, per_page, criterion, order_by,
+                                                        DONATION_FIELD_SELECTOR.columns(fields), expand)
             return {
-                "donations": [donation.donation_dict(user, student) for donation, user, student in donations.items],
+                "donations": [donation.donation_dict(user, student, fields) for donation, user, student in
+                              donations.items],
                 "total_count": donations.total,
+                "count_estimated": donations.estimated,
                 "current_page": donations.page,
                 "next_page": donations.next_num,
                 "prev_page": donations.prev_num,
@@ -39,18 +48,73 @@ class DonationService(Service):
             self.logger.error("Error: {}".format(error))
             raise SQLCustomError(description="GET Donation SQL ERROR")
 
-    def get_donation_by_id(self, donation_id: int) -> Optional[Dict]:
+    def get_unallocated_donations(self, page: int = 1, per_page: int = 20,
+                                  args: Dict[str, str] = None) -> Dict[str, Any]:
+        """
+        get paid donations which are not allocated to transfer
+        :params page
+        :params per_page
+        :params args: year, month filter and sort query dict
+        :return: donation list of dict with total mmk and jpy amount
+        """
+        args = {key: value for key, value in (args or {}).items() if key in ("year", "month", "sort")}
+        criterion, order_by = DONATION_QUERY_FILTER.build(args)
+        try:
+            self.logger.info("Get unallocated donation list")
+            donations = DonationModel.get_all_donations(page, per_page,
+                                                        criterion + DonationModel.unallocated_criterion(), order_by)
+            total_mmk, total_jpy = DonationModel.get_unallocated_totals(criterion)
+            return {
+                "donations": [donation.donation_dict(user, student) for donation, user, student in donations.items],
+                "total_mmk": total_mmk,
+                "total_jpy": total_jpy,
+                "total_count": donations.total,
+                "count_estimated": donations.estimated,
+                "current_page": donations.page,
+                "next_page": donations.next_num,
+                "prev_page": donations.prev_num,
+                "pages": donations.pages
+            }
+        except SQLAlchemyError as error:
+            self.logger.error("Error: {}".format(error))
+            raise SQLCustomError(description="GET unallocated Donation SQL ERROR")
+
+    def get_donation_matrix(self, year: int) -> Dict[str, Any]:
+        """
+        donator x month matrix of year, cached until donations or users are written
+        :param year:
+        :return: donation matrix dict
+        """
+        if year is None:
+            raise ValidateFail("year is required")
+        key = "donation_matrix:{}".format(year)
+        matrix = query_cache.get(key)
+        if matrix is not None:
+            return matrix
+        try:
+            self.logger.info("Get donation matrix of %s", year)
+            matrix = donation_matrix(year, DonationModel.get_donation_matrix_rows(year))
+            query_cache.set(key, {"donations", "users"}, matrix)
+            return matrix
+        except SQLAlchemyError as error:
+            self.logger.error("Error: {}".format(error))
+            raise SQLCustomError(description="GET Donation matrix SQL ERROR")
+
+    def get_donation_by_id(self, donation_id: int, args: Dict[str, str] = None) -> Optional[Dict]:
         """
         get donation info by id
         :param donation_id:
+        :param args: fields and expand query dict
         :return: donation list of dict
         """
+        fields, expand = DONATION_FIELD_SELECTOR.parse(args or {})
         try:
-            donation_record = DonationModel.get_donation_by_id(donation_id)
+            donation_record = DonationModel.get_donation_by_id(donation_id, DONATION_FIELD_SELECTOR.columns(fields),
+                                                               expand)
             if donation_record:
                 donation, user, student = donation_record
                 self.logger.info("Get donation info by donation_id:{}".format(donation_id))
-                return donation.donation_dict(user, student)
+                return donation.donation_dict(user, student, fields)
             else:
                 self.logger.error("Fail to get donation info by donation_id:{}".format(donation_id))
                 raise ThingahaCustomError(description="No record for requested donation id: {}".format(donation_id))
@@ -84,6 +148,40 @@ class DonationService(Service):
             self.logger.error("Donation create fail. error %s", error)
             raise SQLCustomError("Donation create fail")
 
+    def bulk_update_donations(self, data: Dict) -> Dict[str, Any]:
+        """
+        set paid_at and/or transfer_id for donations selected by id list or filter
+        :param data: ids or filter (same keys as donation list filter) and set values
+        :return: updated count and ids, not found ids for id list
+        """
+        if not data:
+            raise RequestDataEmpty("Donation bulk update data is empty")
+        if not self.input_validate.validate_json(data, donation_bulk_update_schema):
+            self.logger.error("Donation bulk update input is invalid.")
+            raise ValidateFail("Donation bulk update validation fail")
+        if ("ids" in data) == ("filter" in data) or not data["set"]:
+            raise ValidateFail("Either ids or filter, and set values are required")
+        if "ids" in data:
+            criterion = [DonationModel.id.in_(data["ids"])]
+        else:
+            criterion, _ = DONATION_QUERY_FILTER.build({key: str(value) for key, value in data["filter"].items()
+                                                        if key != "sort"})
+            if not criterion:
+                raise ValidateFail("Donation bulk update filter is empty")
+        try:
+            self.logger.info("Bulk update donations by %s with %s", data.get("ids") or data.get("filter"), data["set"])
+            donation_ids = DonationModel.bulk_update_donations(criterion, data["set"])
+            result = {
+                "updated_count": len(donation_ids),
+                "updated_ids": sorted(donation_ids)
+            }
+            if "ids" in data:
+                result["not_found_ids"] = sorted(set(data["ids"]) - set(donation_ids))
+            return result
+        except SQLAlchemyError as error:
+            self.logger.error("Error: {}".format(error))
+            raise SQLCustomError(description="Bulk update donation SQL ERROR")
+
     def delete_donation_by_id(self, donation_id: int) -> bool:
         """
         delete donation by id
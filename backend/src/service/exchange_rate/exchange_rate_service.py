@@ -0,0 +1,77 @@
+import traceback
+from typing import Any, Dict, List
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from common.data_schema import exchange_rates_schema
+from common.error import SQLCustomError, RequestDataEmpty, ValidateFail
+from common.statement_renderer import MONTHS
+from models.exchange_rate import ExchangeRateModel, ExchangeRateChangeModel
+from models.transfer import TransferModel
+from service.service import Service
+
+
+class ExchangeRateService(Service):
+    """
+    exchange rate service class, rate changes recompute MMK amounts of donations, transfers and extra funds
+    """
+    def __init__(self, logger=None) -> None:
+        super().__init__(logger)
+
+    def get_exchange_rates(self, year: int = None) -> List[Dict[str, Any]]:
+        """
+        get exchange rates
+        :param year: year filter
+        :return: exchange rate list of dict
+        """
+        try:
+            self.logger.info("Get exchange rates")
+            return [rate.as_dict() for rate in ExchangeRateModel.get_exchange_rates(year)]
+        except SQLAlchemyError:
+            self.logger.error("Get exchange rates fail. error %s", traceback.format_exc())
+            raise SQLCustomError(description="GET exchange rates SQL ERROR")
+
+    def get_exchange_rate_changes(self, year: int = None) -> List[Dict[str, Any]]:
+        """
+        get audit trail of rate changes
+        :param year: year filter
+        :return: change list of dict
+        """
+        try:
+            self.logger.info("Get exchange rate changes")
+            return [change.as_dict() for change in ExchangeRateChangeModel.get_changes(year)]
+        except SQLAlchemyError:
+            self.logger.error("Get exchange rate changes fail. error %s", traceback.format_exc())
+            raise SQLCustomError(description="GET exchange rate changes SQL ERROR")
+
+    def set_exchange_rates(self, data: Dict[str, Any], user_id: int = None) -> List[Dict[str, Any]]:
+        """
+        set rates by year and month or by transfer, and recompute MMK amounts of changed months
+        :param data: rates list of year, month (or transfer_id) and jpy_to_mmk
+        :param user_id: user who changes rates
+        :return: audit rows of changed months
+        """
+        if not data:
+            raise RequestDataEmpty("Exchange rate data is empty")
+        if not self.input_validate.validate_json(data, exchange_rates_schema):
+            self.logger.error("Exchange rate validation fail")
+            raise ValidateFail("Exchange rate validation fail")
+        rates = {}
+        try:
+            for rate in data["rates"]:
+                transfer_id = rate.get("transfer_id")
+                if transfer_id is not None:
+                    transfer = TransferModel.get_transfer_by_id(transfer_id)
+                    if not transfer:
+                        raise ValidateFail("No data for requested transfer id: {}".format(transfer_id))
+                    year, month = transfer.year, transfer.month
+                else:
+                    year, month = rate["year"], rate["month"]
+                if month not in MONTHS or rate["jpy_to_mmk"] <= 0:
+                    raise ValidateFail("Invalid exchange rate for {} {}".format(year, month))
+                rates[(year, month)] = (year, month, float(rate["jpy_to_mmk"]), transfer_id)
+            self.logger.info("Set exchange rates of %s months", len(rates))
+            return ExchangeRateModel.set_rates(list(rates.values()), user_id)
+        except SQLAlchemyError:
+            self.logger.error("Set exchange rates fail. error %s", traceback.format_exc())
+            raise SQLCustomError(description="Set exchange rates SQL ERROR")
@@ -0,0 +1,80 @@
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from common.error import ValidateFail
+from common.export_writer import EXPORT_FORMATS, gzip_chunks
+from common.mm_division import get_division_index
+from models.attendance import AttendanceModel, ATTENDANCE_QUERY_FILTER
+from models.donation import DonationModel, DONATION_QUERY_FILTER
+from models.student import StudentModel
+from models.user import UserModel
+from service.report.report_service import ReportService
+from service.service import Service
+
+EXPORT_RESOURCES = ("donations", "attendances", "students", "users", "gaps")
+EXPORT_CHUNK_SIZE = 1000
+
+
+class ExportService(Service):
+    """
+    export service class for streaming full table dumps
+    rows are read by server side cursor and encoded chunk by chunk, memory does not grow with table size
+    """
+    def __init__(self, logger=None) -> None:
+        super().__init__(logger)
+
+    def __get_rows(self, resource: str, args: Dict[str, str]) -> Tuple[List[str], Iterator[List]]:
+        """
+        validate filter and return column names and lazy row chunks of resource
+        :param resource: donations, attendances, students, users or gaps
+        :param args: filter and sort query dict of resource list API
+        :return: column names and row chunks
+        """
+        region = {key: args[key] for key in ("division", "district", "township") if args.get(key)}
+        if resource == "donations":
+            criterion, order_by = DONATION_QUERY_FILTER.build(args)
+            return DonationModel.get_donations_export(criterion, order_by, EXPORT_CHUNK_SIZE)
+        if resource == "attendances":
+            criterion, order_by = ATTENDANCE_QUERY_FILTER.build(args)
+            return AttendanceModel.get_attendances_export(criterion, order_by, EXPORT_CHUNK_SIZE)
+        if resource == "gaps":
+            return DonationModel.get_gaps_export(*ReportService.parse_gap_args(args), EXPORT_CHUNK_SIZE)
+        if resource == "students":
+            return StudentModel.get_students_export(get_division_index().resolve_filter(**region), EXPORT_CHUNK_SIZE)
+        if args.get("role") and args["role"] not in ("admin", "sub_admin", "donator"):
+            raise ValidateFail("role should be one of admin, sub_admin, donator")
+        return UserModel.get_users_export(args.get("role"), args.get("country"),
+                                          get_division_index().resolve_filter(**region), EXPORT_CHUNK_SIZE)
+
+    def __log_errors(self, resource: str, chunks: Iterator) -> Iterator:
+        """
+        log database error raised while streaming, response status is already sent
+        :param resource:
+        :param chunks:
+        """
+        try:
+            yield from chunks
+        except SQLAlchemyError as error:
+            self.logger.error("Export %s fail while streaming: %s", resource, error)
+            raise
+
+    def export(self, resource: str, args: Dict[str, str], export_format: str = "csv",
+               gzip: bool = False) -> Tuple[str, Iterator]:
+        """
+        export resource rows as chunked CSV or NDJSON
+        :param resource: donations, attendances, students, users or gaps
+        :param args: filter and sort query dict of resource list API
+        :param export_format: csv or ndjson
+        :param gzip: gzip encode chunks
+        :return: mimetype and iterator of text (or gzip bytes) chunks
+        """
+        if resource not in EXPORT_RESOURCES:
+            raise ValidateFail("export should be one of {}".format(", ".join(EXPORT_RESOURCES)))
+        if export_format not in EXPORT_FORMATS:
+            raise ValidateFail("format should be one of {}".format(", ".join(EXPORT_FORMATS)))
+        mimetype, encode = EXPORT_FORMATS[export_format]
+        columns, row_chunks = self.__get_rows(resource, args)
+        self.logger.info("Export %s as %s", resource, export_format)
+        chunks = self.__log_errors(resource, encode(columns, row_chunks))
+        return mimetype, gzip_chunks(chunks) if gzip else chunks
@@ -31,7 +31,8 @@ class ExtraFundsService(Service):
         try:
             return ExtraFundsModel.create_extra_fund(ExtraFundsModel(
                 mmk_amount=int(data["mmk_amount"]),
-                transfer_id=int(data["transfer_id"])
+                transfer_id=int(data["transfer_id"]),
+                jpy_amount=data.get("jpy_amount")
             ))
         except SQLAlchemyError:
             self.logger.error("Extra funds create fail. error %s", traceback.format_exc())
@@ -53,7 +54,8 @@ class ExtraFundsService(Service):
             self.logger.info("Update extra fund info by id %s", extra_fund_id)
             return ExtraFundsModel.update_extra_fund(extra_fund_id, ExtraFundsModel(
                 mmk_amount=int(data["mmk_amount"]),
-                transfer_id=int(data["transfer_id"])
+                transfer_id=int(data["transfer_id"]),
+                jpy_amount=data.get("jpy_amount")
             ))
         except SQLAlchemyError as e:
             self.logger.error("Extra fund update fail. id %s, error %s, custom error: %s", extra_fund_id,
@@ -105,6 +107,7 @@ class ExtraFundsService(Service):
             return {
                 "extra_funds": [extra_funds.as_dict() for extra_funds in extra_funds.items],
                 "total_count": extra_funds.total,
+                "count_estimated": extra_funds.estimated,
                 "current_page": extra_funds.page,
                 "next_page": extra_funds.next_num,
                 "prev_page": extra_funds.prev_num,
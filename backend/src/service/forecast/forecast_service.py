@@ -0,0 +1,85 @@
+import time
+import traceback
+from datetime import date
+from threading import Lock
+from typing import Any, Dict
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from common.config import load_config
+from common.error import SQLCustomError, ValidateFail
+from common.forecast import history_rates, project, to_period, MONTHS
+from models.attendance import AttendanceModel
+from models.donation import DonationModel
+from models.extrafund import ExtraFundsModel
+from models.user import UserModel
+from service.service import Service
+
+conf = load_config()["common"]["forecast"]
+MAX_FORECAST_MONTHS = 36
+
+
+class ForecastService(Service):
+    """
+    funding forecast service class
+    history rates and current counts are cached for history_ttl seconds,
+    so what-if requests only run the vectorized projection
+    """
+    _history = None
+    _history_lock = Lock()
+
+    def __init__(self, logger=None) -> None:
+        super().__init__(logger)
+
+    def __get_history(self, today: date) -> Dict[str, Any]:
+        """
+        history rates of last 12 months with donations, active students and donators, cached for history_ttl
+        :param today:
+        :return: rates, students and donators
+        """
+        with self._history_lock:
+            if self._history is None or self._history[0] < time.monotonic():
+                since_year = today.year - 2
+                history = {
+                    "rates": history_rates(DonationModel.get_monthly_history(since_year),
+                                           DonationModel.get_donator_months(since_year),
+                                           ExtraFundsModel.get_monthly_history(since_year)),
+                    "students": AttendanceModel.get_active_student_count(today.year),
+                    "donators": UserModel.get_donation_active_count()
+                }
+                ForecastService._history = (time.monotonic() + conf["history_ttl"], history)
+            return self._history[1]
+
+    def get_forecast(self, months: int = 12, new_enrolments: float = 0, jpy_rate: float = None,
+                     mmk_per_student: float = None, lapse_rate: float = None) -> Dict[str, Any]:
+        """
+        project monthly obligations and shortfall from next month
+        :param months: forecast months
+        :param new_enrolments: students added each month
+        :param jpy_rate: JPY to MMK rate, history rate if None
+        :param mmk_per_student: monthly MMK need per student, history rate if None
+        :param lapse_rate: monthly donator lapse rate (0 to 1), history rate if None
+        :return: history rates, parameters and monthly projection
+        """
+        if not 1 <= months <= MAX_FORECAST_MONTHS:
+            raise ValidateFail("months should be 1 to {}".format(MAX_FORECAST_MONTHS))
+        if new_enrolments < 0 or any(value is not None and value < 0 for value in (jpy_rate, mmk_per_student)):
+            raise ValidateFail("new_enrolments, jpy_rate and mmk_per_student should not be negative")
+        if lapse_rate is not None and not 0 <= lapse_rate <= 1:
+            raise ValidateFail("lapse_rate should be 0 to 1")
+        today = date.today()
+        try:
+            history = self.__get_history(today)
+        except SQLAlchemyError:
+            self.logger.error("Get forecast history fail. error %s", traceback.format_exc())
+            raise SQLCustomError(description="GET forecast SQL ERROR")
+        projection = project(history["rates"], to_period(today.year, MONTHS[today.month - 1]) + 1, months,
+                             history["students"], history["donators"], new_enrolments, jpy_rate,
+                             mmk_per_student, lapse_rate)
+        return {
+            "history": history["rates"],
+            "active_students": history["students"],
+            "active_donators": history["donators"],
+            "forecast": projection,
+            "total_shortfall_mmk": projection[-1]["cumulative_shortfall_mmk"]
+        }
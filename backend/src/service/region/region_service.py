@@ -0,0 +1,47 @@
+"""region service class for region statistics"""
+import traceback
+from typing import Dict, Any, List
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from common.error import SQLCustomError, ValidateFail
+from common.mm_division import get_division_index
+from models.address import AddressModel
+from service.service import Service
+
+REGION_LEVELS = ["division", "district", "township"]
+
+
+class RegionService(Service):
+    """
+    region service class for region statistics
+    """
+    def __init__(self, logger=None) -> None:
+        super().__init__(logger)
+
+    def get_region_stats(self, level: str = "division", region: Dict[str, str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        get students, schools and donators count per region
+        :params level: division, district or township
+        :params region: division, district, township names for filter
+        :return: region count list of dict
+        """
+        if level not in REGION_LEVELS:
+            self.logger.error("Region level should be division or district or township")
+            raise ValidateFail("Region level should be division or district or township")
+        region_ids = get_division_index().resolve_filter(**(region or {}))
+        try:
+            self.logger.info("Get region stats by %s", level)
+            return {
+                "regions": [{
+                    "id": region_id,
+                    "name": name,
+                    "level": level,
+                    "students": students,
+                    "schools": schools,
+                    "donators": donators
+                } for region_id, name, students, schools, donators in AddressModel.get_region_counts(level, region_ids)]
+            }
+        except SQLAlchemyError:
+            self.logger.error("Get region stats fail. error %s", traceback.format_exc())
+            raise SQLCustomError(description="GET region stats SQL ERROR")
@@ -0,0 +1,66 @@
+import traceback
+from typing import Any, Dict, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from common.error import SQLCustomError, ValidateFail
+from common.forecast import MONTHS
+from models.donation import DonationModel
+from service.service import Service
+
+GAP_KINDS = ("students", "donators")
+
+
+class ReportService(Service):
+    """
+    report service class for sponsorship gaps, students without donation and lapsed donators of a month
+    """
+    def __init__(self, logger=None) -> None:
+        super().__init__(logger)
+
+    @staticmethod
+    def parse_gap_args(args: Dict[str, str]) -> Tuple[str, int, str]:
+        """
+        validate gap report query
+        :param args: kind (students or donators, default students), year and month query dict
+        :return: kind, year and month
+        """
+        kind = args.get("kind") or "students"
+        if kind not in GAP_KINDS:
+            raise ValidateFail("kind should be one of {}".format(", ".join(GAP_KINDS)))
+        try:
+            year = int(args.get("year"))
+        except (TypeError, ValueError):
+            raise ValidateFail("year is required")
+        if args.get("month") not in MONTHS:
+            raise ValidateFail("month should be one of {}".format(", ".join(MONTHS)))
+        return kind, year, args["month"]
+
+    def get_gaps(self, args: Dict[str, str], page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+        """
+        page of students attending in year without donation for month, or donators who donated
+        in previous month but not in month
+        :param args: kind, year and month query dict
+        :param page:
+        :param per_page:
+        :return: gap rows with pagination
+        """
+        kind, year, month = self.parse_gap_args(args)
+        try:
+            self.logger.info("Get %s gaps of %s %s", kind, month, year)
+            gaps = DonationModel.get_gaps(kind, year, month, page, per_page)
+            return {
+                "kind": kind,
+                "year": year,
+                "month": month,
+                kind: [row._asdict() for row in gaps.items],
+                "total_count": gaps.total,
+                "count_estimated": gaps.estimated,
+                "current_page": gaps.page,
+                "next_page": gaps.next_num,
+                "prev_page": gaps.prev_num,
+                "pages": gaps.pages
+            }
+        except SQLAlchemyError:
+            self.logger.error("Get gaps fail. error %s", traceback.format_exc())
+            raise SQLCustomError(description="GET gaps SQL ERROR")
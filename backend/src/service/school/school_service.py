@@ -6,6 +6,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from common.data_schema import school_schema
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail
+from common.mm_division import get_division_index
 from models.school import SchoolModel
 from service.service import Service
 
@@ -19,19 +20,23 @@ class SchoolService(Service):
     def __init__(self, logger=None) -> None:
         super().__init__(logger)
 
-    def get_all_schools(self, page: int = 1, per_page: int = 20) -> Dict[str, Union[list, Any]]:
+    def get_all_schools(self, page: int = 1, per_page: int = 20,
+                        region: Dict[str, str] = None) -> Dict[str, Union[list, Any]]:
         """
         get all school
         :params:page : int
         :params:per_page : int
+        :params:region : division, district, township names for filter
         :return: school list of dict
         """
+        region_ids = get_division_index().resolve_filter(**(region or {}))
         try:
             self.logger.info("Get school list")
-            schools = SchoolModel.get_all_schools(page, per_page)
+            schools = SchoolModel.get_all_schools(page, per_page, region_ids)
             return {
                 "schools": self.__return_school_list(schools.items),
                 "total_count": schools.total,
+                "count_estimated": schools.estimated,
                 "current_page": schools.page,
                 "next_page": schools.next_num,
                 "prev_page": schools.prev_num,
@@ -59,6 +64,24 @@ class SchoolService(Service):
             self.logger.error("Error: {}".format(error))
             raise SQLCustomError(description="GET School by ID SQL ERROR")
 
+    def get_schools_by_ids(self, school_ids: List[int]) -> Dict[str, Any]:
+        """
+        get schools info by ids for batch lookup, missing ids are skipped
+        :param school_ids:
+        :return: schools list of dict in requested id order
+        """
+        try:
+            self.logger.info("Get schools info by ids:{}".format(school_ids))
+            position = {school_id: index for index, school_id in enumerate(school_ids)}
+            schools = sorted(SchoolModel.get_schools_by_ids(school_ids), key=lambda school: position[school.id])
+            return {
+                "schools": [school.school_dict() for school in schools],
+                "total_count": len(schools)
+            }
+        except SQLAlchemyError as error:
+            self.logger.error("Error: {}".format(error))
+            raise SQLCustomError(description="GET School by IDs SQL ERROR")
+
     @staticmethod
     def __return_school_list(query: list) -> List:
         """
@@ -141,6 +164,7 @@ class SchoolService(Service):
             return {
                 "schools": self.__return_school_list(schools.items),
                 "total_count": schools.total,
+                "count_estimated": schools.estimated,
                 "current_page": schools.page,
                 "next_page": schools.next_num,
                 "prev_page": schools.prev_num,
@@ -150,16 +174,3 @@ class SchoolService(Service):
             self.logger.error("Get users by name fail. query %s. error %s", query,
                               traceback.format_exc())
             raise SQLCustomError(description="GET schools by query SQL ERROR")
-
-    @staticmethod
-    def get_schools_by_address_ids(ids: Tuple) -> Dict[int, SchoolModel]:
-        """
-        get schools by address IDs
-        :params ids
-        :return: school list of dict
-        """
-        try:
-            schools = SchoolModel.get_schools_by_address_ids(ids)
-            return {school.address_id: school for school in schools}
-        except SQLAlchemyError:
-            raise SQLCustomError(description="GET schools by ids query SQL ERROR")
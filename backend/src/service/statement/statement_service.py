@@ -0,0 +1,177 @@
+import os
+import traceback
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import chain, groupby
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import Flask
+from sqlalchemy.exc import SQLAlchemyError
+
+from common.config import load_config
+from common.data_schema import statement_job_schema
+from common.error import SQLCustomError, RequestDataEmpty, ValidateFail
+from common.statement_renderer import render_statements, STATEMENT_FORMATS
+from models.donation import DonationModel
+from models.statement_job import StatementJobModel
+from service.service import Service
+
+conf = load_config()["common"]["statement"]
+OUTPUT_DIR = os.path.abspath(os.path.dirname(__file__) + conf["output_dir"])
+
+
+class StatementService(Service):
+    """
+    annual donor statement service class
+    statements are generated by background job, rows come from one grouped pass over donations
+    and files are rendered by batches in worker processes
+    """
+    _job_executor = ThreadPoolExecutor(max_workers=1)
+    _render_pool = None
+
+    def __init__(self, logger=None) -> None:
+        super().__init__(logger)
+
+    @classmethod
+    def _get_render_pool(cls) -> Optional[ProcessPoolExecutor]:
+        """
+        create render process pool on first job, None if workers is 0 (render in job thread)
+        """
+        if conf["workers"] and cls._render_pool is None:
+            cls._render_pool = ProcessPoolExecutor(max_workers=conf["workers"])
+        return cls._render_pool
+
+    @staticmethod
+    def job_dir(job_id: int) -> str:
+        """
+        directory of job statement files
+        :param job_id:
+        """
+        return os.path.join(OUTPUT_DIR, str(job_id))
+
+    @staticmethod
+    def archive_path(job_id: int) -> str:
+        """
+        zip archive of all job statement files
+        :param job_id:
+        """
+        return os.path.join(OUTPUT_DIR, "statements_{}.zip".format(job_id))
+
+    def create_statement_job(self, data: Dict[str, Any], app: Flask) -> Dict[str, Any]:
+        """
+        create statement job of year and run it in background
+        :param data: year
+        :param app: flask app for job app context
+        :return: job dict
+        """
+        if not data:
+            raise RequestDataEmpty("Statement job data is empty")
+        if not self.input_validate.validate_json(data, statement_job_schema):
+            self.logger.error("Statement job validation fail")
+            raise ValidateFail("Statement job validation fail")
+        try:
+            job = StatementJobModel(year=data["year"])
+            StatementJobModel.create_job(job)
+            self.logger.info("Create statement job %s for year %s", job.id, job.year)
+            self._job_executor.submit(self.run_statement_job, app, job.id, job.year)
+            return job.as_dict()
+        except SQLAlchemyError:
+            self.logger.error("Create statement job fail. error %s", traceback.format_exc())
+            raise SQLCustomError(description="Create statement job SQL ERROR")
+
+    def get_statement_job(self, job_id: int) -> Dict[str, Any]:
+        """
+        get job progress
+        :param job_id:
+        :return: job dict with download_url when done
+        """
+        try:
+            job = StatementJobModel.get_job_by_id(job_id)
+        except SQLAlchemyError:
+            self.logger.error("Get statement job fail. id %s. error %s", job_id, traceback.format_exc())
+            raise SQLCustomError(description="GET statement job SQL ERROR")
+        if not job:
+            raise SQLCustomError(description="No data for requested statement job id: {}".format(job_id))
+        job_dict = job.as_dict()
+        job_dict["download_url"] = "/api/v1/donation_statements/{}/download".format(job_id) \
+            if job.status == "done" else None
+        return job_dict
+
+    def get_statement_file(self, job_id: int, user_id: int = None, file_format: str = "html") -> str:
+        """
+        path of job archive, or of one donator statement if user_id is given
+        :param job_id:
+        :param user_id:
+        :param file_format: csv or html
+        :return: file path
+        """
+        if file_format not in STATEMENT_FORMATS:
+            raise ValidateFail("format should be one of {}".format(", ".join(STATEMENT_FORMATS)))
+        if self.get_statement_job(job_id)["status"] != "done":
+            raise ValidateFail("Statement job {} is not done".format(job_id))
+        path = self.archive_path(job_id) if user_id is None else \
+            os.path.join(self.job_dir(job_id), "{}.{}".format(user_id, file_format))
+        if not os.path.isfile(path):
+            raise ValidateFail("No statement for requested user id: {}".format(user_id))
+        return path
+
+    @staticmethod
+    def __statement_batches(columns: List[str], row_chunks: Iterator[List]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        group donator rows into statements and statements into render batches
+        :param columns: grouped row column names
+        :param row_chunks: row chunks ordered by user_id
+        :return: iterator of statement batches
+        """
+        batch = []
+        rows = (dict(zip(columns, row)) for row in chain.from_iterable(row_chunks))
+        for user_id, user_rows in groupby(rows, key=lambda row: row["user_id"]):
+            user_rows = list(user_rows)
+            batch.append({
+                "user_id": user_id,
+                "user_name": user_rows[0]["user_name"],
+                "email": user_rows[0]["email"],
+                "rows": [dict(student_id=row["student_id"], student_name=row["student_name"], month=row["month"],
+                              donation_count=row["donation_count"], mmk_amount=float(row["mmk_amount"]),
+                              jpy_amount=float(row["jpy_amount"])) for row in user_rows]
+            })
+            if len(batch) >= conf["batch_size"]:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run_statement_job(self, app: Flask, job_id: int, year: int) -> None:
+        """
+        stream grouped donation rows, render statement batches in worker processes,
+        update progress per finished batch and archive all files
+        :param app:
+        :param job_id:
+        :param year:
+        """
+        with app.app_context():
+            try:
+                StatementJobModel.update_job(job_id, status="running",
+                                             total=DonationModel.get_statement_donator_count(year))
+                job_dir = self.job_dir(job_id)
+                os.makedirs(job_dir, exist_ok=True)
+                pool = self._get_render_pool()
+                pending = set()
+                for batch in self.__statement_batches(*DonationModel.get_statement_rows(year)):
+                    if pool is None:
+                        StatementJobModel.update_job(job_id, done_increment=render_statements(job_dir, year, batch))
+                        continue
+                    pending.add(pool.submit(render_statements, job_dir, year, batch))
+                    if len(pending) >= conf["workers"] * 2:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        StatementJobModel.update_job(job_id, done_increment=sum(f.result() for f in finished))
+                if pending:
+                    StatementJobModel.update_job(job_id, done_increment=sum(f.result() for f in wait(pending).done))
+                with zipfile.ZipFile(self.archive_path(job_id), "w", zipfile.ZIP_DEFLATED) as archive:
+                    for file_name in sorted(os.listdir(job_dir)):
+                        archive.write(os.path.join(job_dir, file_name), file_name)
+                StatementJobModel.update_job(job_id, status="done")
+                self.logger.info("Statement job %s is done", job_id)
+            except Exception as error:
+                self.logger.error("Statement job %s fail. error %s", job_id, traceback.format_exc())
+                StatementJobModel.update_job(job_id, status="failed", error=str(error))
@@ -5,6 +5,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from common.data_schema import student_schema
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail
+from common.mm_division import get_division_index
 from models.student import StudentModel
 from service.service import Service
 
@@ -26,19 +27,22 @@ class StudentService(Service):
         """
         return [student.student_dict() for student in query]
 
-    def get_all_students(self, page: int = 1, per_page: int = 20) -> (List, Any):
+    def get_all_students(self, page: int = 1, per_page: int = 20, region: Dict[str, str] = None) -> (List, Any):
         """
         get all student
         :params page
         :params per_page
+        :params region: division, district, township names for filter
         :return: student list of dict
         """
+        region_ids = get_division_index().resolve_filter(**(region or {}))
         try:
             self.logger.info("Get all students list")
-            students = StudentModel.get_all_students(page, per_page)
+            students = StudentModel.get_all_students(page, per_page, region_ids)
             return {
                 "students": self.__return_student_list(students.items),
                 "total_count": students.total,
+                "count_estimated": students.estimated,
                 "current_page": students.page,
                 "next_page": students.next_num,
                 "prev_page": students.prev_num,
@@ -64,18 +68,23 @@ class StudentService(Service):
             self.logger.error("Error: {}".format(error))
             raise SQLCustomError(description="GET student by ID SQL ERROR")
 
-    @staticmethod
-    def get_students_by_address_ids(address_ids: tuple) -> Dict[int, StudentModel]:
+    def get_students_by_ids(self, student_ids: List[int]) -> Dict[str, Any]:
         """
-        get student info by address_ids
-        :param address_ids:
-        :return: student list of dict
+        get students info by ids for batch lookup, missing ids are skipped
+        :param student_ids:
+        :return: students list of dict in requested id order
         """
         try:
-            students = StudentModel.get_student_by_address_ids(address_ids)
-            return {student.address_id: student for student in students}
-        except SQLAlchemyError:
-            raise SQLCustomError(description="GET users by ids query SQL ERROR")
+            self.logger.info("Get students info by ids:{}".format(student_ids))
+            position = {student_id: index for index, student_id in enumerate(student_ids)}
+            students = sorted(StudentModel.get_students_by_ids(student_ids), key=lambda student: position[student.id])
+            return {
+                "students": [student.student_dict() for student in students],
+                "total_count": len(students)
+            }
+        except SQLAlchemyError as error:
+            self.logger.error("Error: {}".format(error))
+            raise SQLCustomError(description="GET student by IDs SQL ERROR")
 
     def create_student(self, data: Dict[str, Any]) -> int:
         """
@@ -159,6 +168,7 @@ class StudentService(Service):
             return {
                 "students": self.__return_student_list(students.items),
                 "total_count": students.total,
+                "count_estimated": students.estimated,
                 "current_page": students.page,
                 "next_page": students.next_num,
                 "prev_page": students.prev_num,
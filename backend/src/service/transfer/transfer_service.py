@@ -4,8 +4,10 @@ from typing import Dict, Any, List
 
 from sqlalchemy.exc import SQLAlchemyError
 
-from common.data_schema import transfer_schema
+from common.data_schema import transfer_schema, transfer_allocation_schema
 from common.error import RequestDataEmpty, SQLCustomError, ValidateFail
+from models.donation import DonationModel
+from models.extrafund import ExtraFundsModel
 from models.transfer import TransferModel
 from service.service import Service
 
@@ -84,6 +86,36 @@ class TransferService(Service):
             self.logger.error("Get transfer record by id fail. id %s. error %s", transfer_id, traceback.format_exc())
             raise SQLCustomError(description="GET transfer by ID SQL ERROR")
 
+    def allocate_donations(self, transfer_id: int, data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        allocate paid, unallocated donations of transfer year and month to transfer
+        and suggest extra fund top up for received mmk amount
+        :param transfer_id:
+        :param data: optional received_mmk, mmk amount actually received for transfer
+        :return: transfer, allocated count and extra fund suggestion
+        """
+        data = data or {}
+        if not self.input_validate.validate_json(data, transfer_allocation_schema):
+            self.logger.error("Transfer allocation input is invalid.")
+            raise ValidateFail("Transfer allocation validation fail")
+        try:
+            transfer = TransferModel.get_transfer_by_id(transfer_id)
+            if not transfer:
+                raise SQLCustomError(description="No data for requested transfer id: {}".format(transfer_id))
+            self.logger.info("Allocate donations to transfer id %s", transfer_id)
+            allocated_count, total_mmk, _ = DonationModel.allocate_to_transfer(transfer)
+            extra_fund_mmk = ExtraFundsModel.get_extra_fund_total(transfer_id)
+            received_mmk = data.get("received_mmk", total_mmk)
+            return {
+                "transfer": transfer.as_dict(),
+                "allocated_count": allocated_count,
+                "extra_fund_mmk": extra_fund_mmk,
+                "suggested_extra_fund_mmk": max(0.0, total_mmk - received_mmk - extra_fund_mmk)
+            }
+        except SQLAlchemyError:
+            self.logger.error("Allocate donations fail. id %s. error %s", transfer_id, traceback.format_exc())
+            raise SQLCustomError(description="Allocate donations to transfer SQL ERROR")
+
     def delete_transfer_by_id(self, transfer_id: int) -> bool:
         """
         delete transfer by id
@@ -110,6 +142,7 @@ class TransferService(Service):
             return {
                 "transfers": [transfer.as_dict() for transfer in transfers.items],
                 "total_count": transfers.total,
+                "count_estimated": transfers.estimated,
                 "current_page": transfers.page,
                 "next_page": transfers.next_num,
                 "prev_page": transfers.prev_num,
@@ -3,10 +3,12 @@ import traceback
 from typing import List, Dict, Any, Optional
 
 from sqlalchemy.exc import SQLAlchemyError
-from werkzeug.security import generate_password_hash, check_password_hash
 
 from common.data_schema import user_schema, user_update_schema, password_reset_schema, password_change_schema
 from common.error import SQLCustomError, RequestDataEmpty, ValidateFail, ThingahaCustomError
+from common.mm_division import get_division_index
+from common.password_hasher import get_password_hasher
+from models.donation import DonationModel
 from models.user import UserModel
 from service.service import Service
 
@@ -36,7 +38,7 @@ class UserService(Service):
                 username=data["username"],
                 email=data["email"],
                 address_id=data["address_id"],
-                hashed_password=generate_password_hash(data["password"]),
+                hashed_password=get_password_hasher().hash_password(data["password"]),
                 role=data["role"],
                 country=data["country"],
                 donation_active=data["donation_active"]))
@@ -75,41 +77,42 @@ class UserService(Service):
                               user_id, traceback.format_exc(), error)
             raise SQLCustomError(description="No record for requested user")
 
-    def delete_user_by_id(self, user_id: int) -> bool:
+    def delete_user_by_id(self, user_id: int, chunk_size: int = None) -> bool:
         """
         delete user by id
         :param user_id:
+        :param chunk_size: delete donation history in chunks first if given
         :return:
         """
         try:
-            self.logger.info("delete user by id", user_id)
+            self.logger.info("delete user by id %s", user_id)
+            if chunk_size:
+                deleted_count = DonationModel.delete_donations_by_user_id(user_id, chunk_size)
+                self.logger.info("Deleted %s donations for user id %s", deleted_count, user_id)
             return UserModel.delete_user(user_id)
         except SQLAlchemyError:
             self.logger.error("User delete fail. id %s, error %s", user_id, traceback.format_exc())
             raise SQLCustomError(description="Delete user by ID SQL ERROR")
 
-    def get_all_users(self, page: int = 1, role: str = None, country: str = None, per_page: int = 20) -> (List[Dict[str, Any]], int):
+    def get_all_users(self, page: int = 1, role: str = None, country: str = None, per_page: int = 20,
+                      region: Dict[str, str] = None) -> (List[Dict[str, Any]], int):
         """
         get all users
         :params: page page count
         :params: role -> user role for filter
         :params: country -> country for filter
         :params: per_page
+        :params: region -> division, district, township names for filter
         :return: users list of dict
         """
         self.logger.info("Get all users list")
+        region_ids = get_division_index().resolve_filter(**(region or {}))
         try:
-            if role and not country:
-                users = UserModel.get_users_by_role(page, role, per_page)
-            elif country and not role:
-                users = UserModel.get_users_by_country(page, country, per_page)
-            elif role and country:
-                users = UserModel.get_users_by_role_country(page, role, country, per_page)
-            else:
-                users = UserModel.get_all_users(page, per_page)
+            users = UserModel.get_all_users(page, per_page, role, country, region_ids)
             return {
                 "users": self.__return_user_list(users.items),
                 "total_count": users.total,
+                "count_estimated": users.estimated,
                 "current_page": users.page,
                 "next_page": users.next_num,
                 "prev_page": users.prev_num,
@@ -133,6 +136,7 @@ class UserService(Service):
             return {
                 "users": self.__return_user_list(users.items),
                 "total_count": users.total,
+                "count_estimated": users.estimated,
                 "current_page": users.page,
                 "next_page": users.next_num,
                 "prev_page": users.prev_num,
@@ -159,43 +163,54 @@ class UserService(Service):
                               traceback.format_exc())
             raise SQLCustomError(description="GET user by ID SQL ERROR")
 
-    @staticmethod
-    def get_user_by_address_ids(address_ids: tuple) -> Dict[int, UserModel]:
+    def get_users_by_ids(self, user_ids: List[int]) -> Dict[str, Any]:
         """
-        get users by address ids
-        :params: address_ids
-        :return: users list of dict
+        get users info by ids for batch lookup, missing ids are skipped
+        :param user_ids:
+        :return: users list of dict in requested id order
         """
         try:
-            users = UserModel.get_users_by_address_ids(address_ids)
-            return {user.address_id: user for user in users}
-        except SQLAlchemyError:
-            raise SQLCustomError(description="GET users by ids query SQL ERROR")
+            self.logger.info("Get users info by ids:{}".format(user_ids))
+            position = {user_id: index for index, user_id in enumerate(user_ids)}
+            users = sorted(UserModel.get_users_by_ids(user_ids), key=lambda user: position[user.id])
+            return {
+                "users": [user.as_dict() for user in users],
+                "total_count": len(users)
+            }
+        except SQLAlchemyError as error:
+            self.logger.error("Error: {}".format(error))
+            raise SQLCustomError(description="GET user by IDs SQL ERROR")
 
-    @staticmethod
-    def check_password(password: str, user: UserModel):
+    def check_password(self, password: str, user: UserModel) -> bool:
         """
-        check role for API call
+        check password in hash worker pool, stored hash is upgraded to conf hash method if valid
         :param password:
         :param user:
         :return:
         """
-        return check_password_hash(user.hashed_password, password)
+        valid, new_hashed_password = get_password_hasher().verify(user.hashed_password, password)
+        if new_hashed_password:
+            try:
+                UserModel.change_password(user.id, new_hashed_password)
+                self.logger.info("Upgrade password hash for user id %s", user.id)
+            except SQLAlchemyError:
+                self.logger.error("Upgrade password hash fail. id %s. error %s", user.id, traceback.format_exc())
+        return valid
 
-    def get_user_by_email(self, email: str) -> Optional[UserModel]:
+    def get_user_by_email_or_username(self, email_or_username: str) -> Optional[UserModel]:
         """
-        get user by email address
-        :param email:
+        get user by case insensitive email address or username
+        :param email_or_username:
         :return:
         """
-        self.logger.info("Get users list by email %s", email)
+        self.logger.info("Get user by email or username %s", email_or_username)
         try:
-            user = UserModel.get_user_by_email(email)
+            user = UserModel.get_user_by_email_or_username(email_or_username)
             return user if user else None
         except SQLAlchemyError:
-            self.logger.error("Get users by email fail. email %s. error %s", email,
+            self.logger.error("Get user by email or username fail. %s. error %s", email_or_username,
                               traceback.format_exc())
-            raise SQLCustomError(description="Get user by email SQL ERROR")
+            raise SQLCustomError(description="Get user by email or username SQL ERROR")
 
     def get_user_model_by_id(self, user_id: int) -> Optional[UserModel]:
         """
@@ -211,21 +226,6 @@ class UserService(Service):
                               traceback.format_exc())
             raise SQLCustomError(description="Get user by user_id SQL ERROR")
 
-    def get_user_by_username(self, username: str) -> Optional[UserModel]:
-        """
-
-        :param username:
-        :return:
-        """
-        self.logger.info("Get users list by username %s", username)
-        try:
-            user = UserModel.get_user_by_username(username)
-            return user if user else None
-        except SQLAlchemyError:
-            self.logger.error("Get users by id fail. usename %s. error %s", username,
-                              traceback.format_exc())
-            raise SQLCustomError(description="Get user by username SQL ERROR")
-
     @staticmethod
     def __return_user_list(users: List[UserModel]) -> List[Dict[str, Any]]:
         """
@@ -244,7 +244,7 @@ class UserService(Service):
         """
         self.logger.info("Change user password by id %s", user_id)
         try:
-            return UserModel.change_password(user_id, generate_password_hash(new_pwd))
+            return UserModel.change_password(user_id, get_password_hasher().hash_password(new_pwd))
         except SQLAlchemyError:
             self.logger.error("Password change fail. id %s, error %s", user_id,
                               traceback.format_exc())
@@ -1,5 +1,8 @@
+import gzip
+import json
 import os
 import sys
+import time
 
 import pytest
 
@@ -9,6 +12,11 @@ from models.address import AddressModel
 from flask_jwt_extended import create_access_token, JWTManager
 from datetime import timedelta
 from app import create_app, db
+from common.analytics import AnalyticsSnapshot
+from common.donation_matrix import donation_matrix
+from common.query_cache import QueryCache
+from common.error import TooManyRequests
+from common.rate_limit import RateLimiter, MemoryBackend
 
 
 @pytest.fixture
@@ -186,6 +194,12 @@ def test_address_create_update(client, json_access_token, address_json):
     assert res.status_code == 200
 
 
+def test_address_unknown_division(client, json_access_token, address_json):
+    address_json["division"] = "unknown division"
+    res = client.post("/api/v1/addresses", json=address_json, headers=json_access_token)
+    assert res.status_code == 400
+
+
 def test_address_delete(client, json_access_token, address_json):
     res = client.post("/api/v1/addresses", json=address_json, headers=json_access_token)
     assert res.status_code == 200
@@ -211,6 +225,24 @@ def test_school_id(client, json_access_token, school_json):
     assert res.status_code == 200
 
 
+def test_get_by_ids_and_batch(client, json_access_token, school_json):
+    res = client.post("/api/v1/schools", json=school_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/schools?ids=1,999", headers=json_access_token)
+    assert res.status_code == 200
+    assert res.get_json()["data"]["total_count"] == 1
+    res = client.get("/api/v1/students?ids=1,a", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.post("/api/v1/batch", json={"requests": [
+        {"method": "GET", "path": "/api/v1/schools/1"},
+        {"method": "GET", "path": "/api/v1/users?ids=1,2"}]}, headers=json_access_token)
+    assert res.status_code == 200
+    assert [response["status"] for response in res.get_json()["data"]["responses"]] == [200, 200]
+    res = client.post("/api/v1/batch", json={"requests": [{"method": "DELETE", "path": "/api/v1/schools/1"}]},
+                      headers=json_access_token)
+    assert res.status_code == 400
+
+
 def test_delete_school_id(client, json_access_token, school_json):
     res = client.post("/api/v1/schools", json=school_json, headers=json_access_token)
     assert res.status_code == 200
@@ -256,6 +288,32 @@ def test_get_user_by_id(client, json_access_token):
     assert res.status_code == 200
 
 
+def test_login_upgrades_password_hash(init_app, client, json_access_token):
+    res = client.post("/api/v1/login", json={"email_or_username": "AA@gmail.com", "password": "123"})
+    assert res.status_code == 200
+    with init_app.app_context():
+        assert UserModel.get_user_by_id(1).hashed_password.startswith("pbkdf2:sha256:260000$")
+    res = client.post("/api/v1/login", json={"email_or_username": "AA", "password": "123"})
+    assert res.status_code == 200
+    res = client.post("/api/v1/login", json={"email_or_username": "aa", "password": "1234"})
+    assert res.status_code == 401
+
+
+def test_rate_limiter():
+    rate_limiter = RateLimiter(MemoryBackend(), {"ip": {"rate": 0.001, "capacity": 2}}, {"search": 1})
+    rate_limiter.check("ip", "127.0.0.1")
+    rate_limiter.check("ip", "127.0.0.1")
+    with pytest.raises(TooManyRequests) as error:
+        rate_limiter.check("ip", "127.0.0.1")
+    assert error.value.retry_after > 0
+    rate_limiter.check("ip", "127.0.0.2")
+    assert rate_limiter.acquire("search")
+    with pytest.raises(TooManyRequests):
+        rate_limiter.acquire("search")
+    rate_limiter.release("search")
+    assert rate_limiter.acquire("search")
+
+
 def test_change_password(client, json_access_token):
     data = {
               "current_password": "123",
@@ -305,6 +363,26 @@ def test_delete_user_by_id(client, json_access_token, user_json, address_json):
     assert res.status_code == 200
 
 
+def test_delete_user_with_donations_in_chunks(client, json_access_token, donation_json,
+                                              transfer_json, school_json, student_json, attendance_json):
+    res = client.post("/api/v1/transfers", json=transfer_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/schools", json=school_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/students", json=student_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/attendances", json=attendance_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/donations", json=donation_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.delete("/api/v1/users/1?chunk_size=1", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/donations/1", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.delete("/api/v1/users/1", headers=json_access_token)
+    assert res.status_code == 404
+
+
 def test_search_users(client, json_access_token):
     res = client.get("/api/v1/users/search?query=aa", headers=json_access_token)
     assert res.status_code == 200
@@ -329,6 +407,18 @@ def test_get_attendance(client, json_access_token):
     assert res.status_code == 200
     res = client.get("/api/v1/attendances?grade=G-10&year=2020", headers=json_access_token)
     assert res.status_code == 200
+    res = client.get("/api/v1/attendances?school_id=1,2&year=2020&sort=-year,id", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/attendances?sort=enrolled_date", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.get("/api/v1/attendances?school_id=abc", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.get("/api/v1/attendances?fields=grade,year&expand=student", headers=json_access_token)
+    assert res.status_code == 200
+    for attendance in res.get_json()["data"]["attendances"]:
+        assert set(attendance.keys()) == {"id", "grade", "year", "student"}
+    res = client.get("/api/v1/attendances?fields=photo", headers=json_access_token)
+    assert res.status_code == 400
 
 
 def test_post_attendance(client, json_access_token, school_json, attendance_json, student_json):
@@ -431,6 +521,30 @@ def test_student(client, json_access_token):
     assert res.status_code == 200
 
 
+def test_student_region_filter(client, json_access_token, student_json):
+    res = client.post("/api/v1/students", json=student_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/students?division=yangon", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/schools?division=yangon&district=East Yangon", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/users?division=yangon&role=admin", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/students?township=Latha", headers=json_access_token)
+    assert res.status_code == 400
+
+
+def test_region_stats(client, json_access_token, school_json):
+    res = client.post("/api/v1/schools", json=school_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/stats/regions", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/stats/regions?level=township&division=yangon", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/stats/regions?level=street", headers=json_access_token)
+    assert res.status_code == 400
+
+
 def test_student_id(client, json_access_token, student_json):
     res = client.post("/api/v1/students", json=student_json, headers=json_access_token)
     assert res.status_code == 200
@@ -583,6 +697,113 @@ def test_create_update_donation(client, json_access_token, donation_json,
     assert res.status_code == 200
 
 
+def test_year_partitions(init_app, client, json_access_token, donation_json,
+                         transfer_json, school_json, student_json, attendance_json):
+    for path, data in (("transfers", transfer_json), ("schools", school_json), ("students", student_json),
+                       ("attendances", attendance_json), ("donations", donation_json)):
+        res = client.post("/api/v1/{}".format(path), json=data, headers=json_access_token)
+        assert res.status_code == 200
+    with init_app.app_context():
+        partition = db.session.execute("SELECT tableoid::regclass::text FROM donations WHERE id = 1").scalar()
+        assert partition == "donations_y{}".format(donation_json["year"])
+    res = client.post("/api/v1/donations", json={**donation_json, "attendance_id": 99}, headers=json_access_token)
+    assert res.status_code == 400
+    res = client.delete("/api/v1/attendances/1", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/donations/1", headers=json_access_token)
+    assert res.status_code == 400
+
+
+def test_bulk_update_donations(client, json_access_token, donation_json,
+                               transfer_json, school_json, student_json, attendance_json):
+    res = client.post("/api/v1/transfers", json=transfer_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/schools", json=school_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/students", json=student_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/attendances", json=attendance_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/donations", json=donation_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.patch("/api/v1/donations/bulk", json={"ids": [1, 2], "set": {"paid_at": None}},
+                       headers=json_access_token)
+    assert res.status_code == 200
+    assert res.get_json()["data"] == {"updated_count": 1, "updated_ids": [1], "not_found_ids": [2]}
+    res = client.patch("/api/v1/donations/bulk", json={
+        "filter": {"year": 2020, "month": "january", "status": "pending", "school_id": 1},
+        "set": {"paid_at": "2020-03-01", "transfer_id": 1}}, headers=json_access_token)
+    assert res.status_code == 200
+    assert res.get_json()["data"]["updated_count"] == 1
+    res = client.patch("/api/v1/donations/bulk", json={"filter": {}, "set": {"paid_at": None}},
+                       headers=json_access_token)
+    assert res.status_code == 400
+
+
+def test_allocate_transfer_donations(client, json_access_token, donation_json,
+                                     transfer_json, school_json, student_json, attendance_json):
+    res = client.post("/api/v1/transfers", json=transfer_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/schools", json=school_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/students", json=student_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/attendances", json=attendance_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/donations", json=donation_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.patch("/api/v1/donations/bulk", json={"ids": [1], "set": {"transfer_id": None}},
+                       headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/donations/unallocated?year=2020&month=january", headers=json_access_token)
+    assert res.status_code == 200
+    assert res.get_json()["data"]["total_count"] == 1
+    res = client.post("/api/v1/transfers", json={**transfer_json, "month": "january"}, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/transfers/2/allocate", json={"received_mmk": 0}, headers=json_access_token)
+    assert res.status_code == 200
+    assert res.get_json()["data"]["allocated_count"] == 1
+    assert res.get_json()["data"]["transfer"]["total_mmk"] == donation_json["mmk_amount"]
+    assert res.get_json()["data"]["suggested_extra_fund_mmk"] == donation_json["mmk_amount"]
+    res = client.get("/api/v1/donations/unallocated?year=2020&month=january", headers=json_access_token)
+    assert res.get_json()["data"]["total_count"] == 0
+    res = client.post("/api/v1/transfers/99/allocate", headers=json_access_token)
+    assert res.status_code == 400
+
+
+def test_exchange_rates(client, json_access_token, donation_json,
+                        transfer_json, school_json, student_json, attendance_json):
+    res = client.post("/api/v1/transfers", json={**transfer_json, "month": "january", "total_jpy": 400},
+                      headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/schools", json=school_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/students", json=student_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/attendances", json=attendance_json, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.post("/api/v1/donations", json={**donation_json, "jpy_amount": 400.0}, headers=json_access_token)
+    assert res.status_code == 200
+    res = client.put("/api/v1/exchange_rates", json={"rates": [{"transfer_id": 1, "jpy_to_mmk": 15}]},
+                     headers=json_access_token)
+    assert res.status_code == 200
+    change = res.get_json()["data"]["changes"][0]
+    assert change["donation_count"] == 1
+    assert change["donation_mmk_before"] == donation_json["mmk_amount"]
+    assert change["donation_mmk_after"] == 6000.0
+    assert change["transfer_count"] == 1
+    res = client.get("/api/v1/transfers/1", headers=json_access_token)
+    assert res.get_json()["data"]["transfer"]["total_mmk"] == 6000.0
+    res = client.put("/api/v1/exchange_rates", json={"rates": [{"year": 2020, "month": "january", "jpy_to_mmk": 15}]},
+                     headers=json_access_token)
+    assert res.get_json()["data"]["changes"] == []
+    res = client.get("/api/v1/exchange_rates/changes?year=2020", headers=json_access_token)
+    assert len(res.get_json()["data"]["changes"]) == 1
+    res = client.put("/api/v1/exchange_rates", json={"rates": [{"year": 2020, "month": "jan", "jpy_to_mmk": 15}]},
+                     headers=json_access_token)
+    assert res.status_code == 400
+
+
 def test_delete_donation(client, json_access_token, donation_json,
                                 transfer_json, school_json, student_json, attendance_json):
     res = client.post("/api/v1/transfers", json=transfer_json, headers=json_access_token)
@@ -611,4 +832,144 @@ def test_divisions(client, json_access_token):
 def test_donations(client, json_access_token):
     res = client.get("/api/v1/donations", headers=json_access_token)
     assert res.status_code == 200
+    res = client.get("/api/v1/donations?year=2020&month=january,february&status=paid&sort=-month",
+                     headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/donations?school_id=1&student_id=1", headers=json_access_token)
+    assert res.status_code == 200
+    res = client.get("/api/v1/donations?status=unknown", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.get("/api/v1/donations?fields=month,status&expand=", headers=json_access_token)
+    assert res.status_code == 200
+    for donation in res.get_json()["data"]["donations"]:
+        assert set(donation.keys()) == {"id", "month", "status"}
+    res = client.get("/api/v1/donations?expand=transfer", headers=json_access_token)
+    assert res.status_code == 400
+
+
+def test_count_strategy(client, json_access_token):
+    for count_strategy in ("exact", "cached", "estimated"):
+        res = client.get("/api/v1/donations?per_page=1&count={}".format(count_strategy), headers=json_access_token)
+        assert res.status_code == 200
+        assert "count_estimated" in res.get_json()["data"]
+    res = client.get("/api/v1/donations?per_page=1&count=cached&year=2020", headers=json_access_token)
+    assert res.status_code == 200
+    assert res.get_json()["data"]["count_estimated"] is False
+    res = client.get("/api/v1/donations?count=unknown", headers=json_access_token)
+    assert res.status_code == 400
+    query_cache = QueryCache()
+    query_cache.set("donations", {"donations"}, 3)
+    assert query_cache.get("donations") == 3
+    query_cache.invalidate("donations")
+    assert query_cache.get("donations") is None
+
+
+def test_exports(client, json_access_token):
+    res = client.get("/api/v1/exports/donations?year=2020", headers=json_access_token)
+    assert res.status_code == 200
+    assert res.mimetype == "text/csv"
+    lines = res.get_data(as_text=True).splitlines()
+    assert lines[0].startswith("id,year,month,mmk_amount")
+    res = client.get("/api/v1/exports/attendances?format=ndjson", headers=json_access_token)
+    assert res.status_code == 200
+    for line in res.get_data(as_text=True).splitlines():
+        assert "student_name" in json.loads(line)
+    res = client.get("/api/v1/exports/users", headers={**json_access_token, "Accept-Encoding": "gzip"})
+    assert res.status_code == 200
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "password" not in gzip.decompress(res.get_data()).decode().splitlines()[0]
+    res = client.get("/api/v1/exports/students?format=xml", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.get("/api/v1/exports/transfers", headers=json_access_token)
+    assert res.status_code == 400
+
+
+def test_donation_statements(client, json_access_token):
+    res = client.post("/api/v1/donation_statements", json={"year": "2020"}, headers=json_access_token)
+    assert res.status_code == 400
+    res = client.post("/api/v1/donation_statements", json={"year": 2020}, headers=json_access_token)
+    assert res.status_code == 202
+    job_id = res.get_json()["data"]["id"]
+    for _ in range(50):
+        res = client.get("/api/v1/donation_statements/{}".format(job_id), headers=json_access_token)
+        assert res.status_code == 200
+        if res.get_json()["data"]["status"] in ("done", "failed"):
+            break
+        time.sleep(0.1)
+    job = res.get_json()["data"]
+    assert job["status"] == "done"
+    assert job["done"] == job["total"]
+    res = client.get(job["download_url"], headers=json_access_token)
+    assert res.status_code == 200
+    assert res.mimetype == "application/zip"
+    res = client.get("/api/v1/donation_statements/{}/users/1?format=pdf".format(job_id), headers=json_access_token)
+    assert res.status_code == 400
+
+
+def test_analytics_query(client, json_access_token):
+    res = client.get("/api/v1/analytics/query?group_by=year,month&metrics=count,mmk_amount&status=paid",
+                     headers=json_access_token)
+    assert res.status_code == 200
+    for row in res.get_json()["data"]["rows"]:
+        assert set(row.keys()) == {"year", "month", "count", "mmk_amount"}
+    res = client.get("/api/v1/analytics/query?group_by=student", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.get("/api/v1/analytics/query?year=last", headers=json_access_token)
+    assert res.status_code == 400
+    snapshot = AnalyticsSnapshot()
+    columns = ["id", "year", "month", "mmk_amount", "jpy_amount", "paid", "country", "role", "school_id", "grade"]
+    snapshot.load(columns, [[(1, 2020, "march", 100.0, 1.0, True, "jp", "donator", 1, "G-1"),
+                             (2, 2020, "january", 50.0, 0.0, False, "mm", "donator", 2, "KG")]])
+    snapshot.append(columns, [[(3, 2021, "january", 10.0, 2.0, True, "jp", "admin", 1, "G-1")]])
+    assert snapshot.query(["country"], ["count", "mmk_amount"], {"status": ["paid"]}) == [
+        {"country": "jp", "count": 2, "mmk_amount": 110.0}]
+
+
+def test_donation_matrix(client, json_access_token):
+    res = client.get("/api/v1/donations/matrix?year=2020", headers=json_access_token)
+    assert res.status_code == 200
+    data = res.get_json()["data"]
+    assert len(data["months"]) == 12
+    for cell_row in data["cells"]:
+        assert len(cell_row) == 12 * len(data["fields"])
+    assert len(data["cells"]) == len(data["donators"])
+    res = client.get("/api/v1/donations/matrix", headers=json_access_token)
+    assert res.status_code == 400
+    matrix = donation_matrix(2020, [(1, "a", "march", 2, 2, 100.0, 1.0), (2, "b", "january", 2, 1, 10.0, 0.0)])
+    assert matrix["donators"] == [[1, "a"], [2, "b"]]
+    assert matrix["cells"][0][6:9] == [2, 100.0, 1.0]
+    assert matrix["cells"][1][0:3] == [3, 10.0, 0.0]
+
+
+def test_gap_report(client, json_access_token):
+    res = client.get("/api/v1/reports/gaps?year=2020&month=february", headers=json_access_token)
+    assert res.status_code == 200
+    data = res.get_json()["data"]
+    for student in data["students"]:
+        assert set(student.keys()) == {"attendance_id", "student_id", "student_name", "school_id",
+                                       "school_name", "grade"}
+    res = client.get("/api/v1/reports/gaps?kind=donators&year=2020&month=january", headers=json_access_token)
+    assert res.status_code == 200
+    assert "donators" in res.get_json()["data"]
+    res = client.get("/api/v1/reports/gaps?year=2020&month=jan", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.get("/api/v1/reports/gaps?kind=schools&year=2020&month=january", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.get("/api/v1/exports/gaps?year=2020&month=february", headers=json_access_token)
+    assert res.status_code == 200
+    assert res.get_data(as_text=True).splitlines()[0].startswith("attendance_id,student_id")
+    res = client.get("/api/v1/exports/gaps?month=february", headers=json_access_token)
+    assert res.status_code == 400
+
+
+def test_forecast(client, json_access_token):
+    res = client.get("/api/v1/forecast?months=6&new_enrolments=2&jpy_rate=13.5", headers=json_access_token)
+    assert res.status_code == 200
+    data = res.get_json()["data"]
+    assert len(data["forecast"]) == 6
+    assert data["forecast"][1]["students"] == data["forecast"][0]["students"] + 2
+    res = client.get("/api/v1/forecast?months=100", headers=json_access_token)
+    assert res.status_code == 400
+    res = client.get("/api/v1/forecast?lapse_rate=2", headers=json_access_token)
+    assert res.status_code == 400
 # End Donation #
@@ -525,4 +525,15 @@ def test_divisions(client, json_access_token):
 def test_donations(client, json_access_token):
     res = client.get("/api/v1/donations", headers=json_access_token)
     assert res.status_code == 200
+    res = client.patch("/api/v1/donations/bulk", json={"ids": [1], "set": {"paid_at": None}},
+                       headers=json_access_token)
+    assert res.status_code == 403
+    res = client.get("/api/v1/exports/donations", headers=json_access_token)
+    assert res.status_code == 403
+    res = client.post("/api/v1/donation_statements", json={"year": 2020}, headers=json_access_token)
+    assert res.status_code == 403
+    res = client.get("/api/v1/donations/matrix?year=2020", headers=json_access_token)
+    assert res.status_code == 403
+    res = client.get("/api/v1/reports/gaps?year=2020&month=january", headers=json_access_token)
+    assert res.status_code == 403
 # End Donation #